@@ -0,0 +1,442 @@
+import os
+import sys
+import signal
+import asyncio
+from concurrent import futures
+
+import grpc
+import asyncpg
+from grpc_health.v1 import health_pb2_grpc
+from grpc_health.v1.health import aio as health_aio
+
+import manutencoes_pb2
+import manutencoes_pb2_grpc
+
+import veiculos_pb2
+import veiculos_pb2_grpc
+import comum
+from comum import (
+    DB_HOST, DB_NAME, DB_USER, DB_PASSWORD, VEICULOS_SERVICE_HOST, GRPC_MAX_WORKERS, STATS_INTERVAL_SECONDS,
+    STREAM_BATCH_SIZE, METRICS_ENABLED, TRACE_ENABLED, to_manutencao, where_filtro, ler_filtro, validar_pagina,
+    montar_pagina, montar_resumo, prazo_veiculos, validar_chave,
+    configurar_rastreamento, configurar_logs, LOG_RPC_LENTO_MS, log, log_db, log_veiculos,
+    HEALTH_INTERVAL_SECONDS, HEALTH_TIMEOUT_SECONDS, SERVICO_SAUDE, SHUTDOWN_DELAY_SECONDS, SHUTDOWN_GRACE_SECONDS,
+    GRPC_PORT, porta_metricas, argumentos_servidor, argumentos_canal_veiculos,
+    TENTATIVAS_CHAVE_IDEMPOTENCIA, ChaveIdempotenciaError
+)
+from server import GestaoManutencoesServicer
+from resiliencia import CircuitBreaker
+from metricas import (
+    InterceptorMetricasAsync, InterceptorClienteMetricasAsync, iniciar_servidor_metricas, medir_consulta
+)
+import rastreamento
+from rastreamento import ConexaoRastreadaMixin, InterceptorRastreamentoAsync, InterceptorClienteRastreamentoAsync
+import logs
+from logs import InterceptorLogsAsync
+from saude import MonitorSaude
+import configuracao
+
+AIO_DB_POOL_MIN_SIZE = int(os.getenv("AIO_DB_POOL_MIN_SIZE", "2"))
+AIO_DB_POOL_SIZE = int(os.getenv("AIO_DB_POOL_SIZE", "50"))
+# O pool psycopg2 continua existindo, mas aqui só atende os RPCs herdados ainda síncronos,
+# o group commit, o arquivamento e o health check: limitado a poucas conexões, o processo
+# não mantém dois pools cheios.
+AIO_DB_SYNC_POOL_SIZE = int(os.getenv("AIO_DB_SYNC_POOL_SIZE", "4"))
+
+
+class ConexaoRastreada(ConexaoRastreadaMixin, asyncpg.Connection):
+    """Conexões do pool asyncpg; sem rastreamento configurado só repassam as chamadas."""
+
+
+class AsyncManutencoesDB:
+    """Acesso ao banco com asyncpg, usado pelos RPCs assíncronos do modo asyncio."""
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    @classmethod
+    async def create(cls, min_size=AIO_DB_POOL_MIN_SIZE, max_size=AIO_DB_POOL_SIZE):
+        pool = await asyncpg.create_pool(
+            host=DB_HOST,
+            database=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            min_size=min_size,
+            max_size=max_size,
+            connection_class=ConexaoRastreada
+        )
+        log_db.info(f"Pool asyncpg com o PostgreSQL de Manutenções criado ({max_size} conexões no máximo).")
+        return cls(pool)
+
+    @medir_consulta
+    async def create_manutencao(self, id_veiculo, placa_veiculo, descricao, chave_idempotencia=None):
+        for _ in range(TENTATIVAS_CHAVE_IDEMPOTENCIA):
+            row = await self._pool.fetchrow(
+                """
+                INSERT INTO manutencoes (id_veiculo, placa_veiculo, descricao, chave_idempotencia)
+                VALUES ($1, $2, $3, $4)
+                ON CONFLICT (chave_idempotencia, arquivada) WHERE chave_idempotencia IS NOT NULL DO NOTHING
+                RETURNING id, id_veiculo, placa_veiculo, descricao, status;
+                """,
+                id_veiculo, placa_veiculo, descricao, chave_idempotencia
+            )
+            if row is not None:
+                return tuple(row)
+            # chave já usada (por uma chamada concorrente): devolve a manutenção dela, a não
+            # ser que ela tenha sido arquivada nesse meio-tempo, o que libera a chave
+            existente = (await self.get_manutencoes_by_chaves([chave_idempotencia])).get(chave_idempotencia)
+            if existente is not None:
+                return existente
+        raise ChaveIdempotenciaError(f"Manutenção da chave_idempotencia {chave_idempotencia!r} não encontrada.")
+
+    @medir_consulta
+    async def get_manutencoes_by_chaves(self, chaves):
+        rows = await self._pool.fetch(
+            """
+            SELECT id, id_veiculo, placa_veiculo, descricao, status, chave_idempotencia
+            FROM manutencoes WHERE chave_idempotencia = ANY($1::varchar[]);
+            """,
+            list(chaves)
+        )
+        return {row[5]: tuple(row)[:5] for row in rows}
+
+    @medir_consulta
+    async def get_manutencoes_nao_arquivadas(self, ids):
+        rows = await self._pool.fetch(
+            """
+            SELECT id, id_veiculo, placa_veiculo, descricao, status
+            FROM manutencoes WHERE id = ANY($1::integer[]) AND NOT arquivada;
+            """,
+            list(ids)
+        )
+        return {row[0]: tuple(row) for row in rows}
+
+    @medir_consulta
+    async def list_all_manutencoes(self):
+        return await self._pool.fetch("SELECT id, id_veiculo, placa_veiculo, descricao, status FROM manutencoes;")
+
+    @medir_consulta
+    async def get_manutencao_by_id(self, manutencao_id):
+        return await self._pool.fetchrow(
+            "SELECT id, id_veiculo, placa_veiculo, descricao, status FROM manutencoes WHERE id = $1;",
+            manutencao_id
+        )
+
+    @medir_consulta
+    async def get_resumo(self):
+        return await self._pool.fetch(
+            """
+            SELECT id_veiculo, placa_veiculo, status, total FROM manutencoes_resumo
+            WHERE total > 0 ORDER BY id_veiculo, placa_veiculo, status;
+            """
+        )
+
+    @medir_consulta
+    async def fetch_page(self, filtro, after_id, limit):
+        where, params = where_filtro(filtro, after_id, placeholder=lambda i: f"${i}")
+        return await self._pool.fetch(
+            f"SELECT id, id_veiculo, placa_veiculo, descricao, status FROM manutencoes "
+            f"WHERE {where} ORDER BY id LIMIT ${len(params) + 1};",
+            *params, limit
+        )
+
+    @medir_consulta
+    async def iter_filtrado(self, filtro, batch_size=STREAM_BATCH_SIZE):
+        """Percorre as manutenções do filtro em lotes, com um cursor do lado do servidor."""
+        where, params = where_filtro(filtro, 0, placeholder=lambda i: f"${i}")
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                cursor = await conn.cursor(
+                    f"SELECT id, id_veiculo, placa_veiculo, descricao, status FROM manutencoes "
+                    f"WHERE {where} ORDER BY id;",
+                    *params
+                )
+                while True:
+                    rows = await cursor.fetch(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+
+    def stats(self):
+        return {
+            "size": self._pool.get_size(),
+            "max_size": self._pool.get_max_size(),
+            "idle": self._pool.get_idle_size(),
+        }
+
+    @medir_consulta
+    async def verificar(self):
+        return await self._pool.fetchval("SELECT 1;") == 1
+
+    async def close(self):
+        await self._pool.close()
+
+
+class AsyncGestaoManutencoesServicer(GestaoManutencoesServicer):
+    """
+    Servicer do modo asyncio.
+
+    CriarManutencao, ListarManutencoes, ListarPaginaManutencoes, StreamManutencoes
+    e BuscarPorId são corrotinas: o banco é acessado pelo asyncpg e o MS Veiculos
+    por um stub grpc.aio, sem bloquear threads. RPCs herdados sem versão assíncrona rodam no `migration_thread_pool`.
+    """
+
+    def __init__(self, aio_db):
+        super().__init__(db_pool_size=AIO_DB_SYNC_POOL_SIZE)
+        self.aio_db = aio_db
+        interceptors = [InterceptorClienteMetricasAsync()] if METRICS_ENABLED else []
+        if TRACE_ENABLED:
+            interceptors.append(InterceptorClienteRastreamentoAsync())
+        self.aio_veiculos_channel = grpc.aio.insecure_channel(
+            VEICULOS_SERVICE_HOST, interceptors=interceptors or None, **argumentos_canal_veiculos()
+        )
+        self.aio_veiculos_stub = veiculos_pb2_grpc.GestaoVeiculosStub(self.aio_veiculos_channel)
+        self._tarefas_revalidacao = set()
+
+    async def _resolver_id_veiculo_async(self, placa, context=None):
+        resolvido, id_veiculo, velho = self._id_em_cache(placa)
+        if velho:
+            self._revalidar_async(placa)
+        if resolvido:
+            return id_veiculo
+        return await self._buscar_id_veiculo_async(placa, context)
+
+    async def _buscar_id_veiculo_async(self, placa, context=None):
+        geracoes = self._geracoes_cache()
+        request = veiculos_pb2.VeiculoPlaca(placa=placa)
+        try:
+            veiculo_response = await self.chamada_veiculos.executar_async(
+                lambda timeout: self.aio_veiculos_stub.BuscarPorPlaca(request, timeout=timeout),
+                prazo_veiculos(context)
+            )
+            id_veiculo = veiculo_response.id
+        except grpc.RpcError as e:
+            if e.code() != grpc.StatusCode.NOT_FOUND:
+                raise
+            id_veiculo = None
+        self._guardar_id_veiculo(placa, id_veiculo, geracoes)
+        return id_veiculo
+
+    def _revalidar_async(self, placa):
+        """Equivalente a `_revalidar` com uma task no event loop em vez de uma thread."""
+        if self.chamada_veiculos.breaker.estado() == CircuitBreaker.ABERTO:
+            return
+        with self._revalidando_lock:
+            if placa in self._revalidando:
+                return
+            self._revalidando.add(placa)
+        tarefa = asyncio.create_task(self._revalidar_placa_async(placa))
+        # mantém a referência até o fim, senão a task pode ser coletada
+        self._tarefas_revalidacao.add(tarefa)
+        tarefa.add_done_callback(self._tarefas_revalidacao.discard)
+
+    async def _revalidar_placa_async(self, placa):
+        try:
+            await self._buscar_id_veiculo_async(placa)
+        except grpc.RpcError as e:
+            log_veiculos.warning("Falha ao revalidar placa no MS Veiculos", extra={"placa": placa, "codigo": e.code().name})
+        finally:
+            with self._revalidando_lock:
+                self._revalidando.discard(placa)
+
+    def stats(self):
+        stats = super().stats()
+        stats["pool_asyncio"] = self.aio_db.stats()
+        return stats
+
+    async def close(self):
+        await self.aio_veiculos_channel.close()
+        await self.aio_db.close()
+        # o close síncrono espera threads e fecha o pool psycopg2: fora do loop
+        await asyncio.to_thread(super().close)
+
+    async def _manutencao_existente_async(self, chave):
+        """Como _manutencoes_existentes: o mapa em memória só dá o id, a linha vem do banco."""
+        m_id = self.idempotencia.get(chave)
+        if m_id is not None:
+            row = (await self.aio_db.get_manutencoes_nao_arquivadas([m_id])).get(m_id)
+            if row is not None:
+                return row
+            self.idempotencia.discard(chave)
+        row = (await self.aio_db.get_manutencoes_by_chaves([chave])).get(chave)
+        self._lembrar_chave(chave, row)
+        return row
+
+    async def CriarManutencao(self, request, context):
+        placa = request.placa_veiculo
+        logs.adicionar_campos(placa=placa)
+        chave = request.chave_idempotencia or None
+
+        if chave is not None:
+            erro = validar_chave(request)
+            if erro is not None:
+                context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+                context.set_details(erro)
+                return manutencoes_pb2.Manutencao()
+            try:
+                existente = await self._manutencao_existente_async(chave)
+            except Exception as e:
+                context.set_code(grpc.StatusCode.INTERNAL)
+                context.set_details(f"Erro interno ao buscar chave_idempotencia: {str(e)}")
+                return manutencoes_pb2.Manutencao()
+            if existente is not None:
+                return to_manutencao(existente)
+
+        try:
+            id_veiculo = await self._resolver_id_veiculo_async(placa, context)
+        except grpc.RpcError as e:
+            context.set_code(e.code())
+            context.set_details(f"Erro ao comunicar com o MS Veiculos: {e.details()}")
+            return manutencoes_pb2.Manutencao()
+
+        if id_veiculo is None:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(f"Veículo com placa {placa} não encontrado. Manutenção não pode ser criada.")
+            return manutencoes_pb2.Manutencao()
+
+        try:
+            if self.escritor is not None:
+                # o group commit usa o pool psycopg2 na sua própria thread; aqui só se espera o Future
+                with rastreamento.span("group_commit"):
+                    db_result = await asyncio.wrap_future(
+                        self.escritor.submit((id_veiculo, placa, request.descricao, chave))
+                    )
+            else:
+                db_result = await self.aio_db.create_manutencao(id_veiculo, placa, request.descricao, chave)
+            self._lembrar_chave(chave, db_result)
+            return to_manutencao(db_result)
+        except ChaveIdempotenciaError as e:
+            context.set_code(grpc.StatusCode.ABORTED)
+            context.set_details(str(e))
+            return manutencoes_pb2.Manutencao()
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Erro interno ao salvar manutenção: {str(e)}")
+            return manutencoes_pb2.Manutencao()
+
+    async def ListarManutencoes(self, request, context):
+        try:
+            db_results = await self.aio_db.list_all_manutencoes()
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Erro interno ao listar manutenções: {str(e)}")
+            return manutencoes_pb2.ListaManutencoes()
+        return manutencoes_pb2.ListaManutencoes(manutencoes=[to_manutencao(row) for row in db_results])
+
+    async def ListarPaginaManutencoes(self, request, context):
+        pagina = validar_pagina(request, context)
+        if pagina is None:
+            return manutencoes_pb2.PaginaManutencoes()
+        filtro, after_id, page_size = pagina
+        try:
+            rows = await self.aio_db.fetch_page(filtro, after_id, page_size + 1)
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Erro interno ao listar manutenções: {str(e)}")
+            return manutencoes_pb2.PaginaManutencoes()
+        return montar_pagina(rows, page_size)
+
+    async def StreamManutencoes(self, request, context):
+        try:
+            async for rows in self.aio_db.iter_filtrado(ler_filtro(request)):
+                for row in rows:
+                    yield to_manutencao(row)
+        except Exception as e:
+            await context.abort(grpc.StatusCode.INTERNAL, f"Erro interno ao listar manutenções: {str(e)}")
+
+    async def ResumirManutencoes(self, request, context):
+        try:
+            rows = await self.aio_db.get_resumo()
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Erro interno ao resumir manutenções: {str(e)}")
+            return manutencoes_pb2.ResumoManutencoes()
+        return montar_resumo(rows)
+
+    async def BuscarPorId(self, request, context):
+        try:
+            m_id = int(request.id)
+            db_result = await self.aio_db.get_manutencao_by_id(m_id)
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Erro interno ao buscar manutenção por ID: {str(e)}")
+            return manutencoes_pb2.Manutencao()
+
+        if not db_result:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(f"Manutenção com ID {m_id} não encontrada.")
+            return manutencoes_pb2.Manutencao()
+        return to_manutencao(db_result)
+
+
+async def serve_aio():
+    aio_db = await AsyncManutencoesDB.create()
+    servicer = AsyncGestaoManutencoesServicer(aio_db)
+
+    interceptors = [InterceptorMetricasAsync()] if METRICS_ENABLED else []
+    if TRACE_ENABLED:
+        configurar_rastreamento()
+        interceptors.append(InterceptorRastreamentoAsync())
+    interceptors.append(InterceptorLogsAsync(LOG_RPC_LENTO_MS))
+    server = grpc.aio.server(
+        migration_thread_pool=futures.ThreadPoolExecutor(max_workers=GRPC_MAX_WORKERS),
+        **argumentos_servidor(interceptors)
+    )
+    manutencoes_pb2_grpc.add_GestaoManutencoesServicer_to_server(servicer, server)
+    saude = health_aio.HealthServicer()
+    health_pb2_grpc.add_HealthServicer_to_server(saude, server)
+    loop = asyncio.get_running_loop()
+
+    # o monitor roda numa thread: o status e a verificação do asyncpg passam pelo event loop
+    def definir(nome, status):
+        asyncio.run_coroutine_threadsafe(saude.set(nome, status), loop)
+
+    def verificar_asyncpg():
+        return asyncio.run_coroutine_threadsafe(aio_db.verificar(), loop).result(HEALTH_TIMEOUT_SECONDS)
+
+    verificacoes = servicer.verificacoes_saude() + [("db_asyncio", verificar_asyncpg, True)]
+    servicer.saude = MonitorSaude(definir, SERVICO_SAUDE, verificacoes, HEALTH_INTERVAL_SECONDS)
+    server.add_insecure_port(f'[::]:{GRPC_PORT}')
+    await server.start()
+    servicer.saude.start()
+    if METRICS_ENABLED:
+        iniciar_servidor_metricas(porta_metricas(), "manutencoes", servicer.stats)
+
+    log.info(f"Microserviço de Gestão de Manutenções rodando na porta {GRPC_PORT} (modo asyncio).")
+
+    parar = asyncio.Event()
+    for sinal in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sinal, parar.set)
+
+    try:
+        loop_counter = 0
+        while not parar.is_set():
+            loop_counter += 1
+            log.info("MS Manutenções ativo.", extra={"loop": loop_counter, "stats": servicer.stats()})
+            try:
+                await asyncio.wait_for(parar.wait(), STATS_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+        log.info("Encerrando: NOT_SERVING e drenagem dos RPCs em andamento.", extra={"grace_seconds": SHUTDOWN_GRACE_SECONDS})
+        await asyncio.to_thread(servicer.saude.encerrar)
+        await asyncio.sleep(SHUTDOWN_DELAY_SECONDS)
+    finally:
+        await server.stop(SHUTDOWN_GRACE_SECONDS)
+        await servicer.close()
+        rastreamento.encerrar()
+        log.info("Servidor encerrado.")
+
+
+def serve():
+    configurar_logs()
+    log.info("Configuração efetiva.", extra={"config": configuracao.efetiva(comum, sys.modules[__name__])})
+    try:
+        asyncio.run(serve_aio())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logs.encerrar()
+
+
+if __name__ == '__main__':
+    serve()
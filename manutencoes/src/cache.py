@@ -0,0 +1,123 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Cache LRU limitado em `max_size` entradas, cada uma expirando após `ttl` segundos.
+
+    Com `stale_ttl` > 0 uma entrada vencida continua disponível por mais
+    `stale_ttl` segundos através de `get_with_staleness`, marcada como velha,
+    para quem quiser servi-la enquanto revalida em segundo plano
+    (stale-while-revalidate). `get` nunca devolve entradas vencidas.
+
+    Toda invalidação incrementa `generation`; passe ao `set` a geração lida
+    antes da consulta na origem para não guardar um resultado já invalidado.
+    """
+
+    def __init__(self, max_size, ttl, stale_ttl=0):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def generation(self):
+        with self._lock:
+            return self._generation
+
+    def get_with_staleness(self, key):
+        """Devolve (valor, velho); (None, False) quando não há entrada utilizável."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return None, False
+            value, fresh_until, stale_until = entry
+            if fresh_until > now:
+                self._data.move_to_end(key)
+                self._hits += 1
+                return value, False
+            if stale_until > now:
+                self._data.move_to_end(key)
+                self._stale_hits += 1
+                return value, True
+            del self._data[key]
+            self._expirations += 1
+            self._misses += 1
+            return None, False
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+            value, fresh_until, stale_until = entry
+            if fresh_until <= now:
+                if stale_until <= now:
+                    del self._data[key]
+                    self._expirations += 1
+                self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key, value, generation=None):
+        """Guarda `value`; devolve False se a geração mudou desde `generation`."""
+        fresh_until = time.monotonic() + self._ttl
+        stale_until = fresh_until + self._stale_ttl
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+            self._data[key] = (value, fresh_until, stale_until)
+            self._data.move_to_end(key)
+            while len(self._data) > self._max_size:
+                self._data.popitem(last=False)
+                self._evictions += 1
+            return True
+
+    def invalidate(self, key):
+        with self._lock:
+            self._generation += 1
+            if self._data.pop(key, None) is not None:
+                self._invalidations += 1
+
+    def discard(self, key):
+        """
+        Remove a entrada sem mudar a geração: para descartar um valor
+        contraditório, não para sinalizar que a origem mudou (use `invalidate`).
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "max_size": self._max_size,
+                "hits": self._hits,
+                "stale_hits": self._stale_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+            }
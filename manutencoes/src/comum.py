@@ -0,0 +1,301 @@
+import os
+import time
+import base64
+import binascii
+import logging
+
+import grpc
+from dotenv import load_dotenv
+
+import manutencoes_pb2
+import veiculos_pb2
+import rastreamento
+import logs
+import configuracao
+import prefork
+
+# Configuração lida do ambiente e funções usadas pelos dois modos do servidor
+# (server.py e aio_server.py).
+
+# variáveis do .env (se existir) valem como padrão; as do ambiente têm precedência
+load_dotenv()
+
+log = logging.getLogger("servidor")
+log_db = logging.getLogger("db")
+log_veiculos = logging.getLogger("veiculos")
+
+DB_HOST = os.getenv("MANUTENCOES_DBHOST", "db_manutencoes")
+DB_NAME = os.getenv("MANUTENCOES_DB_NAME", "manutencoes_db")
+DB_USER = os.getenv("MANUTENCOES_DB_USER", "admin")
+DB_PASSWORD = os.getenv("MANUTENCOES_DB_PASSWORD", "admin")
+GRPC_MAX_WORKERS = int(os.getenv("GRPC_MAX_WORKERS", "10"))
+
+# heartbeat em INFO com o stats() completo; os valores também estão em /metrics
+STATS_INTERVAL_SECONDS = int(os.getenv("STATS_INTERVAL_SECONDS", "300"))
+
+# Servidor gRPC (ver configuracao.py). GRPC_MAX_CONCURRENT_RPCS limita os RPCs aceitos ao
+# mesmo tempo, acima disso o cliente recebe RESOURCE_EXHAUSTED (0 = sem limite). Tamanhos
+# de mensagem em bytes (-1 = sem limite); keepalive com 0 fica com o padrão do gRPC.
+# GRPC_COMPRESSION ("none", "gzip" ou "deflate") é a compressão padrão das respostas.
+GRPC_PORT = int(os.getenv("GRPC_PORT", "50052"))
+GRPC_MAX_CONCURRENT_RPCS = int(os.getenv("GRPC_MAX_CONCURRENT_RPCS", "0"))
+GRPC_MAX_RECEIVE_MESSAGE_BYTES = int(os.getenv("GRPC_MAX_RECEIVE_MESSAGE_BYTES", str(4 * 1024 * 1024)))
+GRPC_MAX_SEND_MESSAGE_BYTES = int(os.getenv("GRPC_MAX_SEND_MESSAGE_BYTES", "-1"))
+GRPC_KEEPALIVE_TIME_MS = int(os.getenv("GRPC_KEEPALIVE_TIME_MS", "0"))
+GRPC_KEEPALIVE_TIMEOUT_MS = int(os.getenv("GRPC_KEEPALIVE_TIMEOUT_MS", "0"))
+GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS = os.getenv("GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS", "0") == "1"
+GRPC_MIN_PING_INTERVAL_MS = int(os.getenv("GRPC_MIN_PING_INTERVAL_MS", "0"))
+GRPC_COMPRESSION = os.getenv("GRPC_COMPRESSION", "none")
+
+# Chaves de idempotência de CriarManutencao: únicas no banco (índice parcial) e as
+# recentes também num mapa em memória, chave -> id. A linha é sempre relida pelo id,
+# para a repetição devolver o status atual (que outro processo pode ter mudado).
+MAX_CHAVE_IDEMPOTENCIA = 100
+# O arquivamento libera a chave (chave_idempotencia = NULL): se isso acontece entre o INSERT
+# que bateu na chave e a busca da manutenção dela, o INSERT é repetido, agora sem conflito.
+TENTATIVAS_CHAVE_IDEMPOTENCIA = 3
+IDEMPOTENCIA_CACHE_MAX_SIZE = int(os.getenv("IDEMPOTENCIA_CACHE_MAX_SIZE", "10000"))
+IDEMPOTENCIA_CACHE_TTL_SECONDS = float(os.getenv("IDEMPOTENCIA_CACHE_TTL_SECONDS", "60"))
+
+VEICULOS_SERVICE_HOST = os.getenv("VEICULOS_HOST", "micro_veiculos:500051")
+
+# Canal para o MS Veiculos, com as mesmas convenções das opções do servidor. O keepalive
+# detecta conexões mortas entre as chamadas; o servidor do MS Veiculos precisa aceitar
+# pings nesse intervalo (GRPC_MIN_PING_INTERVAL_MS lá), senão fecha a conexão.
+VEICULOS_MAX_RECEIVE_MESSAGE_BYTES = int(os.getenv("VEICULOS_MAX_RECEIVE_MESSAGE_BYTES", str(4 * 1024 * 1024)))
+VEICULOS_MAX_SEND_MESSAGE_BYTES = int(os.getenv("VEICULOS_MAX_SEND_MESSAGE_BYTES", "-1"))
+VEICULOS_KEEPALIVE_TIME_MS = int(os.getenv("VEICULOS_KEEPALIVE_TIME_MS", "0"))
+VEICULOS_KEEPALIVE_TIMEOUT_MS = int(os.getenv("VEICULOS_KEEPALIVE_TIMEOUT_MS", "0"))
+VEICULOS_KEEPALIVE_PERMIT_WITHOUT_CALLS = os.getenv("VEICULOS_KEEPALIVE_PERMIT_WITHOUT_CALLS", "0") == "1"
+VEICULOS_COMPRESSION = os.getenv("VEICULOS_COMPRESSION", "none")
+
+# Chamadas ao MS Veiculos: prazo máximo (encurtado pelo prazo do RPC que as originou,
+# menos uma margem para gravar e responder), retry com backoff e jitter para UNAVAILABLE
+# e circuit breaker, que recusa as chamadas por um tempo após falhas seguidas.
+VEICULOS_TIMEOUT_SECONDS = float(os.getenv("VEICULOS_TIMEOUT_SECONDS", "2"))
+VEICULOS_DEADLINE_MARGIN_MS = float(os.getenv("VEICULOS_DEADLINE_MARGIN_MS", "50"))
+VEICULOS_MAX_TENTATIVAS = int(os.getenv("VEICULOS_MAX_TENTATIVAS", "3"))
+VEICULOS_BACKOFF_BASE_MS = float(os.getenv("VEICULOS_BACKOFF_BASE_MS", "50"))
+VEICULOS_BACKOFF_MAX_MS = float(os.getenv("VEICULOS_BACKOFF_MAX_MS", "1000"))
+VEICULOS_BREAKER_FALHAS = int(os.getenv("VEICULOS_BREAKER_FALHAS", "5"))
+VEICULOS_BREAKER_RESET_SECONDS = float(os.getenv("VEICULOS_BREAKER_RESET_SECONDS", "10"))
+
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+
+# Colunas aceitas em FiltroManutencoes; cada uma tem um índice (coluna, id) criado em ManutencoesDB._setup_db.
+COLUNAS_FILTRO = ("placa_veiculo", "id_veiculo", "status")
+
+# Modo multiprocesso (ver prefork.py): com SERVER_PROCESSES diferente de 1 este processo só
+# supervisiona SERVER_PROCESSES servidores (0 = um por CPU) na mesma porta, com SO_REUSEPORT.
+# Cada um tem os seus pools (o banco recebe SERVER_PROCESSES vezes as conexões), o seu
+# endpoint de métricas em METRICS_PORT + índice e o seu arquivo de traces.
+SERVER_PROCESSES = int(os.getenv("SERVER_PROCESSES", "1"))
+# definido pelo supervisor em cada processo servidor; -1 fora do modo multiprocesso
+SERVER_PROCESS_INDEX = int(os.getenv(prefork.VARIAVEL_INDICE, "-1"))
+
+# Endpoint /metrics (Prometheus) com latência por RPC, por consulta ao banco e por
+# chamada ao MS Veiculos, além dos valores de stats().
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9102"))
+
+# Rastreamento distribuído (ver rastreamento.py): um span por RPC, por comando SQL e por
+# chamada a outro serviço, propagados no cabeçalho `traceparent`. TRACE_SAMPLE_RATE é a
+# fração dos RPCs sem trace de origem que são registrados; TRACE_EXPORTER "arquivo" grava
+# os spans em JSON lines em TRACE_FILE (fora de /app, que o docker-compose monta a partir
+# do código), "modulo:Classe" usa um exportador próprio.
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "0") == "1"
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "arquivo")
+TRACE_FILE = os.getenv("TRACE_FILE", "/tmp/traces_manutencoes.jsonl")
+
+# Logs em JSON no stdout, escritos por uma thread própria (ver logs.py). LOG_LEVELS ajusta
+# loggers específicos ("rpc=DEBUG,db=WARNING"); LOG_DEBUG_SAMPLE_RATE é a fração dos
+# registros DEBUG mantidos. Cada RPC é registrado no logger "rpc": em DEBUG, ou em WARNING
+# se passar de LOG_RPC_LENTO_MS ou terminar em erro interno.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_RPC_LENTO_MS = float(os.getenv("LOG_RPC_LENTO_MS", "1000"))
+
+# grpc.health.v1: o status geral e o do serviço ficam SERVING só enquanto as verificações
+# obrigatórias passam, repetidas a cada HEALTH_INTERVAL_SECONDS (ver saude.py).
+# O MS Veiculos é verificado pelo health dele e publicado em "<serviço>.veiculos"; só tira
+# esta instância de rotação com HEALTH_VEICULOS_OBRIGATORIO=1, já que a réplica e o cache
+# seguem atendendo boa parte dos pedidos sem ele.
+HEALTH_INTERVAL_SECONDS = float(os.getenv("HEALTH_INTERVAL_SECONDS", "5"))
+HEALTH_TIMEOUT_SECONDS = float(os.getenv("HEALTH_TIMEOUT_SECONDS", "2"))
+HEALTH_VEICULOS_OBRIGATORIO = os.getenv("HEALTH_VEICULOS_OBRIGATORIO", "0") == "1"
+SERVICO_SAUDE = manutencoes_pb2.DESCRIPTOR.services_by_name["GestaoManutencoes"].full_name
+SERVICO_VEICULOS = veiculos_pb2.DESCRIPTOR.services_by_name["GestaoVeiculos"].full_name
+
+# SIGTERM/SIGINT: o health passa a NOT_SERVING, espera-se SHUTDOWN_DELAY_SECONDS para o
+# balanceador tirar a instância de rotação e os RPCs em andamento têm até
+# SHUTDOWN_GRACE_SECONDS para terminar antes de os pools serem fechados.
+SHUTDOWN_DELAY_SECONDS = float(os.getenv("SHUTDOWN_DELAY_SECONDS", "0"))
+SHUTDOWN_GRACE_SECONDS = float(os.getenv("SHUTDOWN_GRACE_SECONDS", "20"))
+
+
+class ChaveIdempotenciaError(Exception):
+    """A chave conflitou em todas as tentativas, mas a manutenção dela nunca foi encontrada."""
+
+
+def to_manutencao(row):
+    m_id, id_veiculo, placa_veiculo, descricao, status = row
+    return manutencoes_pb2.Manutencao(
+        id=str(m_id),
+        id_veiculo=id_veiculo,
+        placa_veiculo=placa_veiculo,
+        descricao=descricao,
+        status=status
+    )
+
+
+def prazo_veiculos(context=None):
+    """Instante (time.monotonic) até o qual a chamada ao MS Veiculos precisa terminar."""
+    prazo = VEICULOS_TIMEOUT_SECONDS
+    if context is not None:
+        restante = context.time_remaining()
+        if restante is not None:
+            prazo = min(prazo, restante - VEICULOS_DEADLINE_MARGIN_MS / 1000)
+    return time.monotonic() + prazo
+
+
+def where_filtro(filtro, after_id, placeholder=lambda i: "%s"):
+    """
+    Monta o WHERE (sem a palavra WHERE) e os parâmetros para `filtro` e o keyset `after_id`.
+    As colunas vêm sempre de COLUNAS_FILTRO; os valores vão como parâmetros.
+    `placeholder(i)` gera o marcador do i-ésimo parâmetro (ex.: $1 no asyncpg).
+    """
+    condicoes = [f"id > {placeholder(1)}"]
+    params = [after_id]
+    for coluna in COLUNAS_FILTRO:
+        if coluna in filtro:
+            params.append(filtro[coluna])
+            condicoes.append(f"{coluna} = {placeholder(len(params))}")
+    return " AND ".join(condicoes), params
+
+
+def ler_filtro(mensagem):
+    """{coluna: valor} com os campos preenchidos de um FiltroManutencoes."""
+    return {coluna: getattr(mensagem, coluna) for coluna in COLUNAS_FILTRO if getattr(mensagem, coluna)}
+
+
+def _encode_page_token(last_id):
+    return base64.urlsafe_b64encode(f"v1:{last_id}".encode()).decode()
+
+
+def _decode_page_token(token):
+    """Devolve o último id da página anterior; levanta ValueError se o token for inválido."""
+    if not token:
+        return 0
+    try:
+        version, last_id = base64.urlsafe_b64decode(token.encode()).decode().split(":", 1)
+        if version != "v1":
+            raise ValueError
+        return int(last_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("page_token inválido")
+
+
+def validar_pagina(request, context):
+    """Devolve (filtro, after_id, page_size) do pedido; None (com o erro no contexto) se for inválido."""
+    page_size = request.page_size or DEFAULT_PAGE_SIZE
+    if page_size < 0:
+        context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+        context.set_details("page_size não pode ser negativo.")
+        return None
+    try:
+        after_id = _decode_page_token(request.page_token)
+    except ValueError as e:
+        context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+        context.set_details(str(e))
+        return None
+    return ler_filtro(request.filtro), after_id, min(page_size, MAX_PAGE_SIZE)
+
+
+def montar_pagina(rows, page_size):
+    """Monta a página a partir de até `page_size + 1` linhas; a linha extra indica que há mais."""
+    next_page_token = ""
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_page_token = _encode_page_token(rows[-1][0])
+    return manutencoes_pb2.PaginaManutencoes(
+        manutencoes=[to_manutencao(row) for row in rows],
+        next_page_token=next_page_token
+    )
+
+
+def montar_resumo(rows):
+    """ResumoManutencoes a partir das linhas (id_veiculo, placa_veiculo, status, total), ordenadas por veículo."""
+    resumo = manutencoes_pb2.ResumoManutencoes()
+    por_status = {}
+    veiculo = None
+    for id_veiculo, placa_veiculo, status, total in rows:
+        if veiculo is None or (veiculo.id_veiculo, veiculo.placa_veiculo) != (id_veiculo, placa_veiculo):
+            veiculo = resumo.por_veiculo.add(id_veiculo=id_veiculo, placa_veiculo=placa_veiculo)
+        veiculo.total += total
+        veiculo.por_status[status] = total
+        por_status[status] = por_status.get(status, 0) + total
+        resumo.total += total
+    for status in sorted(por_status):
+        resumo.por_status.add(status=status, total=por_status[status])
+    return resumo
+
+
+def validar_chave(request):
+    if len(request.chave_idempotencia) > MAX_CHAVE_IDEMPOTENCIA:
+        return f"chave_idempotencia tem mais de {MAX_CHAVE_IDEMPOTENCIA} caracteres"
+    return None
+
+
+def argumentos_canal_veiculos():
+    """Opções e compressão do canal para o MS Veiculos (grpc e grpc.aio)."""
+    return dict(
+        options=configuracao.opcoes_grpc(
+            VEICULOS_MAX_RECEIVE_MESSAGE_BYTES, VEICULOS_MAX_SEND_MESSAGE_BYTES,
+            VEICULOS_KEEPALIVE_TIME_MS, VEICULOS_KEEPALIVE_TIMEOUT_MS,
+            VEICULOS_KEEPALIVE_PERMIT_WITHOUT_CALLS
+        ),
+        compression=configuracao.compressao(VEICULOS_COMPRESSION)
+    )
+
+
+def configurar_logs(processo=None):
+    if processo is None and SERVER_PROCESS_INDEX >= 0:
+        processo = SERVER_PROCESS_INDEX
+    logs.configurar("manutencoes", LOG_LEVEL, LOG_LEVELS, LOG_DEBUG_SAMPLE_RATE, LOG_QUEUE_SIZE, processo)
+
+
+def configurar_rastreamento():
+    arquivo = TRACE_FILE
+    if SERVER_PROCESS_INDEX >= 0:
+        arquivo = prefork.arquivo_do_processo(TRACE_FILE, SERVER_PROCESS_INDEX)
+    exportador = rastreamento.criar_exportador(TRACE_EXPORTER, arquivo)
+    rastreamento.configurar("manutencoes", exportador, TRACE_SAMPLE_RATE)
+    log.info(f"Rastreamento ativo (amostragem {TRACE_SAMPLE_RATE:.2%}, exportador {TRACE_EXPORTER}).")
+
+
+def argumentos_servidor(interceptors):
+    """Argumentos comuns a grpc.server e grpc.aio.server, lidos do ambiente."""
+    opcoes = configuracao.opcoes_grpc(
+        GRPC_MAX_RECEIVE_MESSAGE_BYTES, GRPC_MAX_SEND_MESSAGE_BYTES,
+        GRPC_KEEPALIVE_TIME_MS, GRPC_KEEPALIVE_TIMEOUT_MS,
+        GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS, GRPC_MIN_PING_INTERVAL_MS
+    )
+    if SERVER_PROCESSES != 1:
+        # todos os processos do supervisor ouvem a mesma porta
+        opcoes.append(("grpc.so_reuseport", 1))
+    return dict(
+        interceptors=interceptors,
+        options=opcoes,
+        maximum_concurrent_rpcs=GRPC_MAX_CONCURRENT_RPCS or None,
+        compression=configuracao.compressao(GRPC_COMPRESSION)
+    )
+
+
+def porta_metricas():
+    """No modo multiprocesso cada processo tem o seu endpoint: METRICS_PORT + índice."""
+    return METRICS_PORT + max(SERVER_PROCESS_INDEX, 0)
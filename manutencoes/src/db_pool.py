@@ -0,0 +1,214 @@
+import time
+import threading
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.pool
+
+
+class PoolTimeoutError(Exception):
+    """Nenhuma conexão do pool ficou livre dentro do tempo limite."""
+
+
+class ConnectionPool:
+    """
+    Pool limitado e thread-safe de conexões com o PostgreSQL.
+
+    Cada requisição pega uma conexão exclusiva (e abre o próprio cursor), então
+    as threads do servidor gRPC não disputam mais um único cursor. Quando todas
+    as conexões estão em uso a thread espera até `timeout` segundos por uma livre.
+    """
+
+    def __init__(self, connect_kwargs, max_size, min_size=1, timeout=30.0,
+                 health_check_interval=30.0, on_connect=None):
+        self._connect_kwargs = connect_kwargs
+        self._max_size = max_size
+        self._timeout = timeout
+        self._health_check_interval = health_check_interval
+        self._on_connect = on_connect
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._idle = []
+        self._size = 0
+        self._closed = False
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+        self._timeouts = 0
+        self._reconnects = 0
+        self._health_check_failures = 0
+
+        for _ in range(min(min_size, max_size)):
+            conn = self._new_connection()
+            self._idle.append((conn, time.monotonic()))
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+    def _new_connection(self):
+        conn = psycopg2.connect(**self._connect_kwargs)
+        try:
+            conn.autocommit = True
+            if self._on_connect is not None:
+                self._on_connect(conn)
+        except Exception:
+            conn.close()
+            raise
+        with self._lock:
+            self._size += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        with self._lock:
+            self._size -= 1
+
+    def _drop_idle(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def _is_healthy(self, conn, idle_since):
+        """Valida conexões fechadas ou paradas há mais que `health_check_interval`."""
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self._health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1;")
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        """Retira uma conexão do pool, esperando por uma vaga se necessário."""
+        if self._closed:
+            raise psycopg2.pool.PoolError("pool de conexões fechado")
+
+        start = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            if not self._slots.acquire(timeout=self._timeout):
+                with self._lock:
+                    self._timeouts += 1
+                raise PoolTimeoutError(
+                    f"Nenhuma conexão livre após {self._timeout}s (pool de {self._max_size})."
+                )
+            waited = time.monotonic() - start
+            with self._lock:
+                self._waits += 1
+                self._wait_seconds_total += waited
+                self._wait_seconds_max = max(self._wait_seconds_max, waited)
+
+        try:
+            while True:
+                with self._lock:
+                    idle = self._idle.pop() if self._idle else None
+                if idle is None:
+                    conn = self._new_connection()
+                    break
+
+                conn, idle_since = idle
+                if self._is_healthy(conn, idle_since):
+                    break
+
+                with self._lock:
+                    self._health_check_failures += 1
+                    self._reconnects += 1
+                self._discard(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._checkouts += 1
+        return conn
+
+    def putconn(self, conn, discard=False):
+        """Devolve a conexão ao pool (ou a descarta se estiver quebrada)."""
+        if not discard and not conn.closed and not self._closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if not conn.autocommit:
+                    conn.autocommit = True
+            except psycopg2.Error:
+                discard = True
+        else:
+            discard = True
+
+        if discard:
+            self._discard(conn)
+        else:
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.getconn()
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # Uma conexão quebrada geralmente indica que o servidor reiniciou;
+            # as ociosas provavelmente caíram junto e serão recriadas sob demanda.
+            discard = True
+            self._drop_idle()
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    @contextmanager
+    def cursor(self):
+        """Cursor próprio da requisição, sobre uma conexão exclusiva do pool."""
+        with self.connection() as conn:
+            with conn.cursor() as cursor:
+                yield cursor
+
+    def run(self, func, retries=1):
+        """
+        Executa `func(cursor)` e devolve o seu resultado.
+
+        Se a conexão cair no meio da consulta ela é descartada e a função é
+        repetida numa conexão nova. Use apenas para operações idempotentes.
+        """
+        for attempt in range(retries + 1):
+            try:
+                with self.cursor() as cursor:
+                    return func(cursor)
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                if attempt >= retries:
+                    raise
+                with self._lock:
+                    self._reconnects += 1
+
+    def stats(self):
+        """Métricas de ocupação e de espera do pool."""
+        with self._lock:
+            return {
+                "size": self._size,
+                "max_size": self._max_size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_seconds_total": round(self._wait_seconds_total, 6),
+                "wait_seconds_max": round(self._wait_seconds_max, 6),
+                "timeouts": self._timeouts,
+                "reconnects": self._reconnects,
+                "health_check_failures": self._health_check_failures,
+            }
+
+    def closeall(self):
+        """Fecha todas as conexões ociosas e impede novos empréstimos."""
+        self._closed = True
+        self._drop_idle()
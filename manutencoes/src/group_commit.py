@@ -0,0 +1,114 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class WriterClosedError(Exception):
+    """O escritor já foi fechado e não aceita novas linhas."""
+
+
+class GroupCommitWriter:
+    """
+    Agrupa escritas concorrentes num único commit (group commit).
+
+    Cada `submit` enfileira uma linha e devolve um Future. Uma thread dedicada
+    junta o que estiver na fila por até `max_delay` segundos ou `max_rows`
+    linhas e chama `flush_func(linhas)` uma vez, que deve gravá-las numa única
+    transação e devolver um resultado por linha, na mesma ordem. Se o flush
+    falhar, todos os Futures do lote recebem a exceção (sem nova tentativa,
+    para não duplicar escritas).
+    """
+
+    def __init__(self, flush_func, max_rows=100, max_delay=0.005):
+        self._flush_func = flush_func
+        self._max_rows = max_rows
+        self._max_delay = max_delay
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._flushes = 0
+        self._rows = 0
+        self._errors = 0
+        self._flush_size_max = 0
+        self._flush_seconds_total = 0.0
+        self._flush_seconds_max = 0.0
+        self._queue_depth_max = 0
+
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, row):
+        """Enfileira `row`; o Future devolvido recebe o resultado do flush para ela."""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise WriterClosedError("escritor em lote fechado")
+            self._queue.put((row, future))
+            self._queue_depth_max = max(self._queue_depth_max, self._queue.qsize())
+        return future
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            lote = [item]
+            deadline = time.monotonic() + self._max_delay
+            while len(lote) < self._max_rows:
+                restante = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=restante) if restante > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    # fechamento: grava o que já foi juntado antes de sair
+                    self._flush(lote)
+                    return
+                lote.append(item)
+            self._flush(lote)
+
+    def _flush(self, lote):
+        inicio = time.monotonic()
+        try:
+            resultados = self._flush_func([row for row, _ in lote])
+        except Exception as e:
+            with self._lock:
+                self._errors += 1
+            for _, future in lote:
+                future.set_exception(e)
+            return
+        duracao = time.monotonic() - inicio
+
+        with self._lock:
+            self._flushes += 1
+            self._rows += len(lote)
+            self._flush_size_max = max(self._flush_size_max, len(lote))
+            self._flush_seconds_total += duracao
+            self._flush_seconds_max = max(self._flush_seconds_max, duracao)
+        for (_, future), resultado in zip(lote, resultados):
+            future.set_result(resultado)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_depth_max": self._queue_depth_max,
+                "flushes": self._flushes,
+                "rows": self._rows,
+                "errors": self._errors,
+                "flush_size_avg": round(self._rows / self._flushes, 2) if self._flushes else 0.0,
+                "flush_size_max": self._flush_size_max,
+                "flush_seconds_total": round(self._flush_seconds_total, 6),
+                "flush_seconds_max": round(self._flush_seconds_max, 6),
+            }
+
+    def close(self, timeout=None):
+        """Para de aceitar linhas, grava as que já estão na fila e encerra a thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout)
@@ -0,0 +1,273 @@
+import sys
+import json
+import time
+import queue
+import random
+import inspect
+import logging
+import contextvars
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+import grpc
+
+from metricas import contexto_sincrono, nome_codigo
+import rastreamento
+
+# Logs estruturados (uma linha JSON por registro) gravados fora do caminho do RPC:
+# quem loga só monta o registro e o põe numa fila limitada; uma thread formata e
+# escreve no stdout. Com a fila cheia o registro é descartado e contado.
+
+_contexto = contextvars.ContextVar("contexto_log", default=None)
+_listener = None
+_handler = None
+
+log_rpc = logging.getLogger("rpc")
+
+# Atributos de todo LogRecord; o que vier além disso em `extra` vira campo do JSON.
+_ATRIBUTOS_PADRAO = frozenset(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", "contexto"}
+
+
+def adicionar_campos(**campos):
+    """Acrescenta campos (placa, id...) a todos os registros feitos até o fim do RPC atual."""
+    contexto = _contexto.get()
+    if contexto is not None:
+        contexto.update(campos)
+
+
+class FiltroAmostragem(logging.Filter):
+    """Deixa passar só a fração `taxa` dos registros DEBUG; os demais níveis passam sempre."""
+
+    def __init__(self, taxa):
+        super().__init__()
+        self.taxa = taxa
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or random.random() < self.taxa
+
+
+class HandlerFila(QueueHandler):
+    """
+    QueueHandler que não bloqueia nem imprime erro quando a fila enche, e que
+    deixa a formatação para a thread do listener: aqui só se resolve a mensagem
+    e se copiam os campos do RPC, que estão em contextvars desta thread.
+    """
+
+    def __init__(self, fila):
+        super().__init__(fila)
+        self.descartados = 0
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        contexto = _contexto.get()
+        record.contexto = dict(contexto) if contexto else {}
+        span = rastreamento.span_atual()
+        if span is not None:
+            record.contexto["trace_id"] = span.trace_id
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+class FormatadorJson(logging.Formatter):
+    def __init__(self, servico, processo=None):
+        super().__init__()
+        self._servico = servico
+        self._processo = processo
+
+    def format(self, record):
+        registro = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "servico": self._servico,
+            "msg": record.getMessage(),
+        }
+        if self._processo is not None:
+            registro["processo"] = self._processo
+        registro.update(getattr(record, "contexto", ()))
+        for chave, valor in record.__dict__.items():
+            if chave not in _ATRIBUTOS_PADRAO:
+                registro[chave] = valor
+        if record.exc_text:
+            registro["erro"] = record.exc_text
+        return json.dumps(registro, ensure_ascii=False, default=str)
+
+
+def _ler_niveis(niveis):
+    """"rpc=DEBUG,db=WARNING" -> {"rpc": "DEBUG", "db": "WARNING"}"""
+    resultado = {}
+    for item in niveis.split(","):
+        nome, _, nivel = item.partition("=")
+        if nome.strip() and nivel.strip():
+            resultado[nome.strip()] = nivel.strip().upper()
+    return resultado
+
+
+def configurar(servico, nivel="INFO", niveis="", taxa_debug=1.0, max_pendentes=10000, processo=None):
+    """
+    Troca os handlers do logger raiz pelo handler com fila. `niveis` ajusta loggers
+    específicos ("rpc=DEBUG,db=WARNING"); `taxa_debug` é a fração dos DEBUG mantidos.
+    `processo` identifica o processo no modo multiprocesso (ver prefork.py).
+    """
+    global _listener, _handler
+    fila = queue.Queue(max_pendentes)
+    saida = logging.StreamHandler(sys.stdout)
+    saida.setFormatter(FormatadorJson(servico, processo))
+    _handler = HandlerFila(fila)
+    _handler.addFilter(FiltroAmostragem(taxa_debug))
+
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.addHandler(_handler)
+    raiz.setLevel(nivel.upper())
+    for nome, nivel_logger in _ler_niveis(niveis).items():
+        logging.getLogger(nome).setLevel(nivel_logger)
+
+    _listener = QueueListener(fila, saida)
+    _listener.start()
+
+
+def stats():
+    if _handler is None:
+        return {}
+    return {"fila": _handler.queue.qsize(), "descartados": _handler.descartados}
+
+
+def encerrar():
+    """Para a thread de escrita depois de gravar o que ainda estiver na fila."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _concluir(context, inicio, ok, rpc_lento_ms):
+    latencia_ms = (time.perf_counter() - inicio) * 1000
+    codigo = nome_codigo(context.code()) or ("OK" if ok else "UNKNOWN")
+    if latencia_ms >= rpc_lento_ms or codigo in ("UNKNOWN", "INTERNAL", "DATA_LOSS"):
+        nivel = logging.WARNING
+    else:
+        nivel = logging.DEBUG
+    if log_rpc.isEnabledFor(nivel):
+        log_rpc.log(nivel, "RPC concluído", extra={"codigo": codigo, "latencia_ms": round(latencia_ms, 3)})
+
+
+def _envolver_comportamento(comportamento, metodo, streaming, rpc_lento_ms):
+    """Versão do método do servicer com contexto de log, do mesmo tipo (síncrono, corrotina ou gerador)."""
+    if inspect.isasyncgenfunction(comportamento):
+        async def registrado(request, context):
+            token = _contexto.set({"rpc": metodo})
+            inicio = time.perf_counter()
+            ok = False
+            try:
+                async for resposta in comportamento(request, context):
+                    yield resposta
+                ok = True
+            finally:
+                _concluir(context, inicio, ok, rpc_lento_ms)
+                _restaurar(token)
+    elif inspect.iscoroutinefunction(comportamento):
+        async def registrado(request, context):
+            token = _contexto.set({"rpc": metodo})
+            inicio = time.perf_counter()
+            ok = False
+            try:
+                resposta = await comportamento(request, context)
+                ok = True
+                return resposta
+            finally:
+                _concluir(context, inicio, ok, rpc_lento_ms)
+                _restaurar(token)
+    elif streaming:
+        def registrado(request, context):
+            context = contexto_sincrono(context)
+            token = _contexto.set({"rpc": metodo})
+            inicio = time.perf_counter()
+            ok = False
+            try:
+                yield from comportamento(request, context)
+                ok = True
+            finally:
+                _concluir(context, inicio, ok, rpc_lento_ms)
+                _restaurar(token)
+    else:
+        def registrado(request, context):
+            context = contexto_sincrono(context)
+            token = _contexto.set({"rpc": metodo})
+            inicio = time.perf_counter()
+            ok = False
+            try:
+                resposta = comportamento(request, context)
+                ok = True
+                return resposta
+            finally:
+                _concluir(context, inicio, ok, rpc_lento_ms)
+                _restaurar(token)
+    return registrado
+
+
+def _restaurar(token):
+    try:
+        _contexto.reset(token)
+    except ValueError:
+        _contexto.set(None)
+
+
+def _envolver_handler(handler, metodo, rpc_lento_ms):
+    if handler.response_streaming:
+        # streams (WatchVeiculos, exportações) duram o quanto o cliente quiser
+        rpc_lento_ms = float("inf")
+    for campo in ("unary_unary", "unary_stream", "stream_unary", "stream_stream"):
+        comportamento = getattr(handler, campo)
+        if comportamento is not None:
+            registrado = _envolver_comportamento(comportamento, metodo, handler.response_streaming, rpc_lento_ms)
+            return handler._replace(**{campo: registrado})
+    return handler
+
+
+class InterceptorLogs(grpc.ServerInterceptor):
+    """
+    Abre o contexto de log de cada RPC (campo `rpc`, mais o que o método acrescentar)
+    e registra a conclusão no logger "rpc": DEBUG normalmente, WARNING se o RPC
+    passou de `rpc_lento_ms` ou terminou em erro interno.
+    """
+
+    def __init__(self, rpc_lento_ms):
+        self._rpc_lento_ms = rpc_lento_ms
+        self._handlers = {}
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        metodo = handler_call_details.method
+        registrado = self._handlers.get(metodo)
+        if registrado is None:
+            registrado = self._handlers.setdefault(metodo, _envolver_handler(handler, metodo, self._rpc_lento_ms))
+        return registrado
+
+
+class InterceptorLogsAsync(grpc.aio.ServerInterceptor):
+    def __init__(self, rpc_lento_ms):
+        self._rpc_lento_ms = rpc_lento_ms
+        self._handlers = {}
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        metodo = handler_call_details.method
+        registrado = self._handlers.get(metodo)
+        if registrado is None:
+            registrado = self._handlers.setdefault(metodo, _envolver_handler(handler, metodo, self._rpc_lento_ms))
+        return registrado
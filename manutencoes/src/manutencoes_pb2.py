@@ -24,13 +24,15 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x11manutencoes.proto\x12\x0bmanutencoes\"f\n\nManutencao\x12\n\n\x02id\x18\x01 \x01(\t\x12\x12\n\nid_veiculo\x18\x02 \x01(\t\x12\x15\n\rplaca_veiculo\x18\x03 \x01(\t\x12\x11\n\tdescricao\x18\x04 \x01(\t\x12\x0e\n\x06status\x18\x05 \x01(\t\"@\n\x10ListaManutencoes\x12,\n\x0bmanutencoes\x18\x01 \x03(\x0b\x32\x17.manutencoes.Manutencao\"\x1a\n\x0cManutencaoId\x12\n\n\x02id\x18\x01 \x01(\t\"=\n\x11ManutencaoRequest\x12\x15\n\rplaca_veiculo\x18\x01 \x01(\t\x12\x11\n\tdescricao\x18\x02 \x01(\t\"\x07\n\x05\x45mpty2\xea\x01\n\x11GestaoManutencoes\x12J\n\x0f\x43riarManutencao\x12\x1e.manutencoes.ManutencaoRequest\x1a\x17.manutencoes.Manutencao\x12\x46\n\x11ListarManutencoes\x12\x12.manutencoes.Empty\x1a\x1d.manutencoes.ListaManutencoes\x12\x41\n\x0b\x42uscarPorId\x12\x19.manutencoes.ManutencaoId\x1a\x17.manutencoes.Manutencaob\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x11manutencoes.proto\x12\x0bmanutencoes\"f\n\nManutencao\x12\n\n\x02id\x18\x01 \x01(\t\x12\x12\n\nid_veiculo\x18\x02 \x01(\t\x12\x15\n\rplaca_veiculo\x18\x03 \x01(\t\x12\x11\n\tdescricao\x18\x04 \x01(\t\x12\x0e\n\x06status\x18\x05 \x01(\t\"@\n\x10ListaManutencoes\x12,\n\x0bmanutencoes\x18\x01 \x03(\x0b\x32\x17.manutencoes.Manutencao\"\x1a\n\x0cManutencaoId\x12\n\n\x02id\x18\x01 \x01(\t\"Y\n\x11ManutencaoRequest\x12\x15\n\rplaca_veiculo\x18\x01 \x01(\t\x12\x11\n\tdescricao\x18\x02 \x01(\t\x12\x1a\n\x12\x63have_idempotencia\x18\x03 \x01(\t\"r\n\x10ResultadoCriacao\x12\x0e\n\x06indice\x18\x01 \x01(\x05\x12+\n\nmanutencao\x18\x02 \x01(\x0b\x32\x17.manutencoes.Manutencao\x12\x13\n\x0b\x63odigo_erro\x18\x03 \x01(\t\x12\x0c\n\x04\x65rro\x18\x04 \x01(\t\"N\n\x11\x46iltroManutencoes\x12\x15\n\rplaca_veiculo\x18\x01 \x01(\t\x12\x12\n\nid_veiculo\x18\x02 \x01(\t\x12\x0e\n\x06status\x18\x03 \x01(\t\"q\n\x18PaginaManutencoesRequest\x12.\n\x06\x66iltro\x18\x01 \x01(\x0b\x32\x1e.manutencoes.FiltroManutencoes\x12\x11\n\tpage_size\x18\x02 \x01(\x05\x12\x12\n\npage_token\x18\x03 \x01(\t\"Z\n\x11PaginaManutencoes\x12,\n\x0bmanutencoes\x18\x01 \x03(\x0b\x32\x17.manutencoes.Manutencao\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\"H\n\x11\x41tualizacaoStatus\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0e\n\x06status\x18\x02 \x01(\t\x12\x17\n\x0fstatus_esperado\x18\x03 \x01(\t\"N\n\x16\x41tualizarStatusRequest\x12\x34\n\x0c\x61tualizacoes\x18\x01 \x03(\x0b\x32\x1e.manutencoes.AtualizacaoStatus\"v\n\x14ResultadoAtualizacao\x12\x0e\n\x06indice\x18\x01 \x01(\x05\x12+\n\nmanutencao\x18\x02 \x01(\x0b\x32\x17.manutencoes.Manutencao\x12\x13\n\x0b\x63odigo_erro\x18\x03 \x01(\t\x12\x0c\n\x04\x65rro\x18\x04 \x01(\t\"P\n\x17\x41tualizarStatusResponse\x12\x35\n\nresultados\x18\x01 \x03(\x0b\x32!.manutencoes.ResultadoAtualizacao\"/\n\x0e\x43ontagemStatus\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\r\n\x05total\x18\x02 \x01(\x03\"\xbe\x01\n\x0f\x43ontagemVeiculo\x12\x12\n\nid_veiculo\x18\x01 \x01(\t\x12\x15\n\rplaca_veiculo\x18\x02 \x01(\t\x12\r\n\x05total\x18\x03 \x01(\x03\x12?\n\npor_status\x18\x04 \x03(\x0b\x32+.manutencoes.ContagemVeiculo.PorStatusEntry\x1a\x30\n\x0ePorStatusEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x03:\x02\x38\x01\"\x86\x01\n\x11ResumoManutencoes\x12\r\n\x05total\x18\x01 \x01(\x03\x12/\n\npor_status\x18\x02 \x03(\x0b\x32\x1b.manutencoes.ContagemStatus\x12\x31\n\x0bpor_veiculo\x18\x03 \x03(\x0b\x32\x1c.manutencoes.ContagemVeiculo\"\x07\n\x05\x45mpty2\x9b\x05\n\x11GestaoManutencoes\x12J\n\x0f\x43riarManutencao\x12\x1e.manutencoes.ManutencaoRequest\x1a\x17.manutencoes.Manutencao\x12\x46\n\x11ListarManutencoes\x12\x12.manutencoes.Empty\x1a\x1d.manutencoes.ListaManutencoes\x12\x41\n\x0b\x42uscarPorId\x12\x19.manutencoes.ManutencaoId\x1a\x17.manutencoes.Manutencao\x12U\n\x10\x43riarManutencoes\x12\x1e.manutencoes.ManutencaoRequest\x1a\x1d.manutencoes.ResultadoCriacao(\x01\x30\x01\x12`\n\x17ListarPaginaManutencoes\x12%.manutencoes.PaginaManutencoesRequest\x1a\x1e.manutencoes.PaginaManutencoes\x12N\n\x11StreamManutencoes\x12\x1e.manutencoes.FiltroManutencoes\x1a\x17.manutencoes.Manutencao0\x01\x12H\n\x12ResumirManutencoes\x12\x12.manutencoes.Empty\x1a\x1e.manutencoes.ResumoManutencoes\x12\\\n\x0f\x41tualizarStatus\x12#.manutencoes.AtualizarStatusRequest\x1a$.manutencoes.AtualizarStatusResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'manutencoes_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
+  _globals['_CONTAGEMVEICULO_PORSTATUSENTRY']._loaded_options = None
+  _globals['_CONTAGEMVEICULO_PORSTATUSENTRY']._serialized_options = b'8\001'
   _globals['_MANUTENCAO']._serialized_start=34
   _globals['_MANUTENCAO']._serialized_end=136
   _globals['_LISTAMANUTENCOES']._serialized_start=138
@@ -38,9 +40,33 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_MANUTENCAOID']._serialized_start=204
   _globals['_MANUTENCAOID']._serialized_end=230
   _globals['_MANUTENCAOREQUEST']._serialized_start=232
-  _globals['_MANUTENCAOREQUEST']._serialized_end=293
-  _globals['_EMPTY']._serialized_start=295
-  _globals['_EMPTY']._serialized_end=302
-  _globals['_GESTAOMANUTENCOES']._serialized_start=305
-  _globals['_GESTAOMANUTENCOES']._serialized_end=539
+  _globals['_MANUTENCAOREQUEST']._serialized_end=321
+  _globals['_RESULTADOCRIACAO']._serialized_start=323
+  _globals['_RESULTADOCRIACAO']._serialized_end=437
+  _globals['_FILTROMANUTENCOES']._serialized_start=439
+  _globals['_FILTROMANUTENCOES']._serialized_end=517
+  _globals['_PAGINAMANUTENCOESREQUEST']._serialized_start=519
+  _globals['_PAGINAMANUTENCOESREQUEST']._serialized_end=632
+  _globals['_PAGINAMANUTENCOES']._serialized_start=634
+  _globals['_PAGINAMANUTENCOES']._serialized_end=724
+  _globals['_ATUALIZACAOSTATUS']._serialized_start=726
+  _globals['_ATUALIZACAOSTATUS']._serialized_end=798
+  _globals['_ATUALIZARSTATUSREQUEST']._serialized_start=800
+  _globals['_ATUALIZARSTATUSREQUEST']._serialized_end=878
+  _globals['_RESULTADOATUALIZACAO']._serialized_start=880
+  _globals['_RESULTADOATUALIZACAO']._serialized_end=998
+  _globals['_ATUALIZARSTATUSRESPONSE']._serialized_start=1000
+  _globals['_ATUALIZARSTATUSRESPONSE']._serialized_end=1080
+  _globals['_CONTAGEMSTATUS']._serialized_start=1082
+  _globals['_CONTAGEMSTATUS']._serialized_end=1129
+  _globals['_CONTAGEMVEICULO']._serialized_start=1132
+  _globals['_CONTAGEMVEICULO']._serialized_end=1322
+  _globals['_CONTAGEMVEICULO_PORSTATUSENTRY']._serialized_start=1274
+  _globals['_CONTAGEMVEICULO_PORSTATUSENTRY']._serialized_end=1322
+  _globals['_RESUMOMANUTENCOES']._serialized_start=1325
+  _globals['_RESUMOMANUTENCOES']._serialized_end=1459
+  _globals['_EMPTY']._serialized_start=1461
+  _globals['_EMPTY']._serialized_end=1468
+  _globals['_GESTAOMANUTENCOES']._serialized_start=1471
+  _globals['_GESTAOMANUTENCOES']._serialized_end=2138
 # @@protoc_insertion_point(module_scope)
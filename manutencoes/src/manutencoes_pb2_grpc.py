@@ -50,6 +50,31 @@ class GestaoManutencoesStub(object):
                 request_serializer=manutencoes__pb2.ManutencaoId.SerializeToString,
                 response_deserializer=manutencoes__pb2.Manutencao.FromString,
                 _registered_method=True)
+        self.CriarManutencoes = channel.stream_stream(
+                '/manutencoes.GestaoManutencoes/CriarManutencoes',
+                request_serializer=manutencoes__pb2.ManutencaoRequest.SerializeToString,
+                response_deserializer=manutencoes__pb2.ResultadoCriacao.FromString,
+                _registered_method=True)
+        self.ListarPaginaManutencoes = channel.unary_unary(
+                '/manutencoes.GestaoManutencoes/ListarPaginaManutencoes',
+                request_serializer=manutencoes__pb2.PaginaManutencoesRequest.SerializeToString,
+                response_deserializer=manutencoes__pb2.PaginaManutencoes.FromString,
+                _registered_method=True)
+        self.StreamManutencoes = channel.unary_stream(
+                '/manutencoes.GestaoManutencoes/StreamManutencoes',
+                request_serializer=manutencoes__pb2.FiltroManutencoes.SerializeToString,
+                response_deserializer=manutencoes__pb2.Manutencao.FromString,
+                _registered_method=True)
+        self.ResumirManutencoes = channel.unary_unary(
+                '/manutencoes.GestaoManutencoes/ResumirManutencoes',
+                request_serializer=manutencoes__pb2.Empty.SerializeToString,
+                response_deserializer=manutencoes__pb2.ResumoManutencoes.FromString,
+                _registered_method=True)
+        self.AtualizarStatus = channel.unary_unary(
+                '/manutencoes.GestaoManutencoes/AtualizarStatus',
+                request_serializer=manutencoes__pb2.AtualizarStatusRequest.SerializeToString,
+                response_deserializer=manutencoes__pb2.AtualizarStatusResponse.FromString,
+                _registered_method=True)
 
 
 class GestaoManutencoesServicer(object):
@@ -75,6 +100,42 @@ class GestaoManutencoesServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def CriarManutencoes(self, request_iterator, context):
+        """Criação em massa: os pedidos são gravados em lotes e o resultado de cada
+        um volta no stream de resposta assim que o seu lote termina.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListarPaginaManutencoes(self, request, context):
+        """Listagem filtrada e paginada por id; o next_page_token vem vazio na última página.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamManutencoes(self, request, context):
+        """Todas as manutenções que atendem ao filtro, em ordem de id, lidas do banco em lotes.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ResumirManutencoes(self, request, context):
+        """Contagens agrupadas por status e por veículo; o custo é o número de grupos, não de manutenções.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def AtualizarStatus(self, request, context):
+        """Troca o status de várias manutenções num único UPDATE; cada item tem o seu resultado.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_GestaoManutencoesServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -93,6 +154,31 @@ def add_GestaoManutencoesServicer_to_server(servicer, server):
                     request_deserializer=manutencoes__pb2.ManutencaoId.FromString,
                     response_serializer=manutencoes__pb2.Manutencao.SerializeToString,
             ),
+            'CriarManutencoes': grpc.stream_stream_rpc_method_handler(
+                    servicer.CriarManutencoes,
+                    request_deserializer=manutencoes__pb2.ManutencaoRequest.FromString,
+                    response_serializer=manutencoes__pb2.ResultadoCriacao.SerializeToString,
+            ),
+            'ListarPaginaManutencoes': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListarPaginaManutencoes,
+                    request_deserializer=manutencoes__pb2.PaginaManutencoesRequest.FromString,
+                    response_serializer=manutencoes__pb2.PaginaManutencoes.SerializeToString,
+            ),
+            'StreamManutencoes': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamManutencoes,
+                    request_deserializer=manutencoes__pb2.FiltroManutencoes.FromString,
+                    response_serializer=manutencoes__pb2.Manutencao.SerializeToString,
+            ),
+            'ResumirManutencoes': grpc.unary_unary_rpc_method_handler(
+                    servicer.ResumirManutencoes,
+                    request_deserializer=manutencoes__pb2.Empty.FromString,
+                    response_serializer=manutencoes__pb2.ResumoManutencoes.SerializeToString,
+            ),
+            'AtualizarStatus': grpc.unary_unary_rpc_method_handler(
+                    servicer.AtualizarStatus,
+                    request_deserializer=manutencoes__pb2.AtualizarStatusRequest.FromString,
+                    response_serializer=manutencoes__pb2.AtualizarStatusResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'manutencoes.GestaoManutencoes', rpc_method_handlers)
@@ -185,3 +271,138 @@ class GestaoManutencoes(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def CriarManutencoes(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/manutencoes.GestaoManutencoes/CriarManutencoes',
+            manutencoes__pb2.ManutencaoRequest.SerializeToString,
+            manutencoes__pb2.ResultadoCriacao.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ListarPaginaManutencoes(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/manutencoes.GestaoManutencoes/ListarPaginaManutencoes',
+            manutencoes__pb2.PaginaManutencoesRequest.SerializeToString,
+            manutencoes__pb2.PaginaManutencoes.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamManutencoes(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/manutencoes.GestaoManutencoes/StreamManutencoes',
+            manutencoes__pb2.FiltroManutencoes.SerializeToString,
+            manutencoes__pb2.Manutencao.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ResumirManutencoes(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/manutencoes.GestaoManutencoes/ResumirManutencoes',
+            manutencoes__pb2.Empty.SerializeToString,
+            manutencoes__pb2.ResumoManutencoes.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def AtualizarStatus(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/manutencoes.GestaoManutencoes/AtualizarStatus',
+            manutencoes__pb2.AtualizarStatusRequest.SerializeToString,
+            manutencoes__pb2.AtualizarStatusResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,358 @@
+import time
+import asyncio
+import logging
+import inspect
+import functools
+
+import grpc
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY, start_http_server
+from prometheus_client.core import GaugeMetricFamily
+
+# Latências de 0,5 ms a 10 s: cobre de um acerto de cache a uma importação em lote.
+BUCKETS_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+RPC_LATENCIA = Histogram(
+    "grpc_server_handling_seconds", "Duração dos RPCs atendidos.",
+    ["grpc_method", "grpc_type"], buckets=BUCKETS_LATENCIA
+)
+RPC_EM_ANDAMENTO = Gauge("grpc_server_in_flight", "RPCs em andamento.", ["grpc_method"])
+RPC_ATENDIDOS = Counter("grpc_server_handled", "RPCs concluídos, por código de status.", ["grpc_method", "grpc_code"])
+
+CLIENTE_LATENCIA = Histogram(
+    "grpc_client_handling_seconds", "Duração das chamadas unárias feitas a outros serviços.",
+    ["grpc_method"], buckets=BUCKETS_LATENCIA
+)
+CLIENTE_ATENDIDAS = Counter(
+    "grpc_client_handled", "Chamadas unárias a outros serviços, por código de status.", ["grpc_method", "grpc_code"]
+)
+
+DB_LATENCIA = Histogram(
+    "db_query_seconds", "Duração das consultas ao banco, por método da classe de acesso.",
+    ["consulta"], buckets=BUCKETS_LATENCIA
+)
+DB_ERROS = Counter("db_query_errors", "Consultas ao banco que terminaram em erro.", ["consulta"])
+
+log = logging.getLogger("metricas")
+
+_NOMES_CODIGOS = {codigo.value[0]: codigo.name for codigo in grpc.StatusCode}
+
+
+def nome_codigo(codigo):
+    """Nome do código de status; o contexto do grpc.aio pode devolver o número em vez do enum."""
+    if codigo is None:
+        return None
+    if isinstance(codigo, grpc.StatusCode):
+        return codigo.name
+    return _NOMES_CODIGOS.get(codigo, str(codigo))
+
+
+def _tipo_rpc(handler):
+    if handler.request_streaming and handler.response_streaming:
+        return "bidi_stream"
+    if handler.request_streaming:
+        return "client_stream"
+    if handler.response_streaming:
+        return "server_stream"
+    return "unary"
+
+
+class _MedidorRpc:
+    """Séries de um método resolvidas uma única vez: `labels()` custa um lock e um dict por chamada."""
+
+    def __init__(self, metodo, tipo):
+        self._metodo = metodo
+        self._latencia = RPC_LATENCIA.labels(metodo, tipo)
+        self._em_andamento = RPC_EM_ANDAMENTO.labels(metodo)
+        self._atendidos = {}
+
+    def iniciar(self):
+        self._em_andamento.inc()
+        return time.perf_counter()
+
+    def finalizar(self, inicio, context, ok, cancelado=False):
+        self._latencia.observe(time.perf_counter() - inicio)
+        self._em_andamento.dec()
+        codigo = nome_codigo(context.code())
+        if codigo is None:
+            codigo = "OK" if ok else ("CANCELLED" if cancelado else "UNKNOWN")
+        contador = self._atendidos.get(codigo)
+        if contador is None:
+            contador = self._atendidos.setdefault(codigo, RPC_ATENDIDOS.labels(self._metodo, codigo))
+        contador.inc()
+
+
+class _ContextoComCodigo:
+    """
+    Contexto dos métodos síncronos rodando no grpc.aio, que não tem code():
+    guarda o código definido por set_code/abort e repassa o resto.
+    """
+
+    def __init__(self, context):
+        self._context = context
+        self._codigo = None
+
+    def __getattr__(self, nome):
+        return getattr(self._context, nome)
+
+    def set_code(self, code):
+        self._codigo = code
+        self._context.set_code(code)
+
+    def abort(self, code, details=""):
+        self._codigo = code
+        self._context.abort(code, details)
+
+    def code(self):
+        return self._codigo
+
+
+def contexto_sincrono(context):
+    return context if hasattr(context, "code") else _ContextoComCodigo(context)
+
+
+def _envolver_comportamento(comportamento, medidor, streaming):
+    """Versão medida do método do servicer, do mesmo tipo (síncrono, corrotina ou gerador)."""
+    if inspect.isasyncgenfunction(comportamento):
+        async def medido(request, context):
+            inicio = medidor.iniciar()
+            ok = cancelado = False
+            try:
+                async for resposta in comportamento(request, context):
+                    yield resposta
+                ok = True
+            except (GeneratorExit, asyncio.CancelledError):
+                cancelado = True
+                raise
+            finally:
+                medidor.finalizar(inicio, context, ok, cancelado)
+    elif inspect.iscoroutinefunction(comportamento):
+        async def medido(request, context):
+            inicio = medidor.iniciar()
+            ok = cancelado = False
+            try:
+                resposta = await comportamento(request, context)
+                ok = True
+                return resposta
+            except asyncio.CancelledError:
+                cancelado = True
+                raise
+            finally:
+                medidor.finalizar(inicio, context, ok, cancelado)
+    elif streaming:
+        def medido(request, context):
+            context = contexto_sincrono(context)
+            inicio = medidor.iniciar()
+            ok = cancelado = False
+            try:
+                yield from comportamento(request, context)
+                ok = True
+            except GeneratorExit:
+                # cliente cancelou ou desconectou no meio do stream
+                cancelado = True
+                raise
+            finally:
+                medidor.finalizar(inicio, context, ok, cancelado)
+    else:
+        def medido(request, context):
+            context = contexto_sincrono(context)
+            inicio = medidor.iniciar()
+            ok = False
+            try:
+                resposta = comportamento(request, context)
+                ok = True
+                return resposta
+            finally:
+                medidor.finalizar(inicio, context, ok)
+    return medido
+
+
+def _envolver_handler(handler, metodo):
+    medidor = _MedidorRpc(metodo, _tipo_rpc(handler))
+    for campo in ("unary_unary", "unary_stream", "stream_unary", "stream_stream"):
+        comportamento = getattr(handler, campo)
+        if comportamento is not None:
+            medido = _envolver_comportamento(comportamento, medidor, handler.response_streaming)
+            return handler._replace(**{campo: medido})
+    return handler
+
+
+class InterceptorMetricas(grpc.ServerInterceptor):
+    """
+    Mede latência, RPCs em andamento e códigos de status de cada método do servidor.
+    O handler medido é montado uma vez por método e reaproveitado.
+    """
+
+    def __init__(self):
+        self._handlers = {}
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        metodo = handler_call_details.method
+        medido = self._handlers.get(metodo)
+        if medido is None:
+            medido = self._handlers.setdefault(metodo, _envolver_handler(handler, metodo))
+        return medido
+
+
+class InterceptorMetricasAsync(grpc.aio.ServerInterceptor):
+    """InterceptorMetricas para o grpc.aio; métodos síncronos continuam indo para o migration_thread_pool."""
+
+    def __init__(self):
+        self._handlers = {}
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        metodo = handler_call_details.method
+        medido = self._handlers.get(metodo)
+        if medido is None:
+            medido = self._handlers.setdefault(metodo, _envolver_handler(handler, metodo))
+        return medido
+
+
+def _metodo_cliente(client_call_details):
+    metodo = client_call_details.method
+    return metodo.decode() if isinstance(metodo, bytes) else metodo
+
+
+def _medir_chamada(metodo, codigo, inicio):
+    CLIENTE_LATENCIA.labels(metodo).observe(time.perf_counter() - inicio)
+    CLIENTE_ATENDIDAS.labels(metodo, nome_codigo(codigo)).inc()
+
+
+class InterceptorClienteMetricas(grpc.UnaryUnaryClientInterceptor):
+    """Mede cada tentativa de chamada unária feita pelo canal (os retries aparecem separados)."""
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        inicio = time.perf_counter()
+        resposta = continuation(client_call_details, request)
+        _medir_chamada(_metodo_cliente(client_call_details), resposta.code(), inicio)
+        return resposta
+
+
+class InterceptorClienteMetricasAsync(grpc.aio.UnaryUnaryClientInterceptor):
+    async def intercept_unary_unary(self, continuation, client_call_details, request):
+        inicio = time.perf_counter()
+        chamada = await continuation(client_call_details, request)
+        _medir_chamada(_metodo_cliente(client_call_details), await chamada.code(), inicio)
+        return chamada
+
+
+def medir_consulta(func):
+    """
+    Decorador dos métodos das classes de acesso ao banco: mede cada chamada em
+    db_query_seconds{consulta=<nome do método>}. Em geradores cada lote
+    (cada retomada até o próximo yield) é medido separadamente, para não contar
+    o tempo em que quem consome o gerador está enviando as linhas ao cliente.
+    """
+    latencia = DB_LATENCIA.labels(func.__name__)
+    erros = DB_ERROS.labels(func.__name__)
+
+    if inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def medido(*args, **kwargs):
+            gerador = func(*args, **kwargs)
+            try:
+                while True:
+                    inicio = time.perf_counter()
+                    try:
+                        lote = await gerador.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    except Exception:
+                        erros.inc()
+                        raise
+                    finally:
+                        latencia.observe(time.perf_counter() - inicio)
+                    yield lote
+            finally:
+                await gerador.aclose()
+    elif inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def medido(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                erros.inc()
+                raise
+            finally:
+                latencia.observe(time.perf_counter() - inicio)
+    elif inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def medido(*args, **kwargs):
+            gerador = func(*args, **kwargs)
+            try:
+                while True:
+                    inicio = time.perf_counter()
+                    try:
+                        lote = next(gerador)
+                    except StopIteration:
+                        return
+                    except Exception:
+                        erros.inc()
+                        raise
+                    finally:
+                        latencia.observe(time.perf_counter() - inicio)
+                    yield lote
+            finally:
+                gerador.close()
+    else:
+        @functools.wraps(func)
+        def medido(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                erros.inc()
+                raise
+            finally:
+                latencia.observe(time.perf_counter() - inicio)
+    return medido
+
+
+class ColetorStats:
+    """
+    Publica os valores numéricos de `stats()` (pool, caches, breaker...) como gauges
+    <prefixo>_<seção>_<chave>. Textos (como o estado do circuit breaker) viram um gauge
+    com o valor num label: <prefixo>_<seção>_estado{estado="aberto"} 1.
+    Só é chamado quando o endpoint é lido.
+    """
+
+    def __init__(self, prefixo, stats):
+        self._prefixo = prefixo
+        self._stats = stats
+
+    def describe(self):
+        # sem descrição prévia o registry chamaria stats() já no registro
+        return []
+
+    def collect(self):
+        for nome, label, valor in self._achatar(self._prefixo, self._stats()):
+            if label is None:
+                gauge = GaugeMetricFamily(nome, f"Valor de {nome} em stats().")
+                gauge.add_metric([], valor)
+            else:
+                gauge = GaugeMetricFamily(nome, f"Valor atual de {nome} em stats().", labels=[label])
+                gauge.add_metric([valor], 1.0)
+            yield gauge
+
+    def _achatar(self, prefixo, stats):
+        for chave, valor in stats.items():
+            nome = f"{prefixo}_{chave}"
+            if isinstance(valor, dict):
+                yield from self._achatar(nome, valor)
+            elif isinstance(valor, (bool, int, float)):
+                yield nome, None, float(valor)
+            elif isinstance(valor, str):
+                yield nome, chave, valor
+
+
+def iniciar_servidor_metricas(porta, prefixo, stats):
+    """Sobe o endpoint /metrics no formato do Prometheus, numa thread própria."""
+    REGISTRY.register(ColetorStats(prefixo, stats))
+    start_http_server(porta)
+    log.info(f"Métricas no formato Prometheus em http://0.0.0.0:{porta}/metrics")
@@ -0,0 +1,415 @@
+import json
+import time
+import queue
+import random
+import inspect
+import importlib
+import threading
+import contextvars
+from contextlib import contextmanager
+
+import grpc
+import psycopg2.extensions
+
+from metricas import contexto_sincrono, nome_codigo
+
+# Rastreamento distribuído próprio, compatível com o cabeçalho W3C `traceparent`:
+# cada RPC atendido abre um span de servidor (filho do span de quem chamou, se o
+# cabeçalho veio na metadata), e as consultas SQL e as chamadas a outros serviços
+# feitas durante ele viram spans filhos. A decisão de amostragem é tomada na
+# raiz e segue no cabeçalho; spans não amostrados não geram nada além dos ids.
+
+_span_atual = contextvars.ContextVar("span_atual", default=None)
+_rastreador = None
+
+MAX_SQL = 1000  # caracteres do SQL guardados no span (um INSERT em lote pode ser enorme)
+
+
+class Span:
+    __slots__ = ("nome", "tipo", "trace_id", "span_id", "parent_id", "amostrado",
+                 "atributos", "_inicio", "_inicio_perf")
+
+    def __init__(self, nome, tipo, trace_id, parent_id, amostrado, atributos=None):
+        self.nome = nome
+        self.tipo = tipo
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.amostrado = amostrado
+        self.atributos = atributos or {}
+        self._inicio = time.time()
+        self._inicio_perf = time.perf_counter()
+
+    def filho(self, nome, tipo="interno", **atributos):
+        return Span(nome, tipo, self.trace_id, self.span_id, self.amostrado, atributos)
+
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.amostrado else '00'}"
+
+    def finalizar(self, status="OK"):
+        if not self.amostrado or _rastreador is None:
+            return
+        _rastreador.exportador.exportar({
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "nome": self.nome,
+            "tipo": self.tipo,
+            "servico": _rastreador.servico,
+            "inicio": self._inicio,
+            "duracao_ms": round((time.perf_counter() - self._inicio_perf) * 1000, 3),
+            "status": status,
+            "atributos": self.atributos,
+        })
+
+
+class _Rastreador:
+    def __init__(self, servico, exportador, taxa_amostragem):
+        self.servico = servico
+        self.exportador = exportador
+        self.taxa_amostragem = taxa_amostragem
+
+
+def configurar(servico, exportador, taxa_amostragem):
+    """Liga o rastreamento no processo; sem esta chamada interceptors e cursores não fazem nada."""
+    global _rastreador
+    _rastreador = _Rastreador(servico, exportador, taxa_amostragem)
+
+
+def ativo():
+    return _rastreador is not None
+
+
+def span_atual():
+    return _span_atual.get()
+
+
+def stats():
+    return _rastreador.exportador.stats() if _rastreador is not None else {}
+
+
+def encerrar():
+    global _rastreador
+    if _rastreador is not None:
+        _rastreador.exportador.close()
+        _rastreador = None
+
+
+@contextmanager
+def span(nome, **atributos):
+    """Span filho do span atual; não faz nada fora de um RPC amostrado."""
+    pai = _span_atual.get()
+    if pai is None or not pai.amostrado:
+        yield None
+        return
+    filho = pai.filho(nome, **atributos)
+    token = _span_atual.set(filho)
+    status = "OK"
+    try:
+        yield filho
+    except BaseException as e:
+        status = type(e).__name__
+        raise
+    finally:
+        _span_atual.reset(token)
+        filho.finalizar(status)
+
+
+def _ler_traceparent(valor):
+    """(trace_id, parent_id, amostrado) do cabeçalho, ou None se ele for inválido."""
+    partes = valor.split("-")
+    if len(partes) != 4 or len(partes[1]) != 32 or len(partes[2]) != 16 or len(partes[3]) != 2:
+        return None
+    try:
+        int(partes[1], 16), int(partes[2], 16)
+        flags = int(partes[3], 16)
+    except ValueError:
+        return None
+    return partes[1], partes[2], bool(flags & 1)
+
+
+def _span_servidor(metodo, context):
+    for chave, valor in context.invocation_metadata() or ():
+        if chave == "traceparent":
+            pai = _ler_traceparent(valor)
+            if pai is not None:
+                trace_id, parent_id, amostrado = pai
+                return Span(metodo, "servidor", trace_id, parent_id, amostrado)
+            break
+    amostrado = random.random() < _rastreador.taxa_amostragem
+    return Span(metodo, "servidor", f"{random.getrandbits(128):032x}", None, amostrado)
+
+
+def _status(context, ok):
+    codigo = nome_codigo(context.code())
+    return codigo or ("OK" if ok else "UNKNOWN")
+
+
+def _envolver_comportamento(comportamento, metodo, streaming):
+    """Versão rastreada do método do servicer, do mesmo tipo (síncrono, corrotina ou gerador)."""
+    # o reset do contextvar fica protegido: o fechamento de um stream cancelado
+    # pode acontecer fora do contexto em que o span foi aberto
+    if inspect.isasyncgenfunction(comportamento):
+        async def rastreado(request, context):
+            atual = _span_servidor(metodo, context)
+            token = _span_atual.set(atual)
+            ok = False
+            try:
+                async for resposta in comportamento(request, context):
+                    yield resposta
+                ok = True
+            finally:
+                _restaurar(token)
+                atual.finalizar(_status(context, ok))
+    elif inspect.iscoroutinefunction(comportamento):
+        async def rastreado(request, context):
+            atual = _span_servidor(metodo, context)
+            token = _span_atual.set(atual)
+            ok = False
+            try:
+                resposta = await comportamento(request, context)
+                ok = True
+                return resposta
+            finally:
+                _restaurar(token)
+                atual.finalizar(_status(context, ok))
+    elif streaming:
+        def rastreado(request, context):
+            context = contexto_sincrono(context)
+            atual = _span_servidor(metodo, context)
+            token = _span_atual.set(atual)
+            ok = False
+            try:
+                yield from comportamento(request, context)
+                ok = True
+            finally:
+                _restaurar(token)
+                atual.finalizar(_status(context, ok))
+    else:
+        def rastreado(request, context):
+            context = contexto_sincrono(context)
+            atual = _span_servidor(metodo, context)
+            token = _span_atual.set(atual)
+            ok = False
+            try:
+                resposta = comportamento(request, context)
+                ok = True
+                return resposta
+            finally:
+                _restaurar(token)
+                atual.finalizar(_status(context, ok))
+    return rastreado
+
+
+def _restaurar(token):
+    try:
+        _span_atual.reset(token)
+    except ValueError:
+        _span_atual.set(None)
+
+
+def _envolver_handler(handler, metodo):
+    for campo in ("unary_unary", "unary_stream", "stream_unary", "stream_stream"):
+        comportamento = getattr(handler, campo)
+        if comportamento is not None:
+            rastreado = _envolver_comportamento(comportamento, metodo, handler.response_streaming)
+            return handler._replace(**{campo: rastreado})
+    return handler
+
+
+class InterceptorRastreamento(grpc.ServerInterceptor):
+    """Abre o span de servidor de cada RPC, continuando o trace recebido no `traceparent`."""
+
+    def __init__(self):
+        self._handlers = {}
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None or _rastreador is None:
+            return handler
+        metodo = handler_call_details.method
+        rastreado = self._handlers.get(metodo)
+        if rastreado is None:
+            rastreado = self._handlers.setdefault(metodo, _envolver_handler(handler, metodo))
+        return rastreado
+
+
+class InterceptorRastreamentoAsync(grpc.aio.ServerInterceptor):
+    def __init__(self):
+        self._handlers = {}
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None or _rastreador is None:
+            return handler
+        metodo = handler_call_details.method
+        rastreado = self._handlers.get(metodo)
+        if rastreado is None:
+            rastreado = self._handlers.setdefault(metodo, _envolver_handler(handler, metodo))
+        return rastreado
+
+
+def _span_cliente(client_call_details):
+    """(span da chamada ou None, metadata com o traceparent) para uma chamada feita dentro de um RPC."""
+    pai = _span_atual.get()
+    if pai is None:
+        return None, client_call_details.metadata
+    metodo = client_call_details.method
+    metodo = metodo.decode() if isinstance(metodo, bytes) else metodo
+    # não amostrado: o cabeçalho segue só para o outro serviço respeitar a decisão
+    chamada = pai.filho(metodo, "cliente") if pai.amostrado else None
+    traceparent = (chamada or pai).traceparent()
+    return chamada, list(client_call_details.metadata or ()) + [("traceparent", traceparent)]
+
+
+class _DetalhesChamada(grpc.ClientCallDetails):
+    def __init__(self, detalhes, metadata):
+        self.method = detalhes.method
+        self.timeout = detalhes.timeout
+        self.metadata = metadata
+        self.credentials = detalhes.credentials
+        self.wait_for_ready = detalhes.wait_for_ready
+        self.compression = getattr(detalhes, "compression", None)
+
+
+class InterceptorClienteRastreamento(grpc.UnaryUnaryClientInterceptor):
+    """Propaga o trace atual no `traceparent` e mede a chamada num span de cliente."""
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        chamada, metadata = _span_cliente(client_call_details)
+        if metadata is client_call_details.metadata:
+            return continuation(client_call_details, request)
+        resposta = continuation(_DetalhesChamada(client_call_details, metadata), request)
+        if chamada is not None:
+            chamada.finalizar(nome_codigo(resposta.code()))
+        return resposta
+
+
+class InterceptorClienteRastreamentoAsync(grpc.aio.UnaryUnaryClientInterceptor):
+    async def intercept_unary_unary(self, continuation, client_call_details, request):
+        chamada, metadata = _span_cliente(client_call_details)
+        if metadata is client_call_details.metadata:
+            return await continuation(client_call_details, request)
+        detalhes = grpc.aio.ClientCallDetails(
+            client_call_details.method, client_call_details.timeout, grpc.aio.Metadata(*metadata),
+            client_call_details.credentials, client_call_details.wait_for_ready
+        )
+        resposta = await continuation(detalhes, request)
+        if chamada is not None:
+            chamada.finalizar(nome_codigo(await resposta.code()))
+        return resposta
+
+
+def _sql(query):
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    return " ".join(str(query).split())[:MAX_SQL]
+
+
+class CursorRastreado(psycopg2.extensions.cursor):
+    """cursor_factory do psycopg2: cada comando dentro de um RPC amostrado vira um span `db`."""
+
+    def execute(self, query, vars=None):
+        with span("db", sql=_sql(query)):
+            return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        with span("db", sql=_sql(query)):
+            return super().executemany(query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        with span("db", sql=_sql(sql)):
+            return super().copy_expert(sql, file, size)
+
+
+class ConexaoRastreadaMixin:
+    """Para uma subclasse de asyncpg.Connection (connection_class do pool): spans `db` por comando."""
+
+    async def execute(self, query, *args, **kwargs):
+        with span("db", sql=_sql(query)):
+            return await super().execute(query, *args, **kwargs)
+
+    async def executemany(self, command, args, **kwargs):
+        with span("db", sql=_sql(command)):
+            return await super().executemany(command, args, **kwargs)
+
+    async def fetch(self, query, *args, **kwargs):
+        with span("db", sql=_sql(query)):
+            return await super().fetch(query, *args, **kwargs)
+
+    async def fetchrow(self, query, *args, **kwargs):
+        with span("db", sql=_sql(query)):
+            return await super().fetchrow(query, *args, **kwargs)
+
+    async def fetchval(self, query, *args, **kwargs):
+        with span("db", sql=_sql(query)):
+            return await super().fetchval(query, *args, **kwargs)
+
+
+class ExportadorJsonl:
+    """
+    Grava cada span como uma linha JSON em `caminho`. O RPC só enfileira; uma
+    thread grava em lotes. Com a fila cheia (disco lento) os spans são descartados.
+    """
+
+    def __init__(self, caminho, max_pendentes=10000):
+        self._caminho = caminho
+        self._fila = queue.Queue(max_pendentes)
+        self._lock = threading.Lock()
+        self._exportados = 0
+        self._descartados = 0
+        self._thread = threading.Thread(target=self._run, name="exportador-spans", daemon=True)
+        self._thread.start()
+
+    def exportar(self, registro):
+        try:
+            self._fila.put_nowait(registro)
+        except queue.Full:
+            with self._lock:
+                self._descartados += 1
+
+    def _run(self):
+        with open(self._caminho, "a", encoding="utf-8") as arquivo:
+            while True:
+                registro = self._fila.get()
+                if registro is None:
+                    return
+                lote = [registro]
+                while len(lote) < 500:
+                    try:
+                        registro = self._fila.get_nowait()
+                    except queue.Empty:
+                        break
+                    if registro is None:
+                        self._gravar(arquivo, lote)
+                        return
+                    lote.append(registro)
+                self._gravar(arquivo, lote)
+
+    def _gravar(self, arquivo, lote):
+        arquivo.write("".join(json.dumps(registro, ensure_ascii=False) + "\n" for registro in lote))
+        arquivo.flush()
+        with self._lock:
+            self._exportados += len(lote)
+
+    def stats(self):
+        with self._lock:
+            return {"exportados": self._exportados, "descartados": self._descartados, "fila": self._fila.qsize()}
+
+    def close(self, timeout=5):
+        try:
+            self._fila.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+def criar_exportador(nome, caminho):
+    """
+    "arquivo" grava em JSON lines em `caminho`; "modulo:Classe" instancia um
+    exportador próprio, que precisa ter exportar(registro), stats() e close().
+    """
+    if nome == "arquivo":
+        return ExportadorJsonl(caminho)
+    modulo, _, classe = nome.partition(":")
+    return getattr(importlib.import_module(modulo), classe)()
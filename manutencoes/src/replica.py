@@ -0,0 +1,123 @@
+import logging
+import threading
+
+import grpc
+
+import veiculos_pb2
+
+log = logging.getLogger("replica")
+
+
+class ReplicaVeiculos:
+    """
+    Índice local placa -> id_veiculo mantido pelo stream WatchVeiculos do MS Veiculos.
+
+    Uma thread assina o stream: os eventos SNAPSHOT montam um índice novo, que
+    substitui o atual no SNAPSHOT_FIM, e as alterações seguintes são aplicadas
+    nele. Se o stream cair a réplica deixa de ser usada (`pronta` = False) até
+    uma nova assinatura, que sempre recomeça pelo snapshot.
+    """
+
+    def __init__(self, stub, retry_delay_seconds=2.0):
+        self._stub = stub
+        self._retry_delay_seconds = retry_delay_seconds
+        self._lock = threading.Lock()
+        self._por_placa = {}
+        self._por_id = {}
+        self._pronta = threading.Event()
+        self._parando = threading.Event()
+        self._chamada = None
+
+        self._sincronizacoes = 0
+        self._eventos = 0
+        self._quedas = 0
+        self._thread = threading.Thread(target=self._run, name="replica-veiculos", daemon=True)
+
+    @property
+    def pronta(self):
+        return self._pronta.is_set()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._parando.set()
+        chamada = self._chamada
+        if chamada is not None:
+            chamada.cancel()
+        self._thread.join(timeout=5)
+
+    def wait_pronta(self, timeout=None):
+        return self._pronta.wait(timeout)
+
+    def id_por_placa(self, placa):
+        """Id do veículo segundo a réplica; None se ela não estiver pronta ou não conhecer a placa."""
+        if not self._pronta.is_set():
+            return None
+        return self._por_placa.get(placa)
+
+    def _run(self):
+        while not self._parando.is_set():
+            try:
+                self._assinar()
+                motivo = "encerrado pelo servidor"
+            except grpc.RpcError as e:
+                if self._parando.is_set():
+                    return
+                motivo = e.code().name
+            except Exception as e:
+                # erro ao tratar um evento: sem isso a thread morreria e a réplica ficaria velha
+                log.exception("Erro na réplica de veículos.")
+                motivo = type(e).__name__
+                chamada = self._chamada
+                if chamada is not None:
+                    chamada.cancel()
+            finally:
+                self._pronta.clear()
+            with self._lock:
+                self._quedas += 1
+            log.warning(f"Stream WatchVeiculos interrompido ({motivo}); ressincronizando em {self._retry_delay_seconds}s.")
+            self._parando.wait(self._retry_delay_seconds)
+
+    def _assinar(self):
+        Evento = veiculos_pb2.EventoVeiculo
+        self._chamada = self._stub.WatchVeiculos(veiculos_pb2.Empty())
+        snapshot = {}
+        for evento in self._chamada:
+            if evento.tipo == Evento.SNAPSHOT:
+                snapshot[evento.veiculo.id] = evento.veiculo.placa
+            elif evento.tipo == Evento.SNAPSHOT_FIM:
+                with self._lock:
+                    self._por_id = snapshot
+                    self._por_placa = {placa: v_id for v_id, placa in snapshot.items()}
+                    self._sincronizacoes += 1
+                self._pronta.set()
+                log.info(f"Réplica de veículos sincronizada ({len(snapshot)} veículos).")
+            else:
+                self._aplicar(evento)
+
+    def _aplicar(self, evento):
+        Evento = veiculos_pb2.EventoVeiculo
+        veiculo = evento.veiculo
+        with self._lock:
+            self._eventos += 1
+            if evento.tipo == Evento.LIMPAR:
+                self._por_id = {}
+                self._por_placa = {}
+                return
+            placa_antiga = self._por_id.pop(veiculo.id, None)
+            if placa_antiga is not None and self._por_placa.get(placa_antiga) == veiculo.id:
+                del self._por_placa[placa_antiga]
+            if evento.tipo == Evento.ALTERADO:
+                self._por_id[veiculo.id] = veiculo.placa
+                self._por_placa[veiculo.placa] = veiculo.id
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pronta": self.pronta,
+                "veiculos": len(self._por_placa),
+                "sincronizacoes": self._sincronizacoes,
+                "eventos": self._eventos,
+                "quedas": self._quedas,
+            }
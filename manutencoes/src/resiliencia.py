@@ -0,0 +1,210 @@
+import time
+import random
+import asyncio
+import threading
+
+import grpc
+
+# Códigos que indicam um serviço com problema (contam para o circuit breaker).
+# Os demais, como NOT_FOUND, são respostas normais e contam como sucesso.
+CODIGOS_FALHA = frozenset({
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+    grpc.StatusCode.INTERNAL,
+    grpc.StatusCode.UNKNOWN,
+})
+
+# Só UNAVAILABLE é repetido: a chamada nem chegou a ser processada.
+CODIGOS_RETRY = frozenset({grpc.StatusCode.UNAVAILABLE})
+
+
+class ChamadaRecusadaError(grpc.RpcError):
+    """
+    A chamada nem foi feita: circuito aberto ou prazo já esgotado.
+    Tem code()/details() como um grpc.RpcError, então quem já trata erros
+    de comunicação não precisa de um caso a mais.
+    """
+
+    def __init__(self, code, details):
+        super().__init__(details)
+        self._code = code
+        self._details = details
+
+    def code(self):
+        return self._code
+
+    def details(self):
+        return self._details
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker com os estados fechado, aberto e meio-aberto.
+
+    Depois de `failure_threshold` falhas seguidas o circuito abre e as chamadas
+    são recusadas por `reset_timeout` segundos. Em seguida uma única chamada de
+    teste passa (meio-aberto): sucesso fecha o circuito, falha o reabre.
+    """
+
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+    MEIO_ABERTO = "meio_aberto"
+
+    def __init__(self, failure_threshold=5, reset_timeout=10.0):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._estado = self.FECHADO
+        self._falhas = 0
+        self._aberto_ate = 0.0
+        self._teste_em_andamento = False
+        self._teste_ate = 0.0
+
+        self._aberturas = 0
+        self._recusadas = 0
+
+    def permitir(self):
+        """True se a chamada pode ser feita agora."""
+        with self._lock:
+            if self._estado == self.ABERTO:
+                if time.monotonic() < self._aberto_ate:
+                    self._recusadas += 1
+                    return False
+                self._estado = self.MEIO_ABERTO
+                self._teste_em_andamento = False
+            if self._estado == self.MEIO_ABERTO:
+                # um teste que não terminou (ex.: chamada cancelada) libera outro após reset_timeout
+                if self._teste_em_andamento and time.monotonic() < self._teste_ate:
+                    self._recusadas += 1
+                    return False
+                self._teste_em_andamento = True
+                self._teste_ate = time.monotonic() + self._reset_timeout
+            return True
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self._estado = self.FECHADO
+            self._falhas = 0
+            self._teste_em_andamento = False
+
+    def registrar_falha(self):
+        with self._lock:
+            self._falhas += 1
+            if self._estado == self.MEIO_ABERTO or self._falhas >= self._failure_threshold:
+                if self._estado != self.ABERTO:
+                    self._aberturas += 1
+                self._estado = self.ABERTO
+                self._aberto_ate = time.monotonic() + self._reset_timeout
+                self._teste_em_andamento = False
+
+    def estado(self):
+        with self._lock:
+            return self._estado
+
+    def stats(self):
+        with self._lock:
+            return {
+                "estado": self._estado,
+                "falhas_seguidas": self._falhas,
+                "aberturas": self._aberturas,
+                "recusadas": self._recusadas,
+            }
+
+
+class ChamadaResiliente:
+    """
+    Executa chamadas gRPC com prazo, retry com backoff exponencial e jitter
+    (só para CODIGOS_RETRY) e um CircuitBreaker.
+
+    `func(timeout)` faz a chamada com o timeout recebido; `deadline` é o
+    instante (time.monotonic) até o qual todas as tentativas precisam terminar.
+    """
+
+    def __init__(self, breaker, max_tentativas=3, backoff_base=0.05, backoff_max=1.0):
+        self.breaker = breaker
+        self._max_tentativas = max_tentativas
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self._retries = 0
+
+    def _timeout(self, deadline):
+        """Timeout da próxima tentativa; levanta ChamadaRecusadaError se ela não pode ser feita."""
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            raise ChamadaRecusadaError(grpc.StatusCode.DEADLINE_EXCEEDED, "prazo esgotado antes da chamada")
+        if not self.breaker.permitir():
+            raise ChamadaRecusadaError(grpc.StatusCode.UNAVAILABLE, "circuit breaker aberto")
+        return timeout
+
+    def _espera_apos_erro(self, erro, tentativa, deadline):
+        """Registra o resultado no breaker e devolve quanto esperar antes de repetir, ou None para desistir."""
+        if erro.code() not in CODIGOS_FALHA:
+            self.breaker.registrar_sucesso()
+            return None
+        self.breaker.registrar_falha()
+        if erro.code() not in CODIGOS_RETRY or tentativa + 1 >= self._max_tentativas:
+            return None
+        # full jitter: espera aleatória entre 0 e o teto exponencial
+        espera = random.uniform(0, min(self._backoff_max, self._backoff_base * 2 ** tentativa))
+        if time.monotonic() + espera >= deadline:
+            return None
+        with self._lock:
+            self._retries += 1
+        return espera
+
+    def executar(self, func, deadline):
+        tentativa = 0
+        ultimo_erro = None
+        while True:
+            try:
+                timeout = self._timeout(deadline)
+            except ChamadaRecusadaError:
+                # numa nova tentativa recusada, o erro que interessa é o da anterior
+                if ultimo_erro is not None:
+                    raise ultimo_erro
+                raise
+            try:
+                resultado = func(timeout)
+            except grpc.RpcError as e:
+                espera = self._espera_apos_erro(e, tentativa, deadline)
+                if espera is None:
+                    raise
+                time.sleep(espera)
+                tentativa += 1
+                ultimo_erro = e
+                continue
+            self.breaker.registrar_sucesso()
+            return resultado
+
+    async def executar_async(self, func, deadline):
+        """Como `executar`, para `func(timeout)` que devolve um awaitable."""
+        tentativa = 0
+        ultimo_erro = None
+        while True:
+            try:
+                timeout = self._timeout(deadline)
+            except ChamadaRecusadaError:
+                # numa nova tentativa recusada, o erro que interessa é o da anterior
+                if ultimo_erro is not None:
+                    raise ultimo_erro
+                raise
+            try:
+                resultado = await func(timeout)
+            except grpc.RpcError as e:
+                espera = self._espera_apos_erro(e, tentativa, deadline)
+                if espera is None:
+                    raise
+                await asyncio.sleep(espera)
+                tentativa += 1
+                ultimo_erro = e
+                continue
+            self.breaker.registrar_sucesso()
+            return resultado
+
+    def stats(self):
+        stats = self.breaker.stats()
+        with self._lock:
+            stats["retries"] = self._retries
+        return stats
@@ -1,164 +1,1125 @@
 import grpc
+import sys
 import time
 import os
+import signal
+import threading
 import psycopg2
+from psycopg2.extras import execute_values
 from concurrent import futures
-from dotenv import load_dotenv
+from grpc_health.v1 import health, health_pb2, health_pb2_grpc
 
 import manutencoes_pb2
 import manutencoes_pb2_grpc
 
 import veiculos_pb2
 import veiculos_pb2_grpc
+import comum
+from comum import (
+    DB_HOST, DB_NAME, DB_USER, DB_PASSWORD, GRPC_MAX_WORKERS, STATS_INTERVAL_SECONDS, GRPC_PORT,
+    MAX_CHAVE_IDEMPOTENCIA, TENTATIVAS_CHAVE_IDEMPOTENCIA, IDEMPOTENCIA_CACHE_MAX_SIZE, IDEMPOTENCIA_CACHE_TTL_SECONDS,
+    VEICULOS_SERVICE_HOST, VEICULOS_MAX_TENTATIVAS, VEICULOS_BACKOFF_BASE_MS, VEICULOS_BACKOFF_MAX_MS,
+    VEICULOS_BREAKER_FALHAS, VEICULOS_BREAKER_RESET_SECONDS, STREAM_BATCH_SIZE, COLUNAS_FILTRO,
+    SERVER_PROCESSES, SERVER_PROCESS_INDEX, METRICS_ENABLED, TRACE_ENABLED, LOG_RPC_LENTO_MS,
+    HEALTH_INTERVAL_SECONDS, HEALTH_TIMEOUT_SECONDS, HEALTH_VEICULOS_OBRIGATORIO, SERVICO_SAUDE, SERVICO_VEICULOS,
+    SHUTDOWN_DELAY_SECONDS, SHUTDOWN_GRACE_SECONDS, log, log_db, log_veiculos, ChaveIdempotenciaError,
+    to_manutencao, prazo_veiculos, where_filtro, ler_filtro, validar_pagina, montar_pagina, montar_resumo,
+    validar_chave, argumentos_canal_veiculos, configurar_logs, configurar_rastreamento, argumentos_servidor, porta_metricas
+)
+from cache import TTLCache
+from db_pool import ConnectionPool
+from group_commit import GroupCommitWriter
+from resiliencia import CircuitBreaker, ChamadaResiliente
+from replica import ReplicaVeiculos
+from metricas import (
+    InterceptorMetricas, InterceptorClienteMetricas, iniciar_servidor_metricas, medir_consulta
+)
+import rastreamento
+from rastreamento import CursorRastreado, InterceptorRastreamento, InterceptorClienteRastreamento
+import logs
+from logs import InterceptorLogs
+from saude import MonitorSaude
+import configuracao
+import prefork
 
+DB_CONNECT_KWARGS = dict(
+    host=DB_HOST,
+    database=DB_NAME,
+    user=DB_USER,
+    password=DB_PASSWORD,
+    # sem rastreamento configurado o cursor só repassa as chamadas
+    cursor_factory=CursorRastreado
+)
 
-DB_HOST = os.getenv("MANUTENCOES_DBHOST", "db_manutencoes")
-DB_NAME = os.getenv("MANUTENCOES_DB_NAME", "manutencoes_db")
-DB_USER = os.getenv("MANUTENCOES_DB_USER", "admin")
-DB_PASSWORD = os.getenv("MANUTENCOES_DB_PASSWORD", "admin")
+# Por padrão uma conexão do pool por worker do gRPC, como no MS Veiculos.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(GRPC_MAX_WORKERS)))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_HEALTH_CHECK_INTERVAL", "30"))
+
+# Consultas quentes, preparadas uma vez em cada conexão do pool (inclusive nas
+# recriadas após uma queda) e executadas pelo nome, sem novo parse/plano a cada chamada.
+PREPARED_STATEMENTS = {
+    # com uma chave de idempotência já usada não insere nada (e não devolve linha)
+    "inserir_manutencao": """
+        INSERT INTO manutencoes (id_veiculo, placa_veiculo, descricao, chave_idempotencia)
+        VALUES ($1, $2, $3, $4)
+        ON CONFLICT (chave_idempotencia, arquivada) WHERE chave_idempotencia IS NOT NULL DO NOTHING
+        RETURNING id, id_veiculo, placa_veiculo, descricao, status
+    """,
+    "manutencao_por_id": "SELECT id, id_veiculo, placa_veiculo, descricao, status FROM manutencoes WHERE id = $1",
+    # arquivadas ficam de fora: o arquivamento libera a chave de idempotência delas
+    "manutencoes_nao_arquivadas_por_ids": """
+        SELECT id, id_veiculo, placa_veiculo, descricao, status
+        FROM manutencoes WHERE id = ANY($1::integer[]) AND NOT arquivada
+    """,
+    "manutencoes_por_chaves": """
+        SELECT id, id_veiculo, placa_veiculo, descricao, status, chave_idempotencia
+        FROM manutencoes WHERE chave_idempotencia = ANY($1::varchar[])
+    """,
+    "resumo_manutencoes": """
+        SELECT id_veiculo, placa_veiculo, status, total FROM manutencoes_resumo
+        WHERE total > 0 ORDER BY id_veiculo, placa_veiculo, status
+    """,
+}
+
+# Resumo de ResumirManutencoes: uma linha por (id_veiculo, placa_veiculo, status) com o
+# total de manutenções, mantida pelos triggers de `manutencoes`. Os triggers são por
+# comando e usam as tabelas de transição, então um INSERT de várias linhas (lotes, group
+# commit) atualiza cada grupo uma vez só. Os grupos são atualizados em ordem para que
+# comandos concorrentes não entrem em deadlock. Grupos que chegam a zero ficam na
+# tabela (são poucos: veículos x status) e são ignorados na leitura.
+RESUMO_SETUP_SQL = """
+CREATE OR REPLACE FUNCTION atualizar_resumo_manutencoes() RETURNS trigger AS $$
+BEGIN
+    -- cada comando só enxerga as tabelas de transição do seu evento
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM manutencoes_resumo;
+    ELSIF TG_OP = 'INSERT' THEN
+        INSERT INTO manutencoes_resumo AS r (id_veiculo, placa_veiculo, status, total)
+        SELECT id_veiculo, placa_veiculo, COALESCE(status, ''), count(*)
+        FROM novas GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (id_veiculo, placa_veiculo, status) DO UPDATE SET total = r.total + EXCLUDED.total;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO manutencoes_resumo AS r (id_veiculo, placa_veiculo, status, total)
+        SELECT id_veiculo, placa_veiculo, COALESCE(status, ''), -count(*)
+        FROM antigas GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT (id_veiculo, placa_veiculo, status) DO UPDATE SET total = r.total + EXCLUDED.total;
+    ELSE
+        INSERT INTO manutencoes_resumo AS r (id_veiculo, placa_veiculo, status, total)
+        SELECT id_veiculo, placa_veiculo, status, sum(delta)
+        FROM (
+            SELECT id_veiculo, placa_veiculo, COALESCE(status, '') AS status, 1 AS delta FROM novas
+            UNION ALL
+            SELECT id_veiculo, placa_veiculo, COALESCE(status, '') AS status, -1 AS delta FROM antigas
+        ) AS d
+        GROUP BY 1, 2, 3 HAVING sum(delta) <> 0 ORDER BY 1, 2, 3
+        ON CONFLICT (id_veiculo, placa_veiculo, status) DO UPDATE SET total = r.total + EXCLUDED.total;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS manutencoes_resumo_insert ON manutencoes;
+DROP TRIGGER IF EXISTS manutencoes_resumo_update ON manutencoes;
+DROP TRIGGER IF EXISTS manutencoes_resumo_delete ON manutencoes;
+DROP TRIGGER IF EXISTS manutencoes_resumo_truncate ON manutencoes;
+CREATE TRIGGER manutencoes_resumo_insert AFTER INSERT ON manutencoes
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_manutencoes();
+CREATE TRIGGER manutencoes_resumo_update AFTER UPDATE ON manutencoes
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_manutencoes();
+CREATE TRIGGER manutencoes_resumo_delete AFTER DELETE ON manutencoes
+    REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_manutencoes();
+CREATE TRIGGER manutencoes_resumo_truncate AFTER TRUNCATE ON manutencoes
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_manutencoes();
+"""
+
+# Cache local placa -> id_veiculo, para não consultar o MS Veiculos a cada manutenção.
+# Com VEICULOS_CACHE_STALE_SECONDS > 0 uma entrada vencida ainda é usada por esse
+# tempo enquanto é revalidada em segundo plano (stale-while-revalidate).
+VEICULOS_CACHE_ENABLED = os.getenv("VEICULOS_CACHE_ENABLED", "1") == "1"
+VEICULOS_CACHE_MAX_SIZE = int(os.getenv("VEICULOS_CACHE_MAX_SIZE", "10000"))
+VEICULOS_CACHE_TTL_SECONDS = float(os.getenv("VEICULOS_CACHE_TTL_SECONDS", "300"))
+VEICULOS_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("VEICULOS_CACHE_NEGATIVE_TTL_SECONDS", "5"))
+VEICULOS_CACHE_STALE_SECONDS = float(os.getenv("VEICULOS_CACHE_STALE_SECONDS", "0"))
+
+# Tamanho dos lotes de CriarManutencoes: uma chamada BuscarPorPlacas e um INSERT
+# por lote. Não pode passar do MAX_BATCH_PLACAS do MS Veiculos.
+CREATE_BATCH_SIZE = int(os.getenv("CREATE_BATCH_SIZE", "500"))
+
+# Group commit opcional: as CriarManutencao concorrentes são enfileiradas e gravadas
+# juntas num único INSERT/commit a cada WRITE_BATCH_MAX_DELAY_MS ou WRITE_BATCH_MAX_ROWS linhas.
+WRITE_BATCHING_ENABLED = os.getenv("WRITE_BATCHING_ENABLED", "0") == "1"
+WRITE_BATCH_MAX_ROWS = int(os.getenv("WRITE_BATCH_MAX_ROWS", "100"))
+WRITE_BATCH_MAX_DELAY_MS = float(os.getenv("WRITE_BATCH_MAX_DELAY_MS", "5"))
+
+# Réplica local placa -> id_veiculo alimentada pelo WatchVeiculos: com ela a maioria das
+# placas é resolvida sem chamar o MS Veiculos. Uma placa que a réplica não conhece ainda
+# passa pelo cache e pela chamada remota (o veículo pode ser mais novo que a réplica).
+VEICULOS_REPLICA_ENABLED = os.getenv("VEICULOS_REPLICA_ENABLED", "1") == "1"
+VEICULOS_REPLICA_RETRY_SECONDS = float(os.getenv("VEICULOS_REPLICA_RETRY_SECONDS", "2"))
+
+# `manutencoes` é particionada em quente (arquivada = false) e arquivo. Uma thread move
+# para o arquivo, em lotes, as manutenções com status em ARQUIVAMENTO_STATUS criadas há
+# mais de ARQUIVAMENTO_IDADE_DIAS. A chave de idempotência é apagada no arquivamento:
+# ela só protege repetições enquanto a manutenção está na partição quente.
+ARQUIVAMENTO_ENABLED = os.getenv("ARQUIVAMENTO_ENABLED", "1") == "1"
+ARQUIVAMENTO_STATUS = [s.strip() for s in os.getenv("ARQUIVAMENTO_STATUS", "CONCLUIDA,CANCELADA").split(",") if s.strip()]
+ARQUIVAMENTO_IDADE_DIAS = float(os.getenv("ARQUIVAMENTO_IDADE_DIAS", "30"))
+ARQUIVAMENTO_INTERVALO_SECONDS = float(os.getenv("ARQUIVAMENTO_INTERVALO_SECONDS", "300"))
+ARQUIVAMENTO_LOTE = int(os.getenv("ARQUIVAMENTO_LOTE", "1000"))
+
+# Itens aceitos num AtualizarStatus: todos vão num único UPDATE.
+MAX_ATUALIZACOES_STATUS = int(os.getenv("MAX_ATUALIZACOES_STATUS", "5000"))
+MAX_STATUS = 50
+MAX_ID = 2 ** 31 - 1  # id é INTEGER
+
+# "threads" (padrão) usa grpc.server + psycopg2; "asyncio" usa grpc.aio + asyncpg (ver aio_server.py).
+SERVER_MODE = os.getenv("SERVER_MODE", "threads")
+
+def _preparar_conexao(conn):
+    with conn.cursor() as cursor:
+        for nome, query in PREPARED_STATEMENTS.items():
+            cursor.execute(f"PREPARE {nome} AS {query};")
 
-VEICULOS_SERVICE_HOST = os.getenv("VEICULOS_HOST", "micro_veiculos:500051")
 
 class ManutencoesDB:
-    def __init__(self):
-        self._connect()
+    def __init__(self, pool_size=DB_POOL_SIZE):
+        self._pool = None
+        self._connect(pool_size)
     
-    def _connect(self, max_retries=5):
+    def _connect(self, pool_size, max_retries=5):
         """Tenta conectar ao PostgreSQL com retry."""
         for i in range(max_retries):
             try:
-                print(f"Tentando conectar ao PostgreSQL de Manutenções em: {DB_HOST} ({i+1}/{max_retries})...")
-                self._conn = psycopg2.connect(
-                    host=DB_HOST,
-                    database=DB_NAME,
-                    user=DB_USER,
-                    password=DB_PASSWORD
-                )
-                self._conn.autocommit = True
-                self._cursor = self._conn.cursor()
-                print("Conexão com o PostgreSQL de Manutenções estabelecida com sucesso!")
+                log_db.info(f"Tentando conectar ao PostgreSQL de Manutenções em: {DB_HOST} ({i+1}/{max_retries})...")
+                # o schema precisa existir antes de o pool preparar as consultas
                 self._setup_db()
+                self._pool = ConnectionPool(
+                    DB_CONNECT_KWARGS,
+                    max_size=pool_size,
+                    timeout=DB_POOL_TIMEOUT,
+                    health_check_interval=DB_HEALTH_CHECK_INTERVAL,
+                    on_connect=_preparar_conexao
+                )
+                log_db.info(f"Pool de conexões com o PostgreSQL de Manutenções criado ({pool_size} conexões no máximo).")
                 return
             except psycopg2.OperationalError as e:
-                print(f"Erro de conexão: {e}. Aguardando 5 segundos para tentar novamente.")
+                log_db.warning(f"Erro de conexão: {e}. Aguardando 5 segundos para tentar novamente.")
                 # CORREÇÃO 2: Usar time.sleep, não self.sleep
                 time.sleep(5) 
         # O loop falhou após todas as tentativas
         raise Exception("Falha ao conectar ao PostgreSQL após várias tentativas.")
     
     def _setup_db(self):
-        """cria a tabels de manutenções se ela não existir."""
+        """
+        Cria (ou migra) a tabela particionada de manutenções, os índices e o resumo.
+        Tudo numa transação, serializada entre instâncias por um advisory lock.
+        """
+        conn = psycopg2.connect(**DB_CONNECT_KWARGS)
+        try:
+            with conn, conn.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext('manutencoes_setup'));")
+                cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('manutencoes');")
+                row = cursor.fetchone()
+                legado = row is not None and row[0] == "r"
+                if legado:
+                    # tabela de antes do particionamento: é recriada particionada, com os mesmos ids
+                    cursor.execute(
+                        f"ALTER TABLE manutencoes ADD COLUMN IF NOT EXISTS "
+                        f"chave_idempotencia VARCHAR({MAX_CHAVE_IDEMPOTENCIA});"
+                    )
+                    cursor.execute("ALTER TABLE manutencoes RENAME TO manutencoes_legado;")
+
+                cursor.execute("CREATE SEQUENCE IF NOT EXISTS manutencoes_id_seq;")
+                # toda chave única de uma tabela particionada inclui a coluna da partição
+                cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS manutencoes(
+                        id INTEGER NOT NULL DEFAULT nextval('manutencoes_id_seq'),
+                        id_veiculo VARCHAR(100) NOT NULL,
+                        placa_veiculo VARCHAR(10) NOT NULL,
+                        descricao VARCHAR(255) NOT NULL,
+                        status VARCHAR(50) DEFAULT 'PENDENTE',
+                        chave_idempotencia VARCHAR({MAX_CHAVE_IDEMPOTENCIA}),
+                        criado_em TIMESTAMPTZ NOT NULL DEFAULT now(),
+                        arquivada BOOLEAN NOT NULL DEFAULT false,
+                        PRIMARY KEY (id, arquivada)
+                    ) PARTITION BY LIST (arquivada);
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS manutencoes_quente
+                    PARTITION OF manutencoes FOR VALUES IN (false);
+                """)
+                # o arquivo não é subdividido por data: a chave de idempotência precisaria
+                # incluir a data e deixaria de ser única
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS manutencoes_arquivo
+                    PARTITION OF manutencoes FOR VALUES IN (true);
+                """)
+                # na migração a sequência era da tabela antiga e seria apagada junto com ela
+                cursor.execute("ALTER SEQUENCE manutencoes_id_seq OWNED BY manutencoes.id;")
+                if legado:
+                    # a data de criação das linhas antigas não é conhecida: ficam com a da migração
+                    cursor.execute("""
+                        INSERT INTO manutencoes (id, id_veiculo, placa_veiculo, descricao, status, chave_idempotencia)
+                        SELECT id, id_veiculo, placa_veiculo, descricao, status, chave_idempotencia
+                        FROM manutencoes_legado;
+                    """)
+                    cursor.execute("DROP TABLE manutencoes_legado;")
+                    log_db.info("Tabela 'manutencoes' migrada para a versão particionada.")
+
+                cursor.execute("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_manutencoes_chave_idempotencia
+                    ON manutencoes (chave_idempotencia, arquivada) WHERE chave_idempotencia IS NOT NULL;
+                """)
+                # (coluna, id): atende o filtro por igualdade já na ordem da paginação por id
+                for coluna in COLUNAS_FILTRO:
+                    cursor.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_manutencoes_{coluna} ON manutencoes ({coluna}, id);"
+                    )
+                self._setup_resumo(cursor)
+        finally:
+            conn.close()
+        log_db.info("Tabela 'manutencoes' e índices verificados/criados.")
+
+    def _setup_resumo(self, cursor):
+        """
+        Cria a tabela de resumo e os triggers que a mantêm. Na primeira vez
+        a tabela é preenchida a partir das manutenções existentes; o lock
+        impede que alguma seja gravada entre essa contagem e os triggers.
+        """
+        cursor.execute("LOCK TABLE manutencoes IN SHARE ROW EXCLUSIVE MODE;")
+        cursor.execute("SELECT to_regclass('manutencoes_resumo') IS NULL;")
+        criar = cursor.fetchone()[0]
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS manutencoes_resumo(
+                id_veiculo VARCHAR(100) NOT NULL,
+                placa_veiculo VARCHAR(10) NOT NULL,
+                status VARCHAR(50) NOT NULL,
+                total BIGINT NOT NULL,
+                PRIMARY KEY (id_veiculo, placa_veiculo, status)
+            );
+        """)
+        cursor.execute(RESUMO_SETUP_SQL)
+        if criar:
+            cursor.execute("""
+                INSERT INTO manutencoes_resumo (id_veiculo, placa_veiculo, status, total)
+                SELECT id_veiculo, placa_veiculo, COALESCE(status, ''), count(*)
+                FROM manutencoes GROUP BY 1, 2, 3;
+            """)
 
-        create_table_query = """
-        CREATE TABLE IF NOT EXISTS manutencoes(
-            id SERIAL PRIMARY KEY,
-            id_veiculo VARCHAR(100) NOT NULL,
-            placa_veiculo VARCHAR(10) NOT NULL,
-            descricao VARCHAR(255) NOT NULL,
-            status VARCHAR(50) DEFAULT 'PENDENTE'
-        );
+    @medir_consulta
+    def create_manutencao(self, id_veiculo, placa_veiculo, descricao, chave_idempotencia=None):
+        """
+        Insere uma manutenção. Se `chave_idempotencia` já foi usada devolve a
+        manutenção criada com ela, sem inserir outra.
         """
-        self._cursor.execute(create_table_query)
-        # self._conn.commit()
-        print(f"Tabela 'manutencoes' verificada/criada.")
+        # sem retry: repetir um INSERT após uma queda poderia duplicar a manutenção
+        with self._pool.cursor() as cursor:
+            for _ in range(TENTATIVAS_CHAVE_IDEMPOTENCIA):
+                cursor.execute(
+                    "EXECUTE inserir_manutencao (%s, %s, %s, %s);",
+                    (id_veiculo, placa_veiculo, descricao, chave_idempotencia)
+                )
+                row = cursor.fetchone()
+                if row is not None:
+                    return row
+                cursor.execute("EXECUTE manutencoes_por_chaves (%s);", ([chave_idempotencia],))
+                row = cursor.fetchone()
+                if row is not None:
+                    return row[:5]
+        raise ChaveIdempotenciaError(f"Manutenção da chave_idempotencia {chave_idempotencia!r} não encontrada.")
 
-        pass
+    @medir_consulta
+    def create_manutencoes(self, manutencoes):
+        """
+        Insere um lote de tuplas (id_veiculo, placa_veiculo, descricao, chave_idempotencia)
+        com um único INSERT de várias linhas e devolve as linhas na mesma ordem.
+        Itens com chave já usada (no banco ou antes no próprio lote) recebem a
+        manutenção existente.
+        """
+        valores = [(ordem, *manutencao) for ordem, manutencao in enumerate(manutencoes)]
+        por_chave = {}
+        sem_chave = []
+        # sem retry, como em create_manutencao; só os itens de chaves arquivadas no meio voltam
+        with self._pool.cursor() as cursor:
+            for _ in range(TENTATIVAS_CHAVE_IDEMPOTENCIA):
+                rows = execute_values(
+                    cursor,
+                    """
+                    INSERT INTO manutencoes (id_veiculo, placa_veiculo, descricao, chave_idempotencia)
+                    SELECT id_veiculo, placa_veiculo, descricao, chave_idempotencia
+                    FROM (VALUES %s) AS v(ordem, id_veiculo, placa_veiculo, descricao, chave_idempotencia)
+                    ORDER BY ordem
+                    ON CONFLICT (chave_idempotencia, arquivada) WHERE chave_idempotencia IS NOT NULL DO NOTHING
+                    RETURNING id, id_veiculo, placa_veiculo, descricao, status, chave_idempotencia;
+                    """,
+                    valores,
+                    page_size=len(valores),
+                    fetch=True
+                )
 
-    def create_manutencao(self, id_veiculo, placa_veiculo, descricao):
-        insert_query = """
+                # os ids do SERIAL saem crescentes na ordem do SELECT; as linhas com
+                # chave são casadas pela chave, porque as repetidas não voltam
+                for row in sorted(rows, key=lambda row: row[0]):
+                    if row[5] is None:
+                        sem_chave.append(row[:5])
+                    else:
+                        por_chave[row[5]] = row[:5]
+                repetidas = {v[4] for v in valores if v[4] is not None and v[4] not in por_chave}
+                if not repetidas:
+                    break
+                cursor.execute("EXECUTE manutencoes_por_chaves (%s);", (list(repetidas),))
+                for row in cursor.fetchall():
+                    por_chave[row[5]] = row[:5]
+                valores = [v for v in valores if v[4] is not None and v[4] not in por_chave]
+                if not valores:
+                    break
+            else:
+                raise ChaveIdempotenciaError(
+                    f"Manutenções das chaves_idempotencia {sorted(repetidas)} não encontradas."
+                )
 
-        INSERT INTO manutencoes (id_veiculo, placa_veiculo, descricao)
-        VALUES (%s, %s, %s) RETURNING id, id_veiculo, placa_veiculo, descricao, status;
+        sem_chave = iter(sem_chave)
+        return [por_chave[chave] if chave is not None else next(sem_chave) for *_, chave in manutencoes]
 
+    @medir_consulta
+    def update_status(self, atualizacoes):
+        """
+        Aplica tuplas (id, status, status_esperado ou None) num único UPDATE e devolve,
+        na mesma ordem, (atualizada, linha): a linha é a nova quando atualizada e a
+        atual quando o status esperado não confere; None se o id não existir.
+        Os ids não podem se repetir.
         """
+        valores = [(ordem, *atualizacao) for ordem, atualizacao in enumerate(atualizacoes)]
+        with self._pool.cursor() as cursor:
+            rows = execute_values(
+                cursor,
+                """
+                WITH pedidos(ordem, id, status, status_esperado) AS (VALUES %s),
+                -- trava as linhas em ordem de id (lotes concorrentes não entram em deadlock);
+                -- com o lock o SELECT devolve a versão mais recente de cada uma
+                atuais AS (
+                    SELECT m.id, m.id_veiculo, m.placa_veiculo, m.descricao, m.status
+                    FROM manutencoes m JOIN pedidos p ON p.id = m.id
+                    ORDER BY m.id FOR UPDATE OF m
+                ),
+                atualizadas AS (
+                    UPDATE manutencoes m SET status = p.status
+                    FROM pedidos p
+                    WHERE m.id = p.id AND m.id IN (SELECT id FROM atuais)
+                      AND (p.status_esperado IS NULL OR m.status IS NOT DISTINCT FROM p.status_esperado)
+                    RETURNING m.id, m.id_veiculo, m.placa_veiculo, m.descricao, m.status
+                )
+                -- as não atualizadas voltam como estão agora, para o cliente ver o status real
+                SELECT p.ordem, a.id IS NOT NULL,
+                       COALESCE(a.id, t.id), COALESCE(a.id_veiculo, t.id_veiculo),
+                       COALESCE(a.placa_veiculo, t.placa_veiculo), COALESCE(a.descricao, t.descricao),
+                       CASE WHEN a.id IS NOT NULL THEN a.status ELSE t.status END
+                FROM pedidos p
+                LEFT JOIN atualizadas a ON a.id = p.id
+                LEFT JOIN atuais t ON t.id = p.id
+                ORDER BY p.ordem;
+                """,
+                valores,
+                template="(%s, %s::integer, %s::varchar, %s::varchar)",
+                page_size=len(valores),
+                fetch=True
+            )
+        return [(atualizada, tuple(row) if row[0] is not None else None) for _, atualizada, *row in rows]
 
-        self._cursor.execute(insert_query, (id_veiculo, placa_veiculo, descricao))
-        # self._connect.commit()
-        result = self._cursor.fetchone()
-        return result
-    
+    @medir_consulta
+    def get_manutencoes_by_chaves(self, chaves):
+        """{chave_idempotencia: linha} das chaves já usadas."""
+        def execute(cursor):
+            cursor.execute("EXECUTE manutencoes_por_chaves (%s);", (list(chaves),))
+            return {row[5]: row[:5] for row in cursor.fetchall()}
+        return self._pool.run(execute)
+
+    @medir_consulta
+    def get_manutencoes_nao_arquivadas(self, ids):
+        """{id: linha} das manutenções de `ids` que não foram arquivadas."""
+        def execute(cursor):
+            cursor.execute("EXECUTE manutencoes_nao_arquivadas_por_ids (%s);", (list(ids),))
+            return {row[0]: row for row in cursor.fetchall()}
+        return self._pool.run(execute)
+
+    @medir_consulta
     def list_all_manutencoes(self):
         query = "SELECT id, id_veiculo, placa_veiculo, descricao, status FROM manutencoes;"
-        self._cursor.execute(query)
-        results = self._cursor.fetchall()
-        return results
+
+        def execute(cursor):
+            cursor.execute(query)
+            return cursor.fetchall()
+        return self._pool.run(execute)
     
+    @medir_consulta
+    def arquivar_lote(self, status, idade_dias, limite):
+        """
+        Move para a partição de arquivo até `limite` manutenções com status em `status`
+        criadas há mais de `idade_dias` dias. Devolve quantas foram movidas; 0 também
+        quando outra instância está arquivando.
+        """
+        with self._pool.connection() as conn:
+            conn.autocommit = False
+            with conn, conn.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_xact_lock(hashtext('manutencoes_arquivamento'));")
+                if not cursor.fetchone()[0]:
+                    return 0
+                # pela tabela pai, para os triggers do resumo verem a mudança; a linha muda de partição
+                cursor.execute(
+                    """
+                    UPDATE manutencoes SET arquivada = true, chave_idempotencia = NULL
+                    WHERE NOT arquivada AND id IN (
+                        SELECT id FROM manutencoes
+                        WHERE NOT arquivada AND status = ANY(%s)
+                          AND criado_em < now() - make_interval(secs => %s)
+                        ORDER BY id LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    );
+                    """,
+                    (list(status), idade_dias * 86400, limite)
+                )
+                return cursor.rowcount
+
+    @medir_consulta
+    def get_resumo(self):
+        """Linhas (id_veiculo, placa_veiculo, status, total) da tabela de resumo, sem os grupos zerados."""
+        def execute(cursor):
+            cursor.execute("EXECUTE resumo_manutencoes;")
+            return cursor.fetchall()
+        return self._pool.run(execute)
+
+    @medir_consulta
+    def fetch_page(self, filtro, after_id, limit):
+        """
+        Busca até `limit` manutenções que atendem ao `filtro` ({coluna: valor})
+        com id maior que `after_id` (paginação por keyset).
+        """
+        where, params = where_filtro(filtro, after_id)
+
+        def execute(cursor):
+            cursor.execute(
+                f"SELECT id, id_veiculo, placa_veiculo, descricao, status FROM manutencoes "
+                f"WHERE {where} ORDER BY id LIMIT %s;",
+                params + [limit]
+            )
+            return cursor.fetchall()
+        return self._pool.run(execute)
+
+    @medir_consulta
+    def iter_filtrado(self, filtro, batch_size=STREAM_BATCH_SIZE):
+        """
+        Percorre as manutenções que atendem ao `filtro` em lotes de `batch_size`
+        linhas, com um cursor nomeado (só um lote em memória por vez).
+        """
+        where, params = where_filtro(filtro, 0)
+        with self._pool.connection() as conn:
+            # cursores nomeados só existem dentro de uma transação
+            conn.autocommit = False
+            with conn.cursor(name="stream_manutencoes") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(
+                    f"SELECT id, id_veiculo, placa_veiculo, descricao, status FROM manutencoes "
+                    f"WHERE {where} ORDER BY id;",
+                    params
+                )
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+
+    @medir_consulta
     def get_manutencao_by_id(self, manutencao_id):
         """Busca uma manutenção pelo ID."""
-        query = "SELECT id, id_veiculo, placa_veiculo, descricao, status FROM manutencoes WHERE id = %s;"
-        
-        self._cursor.execute(query, (str(manutencao_id)))
-        result = self._cursor.fetchone()
+        def execute(cursor):
+            cursor.execute("EXECUTE manutencao_por_id (%s);", (manutencao_id,))
+            return cursor.fetchone()
+        return self._pool.run(execute)
+
+    def stats(self):
+        """Métricas do pool de conexões."""
+        return self._pool.stats()
+
+    @medir_consulta
+    def verificar(self):
+        """SELECT 1 por uma conexão do pool, para o health check."""
+        with self._pool.cursor() as cursor:
+            cursor.execute("SELECT 1;")
+            return cursor.fetchone() == (1,)
 
-        return result
+    def close(self):
+        self._pool.closeall()
         
     
 
+def _validar_pedido(request):
+    """Mensagem de erro para um pedido que o banco recusaria, ou None se ele for válido."""
+    if not request.placa_veiculo:
+        return "placa_veiculo é obrigatória"
+    if len(request.placa_veiculo) > 10:
+        return f"placa {request.placa_veiculo!r} tem mais de 10 caracteres"
+    if not request.descricao:
+        return "descricao é obrigatória"
+    if len(request.descricao) > 255:
+        return "descricao tem mais de 255 caracteres"
+    return validar_chave(request)
+
+
+def _validar_atualizacao(atualizacao):
+    """(id, status, status_esperado) do item, ou a mensagem de erro (str) se ele for inválido."""
+    try:
+        m_id = int(atualizacao.id)
+    except ValueError:
+        return f"id {atualizacao.id!r} inválido"
+    if not 0 < m_id <= MAX_ID:
+        return f"id {m_id} fora do intervalo"
+    if not atualizacao.status:
+        return "status é obrigatório"
+    if len(atualizacao.status) > MAX_STATUS or len(atualizacao.status_esperado) > MAX_STATUS:
+        return f"status tem mais de {MAX_STATUS} caracteres"
+    return m_id, atualizacao.status, atualizacao.status_esperado or None
+
+
+def _erro_atualizacao(indice, codigo, erro, row=None):
+    resultado = manutencoes_pb2.ResultadoAtualizacao(indice=indice, codigo_erro=codigo.name, erro=erro)
+    if row is not None:
+        resultado.manutencao.CopyFrom(to_manutencao(row))
+    return resultado
+
+
+def _erro_criacao(indice, codigo, erro):
+    return manutencoes_pb2.ResultadoCriacao(indice=indice, codigo_erro=codigo.name, erro=erro)
+
+
 class GestaoManutencoesServicer(manutencoes_pb2_grpc.GestaoManutencoesServicer):
-    def __init__(self):
-        self.db = ManutencoesDB()
-        self.veiculos_channel = grpc.insecure_channel(VEICULOS_SERVICE_HOST)
+    def __init__(self, db_pool_size=DB_POOL_SIZE):
+        self.db = ManutencoesDB(db_pool_size)
+        self.veiculos_channel = grpc.insecure_channel(VEICULOS_SERVICE_HOST, **argumentos_canal_veiculos())
+        interceptors = [InterceptorClienteMetricas()] if METRICS_ENABLED else []
+        if TRACE_ENABLED:
+            interceptors.append(InterceptorClienteRastreamento())
+        if interceptors:
+            self.veiculos_channel = grpc.intercept_channel(self.veiculos_channel, *interceptors)
         self.veiculos_stub = veiculos_pb2_grpc.GestaoVeiculosStub(self.veiculos_channel)
-        print(f"Cliente gRPC para Veículos inicializado em: {VEICULOS_SERVICE_HOST}")
+        self.veiculos_saude = health_pb2_grpc.HealthStub(self.veiculos_channel)
+        log.info(f"Cliente gRPC para Veículos inicializado em: {VEICULOS_SERVICE_HOST}")
+        # compartilhado pelos modos threads e asyncio: o estado do breaker é o do MS Veiculos
+        self.chamada_veiculos = ChamadaResiliente(
+            CircuitBreaker(VEICULOS_BREAKER_FALHAS, VEICULOS_BREAKER_RESET_SECONDS),
+            max_tentativas=VEICULOS_MAX_TENTATIVAS,
+            backoff_base=VEICULOS_BACKOFF_BASE_MS / 1000,
+            backoff_max=VEICULOS_BACKOFF_MAX_MS / 1000
+        )
 
-    def CriarManutencao(self, request, context):
-        placa = request.placa_veiculo
-        descricao = request.descricao
+        self.replica = None
+        if VEICULOS_REPLICA_ENABLED:
+            self.replica = ReplicaVeiculos(self.veiculos_stub, retry_delay_seconds=VEICULOS_REPLICA_RETRY_SECONDS)
+            self.replica.start()
 
+        self.cache_veiculos = None
+        self.cache_veiculos_negativo = None
+        if VEICULOS_CACHE_ENABLED:
+            self.cache_veiculos = TTLCache(
+                VEICULOS_CACHE_MAX_SIZE, VEICULOS_CACHE_TTL_SECONDS,
+                stale_ttl=VEICULOS_CACHE_STALE_SECONDS
+            )
+            self.cache_veiculos_negativo = TTLCache(VEICULOS_CACHE_MAX_SIZE, VEICULOS_CACHE_NEGATIVE_TTL_SECONDS)
+        self._revalidando = set()
+        self._revalidando_lock = threading.Lock()
+        self._revalidacao_executor = futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="revalidacao")
+
+        # chave_idempotencia -> id da manutenção criada com ela
+        self.idempotencia = TTLCache(IDEMPOTENCIA_CACHE_MAX_SIZE, IDEMPOTENCIA_CACHE_TTL_SECONDS)
+
+        self._arquivadas = 0
+        self._arquivamento_erros = 0
+        self._parando = threading.Event()
+        # MonitorSaude, criado em serve()
+        self.saude = None
+        self._arquivamento = None
+        if ARQUIVAMENTO_ENABLED and ARQUIVAMENTO_STATUS:
+            self._arquivamento = threading.Thread(target=self._arquivar_loop, name="arquivamento", daemon=True)
+            self._arquivamento.start()
+
+        self.escritor = None
+        if WRITE_BATCHING_ENABLED:
+            self.escritor = GroupCommitWriter(
+                self.db.create_manutencoes,
+                max_rows=WRITE_BATCH_MAX_ROWS,
+                max_delay=WRITE_BATCH_MAX_DELAY_MS / 1000
+            )
+
+    def _id_em_cache(self, placa):
+        """
+        Consulta a réplica e o cache local da placa. Devolve (resolvido, id_veiculo, velho):
+        com resolvido=False é preciso perguntar ao MS Veiculos; id_veiculo None
+        com resolvido=True é um NOT_FOUND guardado. velho=True pede revalidação.
+        """
+        if self.replica is not None:
+            id_veiculo = self.replica.id_por_placa(placa)
+            if id_veiculo is not None:
+                return True, id_veiculo, False
+        if self.cache_veiculos is None:
+            return False, None, False
+        id_veiculo, velho = self.cache_veiculos.get_with_staleness(placa)
+        if id_veiculo is not None:
+            return True, id_veiculo, velho
+        if self.cache_veiculos_negativo.get(placa) is not None:
+            return True, None, False
+        return False, None, False
+
+    def _geracoes_cache(self):
+        if self.cache_veiculos is None:
+            return None
+        return self.cache_veiculos.generation(), self.cache_veiculos_negativo.generation()
+
+    def _guardar_id_veiculo(self, placa, id_veiculo, geracoes):
+        """Guarda a resposta do MS Veiculos (None = NOT_FOUND) lida depois de `_geracoes_cache`."""
+        if geracoes is None:
+            return
+        generation, generation_negativo = geracoes
+        # discard, e não invalidate: mudar a geração aqui faria as outras consultas
+        # em andamento (inclusive as do mesmo lote) descartarem respostas válidas
+        if id_veiculo is None:
+            self.cache_veiculos.discard(placa)
+            self.cache_veiculos_negativo.set(placa, True, generation=generation_negativo)
+        else:
+            self.cache_veiculos_negativo.discard(placa)
+            self.cache_veiculos.set(placa, id_veiculo, generation=generation)
+
+    def _resolver_id_veiculo(self, placa, context=None):
+        """
+        Devolve o id do veículo com a placa, ou None se ele não existir.
+        Erros de comunicação com o MS Veiculos (inclusive circuito aberto) sobem como grpc.RpcError.
+        """
+        resolvido, id_veiculo, velho = self._id_em_cache(placa)
+        if velho:
+            self._revalidar(placa)
+        if resolvido:
+            return id_veiculo
+        return self._buscar_id_veiculo(placa, context)
+
+    def _buscar_id_veiculo(self, placa, context=None):
+        """Consulta o MS Veiculos e guarda a resposta (inclusive NOT_FOUND) no cache."""
+        geracoes = self._geracoes_cache()
+        request = veiculos_pb2.VeiculoPlaca(placa=placa)
         try:
-            print(f"Chamando MS Veiculos para obter ID para placa: {placa}")
-            veiculo_response = self.veiculos_stub.BuscarPorPlaca(veiculos_pb2.VeiculoPlaca(placa=placa))
+            log_veiculos.debug("Chamando MS Veiculos para obter o ID da placa", extra={"placa": placa})
+            veiculo_response = self.chamada_veiculos.executar(
+                lambda timeout: self.veiculos_stub.BuscarPorPlaca(request, timeout=timeout),
+                prazo_veiculos(context)
+            )
             id_veiculo = veiculo_response.id
-            print(f"ID do Veiculo encontrado: {id_veiculo}")
+        except grpc.RpcError as e:
+            if e.code() != grpc.StatusCode.NOT_FOUND:
+                raise
+            id_veiculo = None
+        self._guardar_id_veiculo(placa, id_veiculo, geracoes)
+        return id_veiculo
+
+    def _resolver_ids_veiculos(self, placas, context=None):
+        """
+        Versão em lote de `_resolver_id_veiculo`: devolve {placa: id_veiculo ou None}
+        consultando o MS Veiculos uma única vez (BuscarPorPlacas) para as placas fora do cache.
+        """
+        resolvidos = {}
+        faltantes = []
+        for placa in placas:
+            resolvido, id_veiculo, velho = self._id_em_cache(placa)
+            if velho:
+                self._revalidar(placa)
+            if resolvido:
+                resolvidos[placa] = id_veiculo
+            else:
+                faltantes.append(placa)
+
+        if faltantes:
+            geracoes = self._geracoes_cache()
+            log_veiculos.debug("Chamando MS Veiculos para obter IDs de placas", extra={"placas": len(faltantes)})
+            request = veiculos_pb2.VeiculoPlacas(placas=faltantes)
+            resposta = self.chamada_veiculos.executar(
+                lambda timeout: self.veiculos_stub.BuscarPorPlacas(request, timeout=timeout),
+                prazo_veiculos(context)
+            )
+            encontrados = {veiculo.placa: veiculo.id for veiculo in resposta.items}
+            for placa in faltantes:
+                resolvidos[placa] = encontrados.get(placa)
+                self._guardar_id_veiculo(placa, resolvidos[placa], geracoes)
+        return resolvidos
+
+    def _criar_lote(self, lote, context=None):
+        """Grava um lote de (indice, request) e devolve um ResultadoCriacao por pedido, na ordem do lote."""
+        resultados = {}
+        validos = []
+        for indice, request in lote:
+            erro = _validar_pedido(request)
+            if erro is not None:
+                resultados[indice] = _erro_criacao(indice, grpc.StatusCode.INVALID_ARGUMENT, erro)
+            else:
+                validos.append((indice, request))
 
+        # pedidos repetidos (chave já usada) voltam a manutenção original, sem consultar o MS Veiculos
+        chaves = {request.chave_idempotencia for _, request in validos if request.chave_idempotencia}
+        if chaves:
+            try:
+                existentes = self._manutencoes_existentes(chaves)
+            except Exception as e:
+                existentes = {}
+                for indice, request in validos:
+                    if request.chave_idempotencia:
+                        resultados[indice] = _erro_criacao(
+                            indice, grpc.StatusCode.INTERNAL, f"Erro interno ao buscar chave_idempotencia: {str(e)}"
+                        )
+                validos = [(indice, request) for indice, request in validos if not request.chave_idempotencia]
+            for indice, request in validos:
+                row = existentes.get(request.chave_idempotencia)
+                if row is not None:
+                    resultados[indice] = manutencoes_pb2.ResultadoCriacao(indice=indice, manutencao=to_manutencao(row))
+            validos = [(indice, request) for indice, request in validos if indice not in resultados]
+
+        try:
+            ids_veiculos = self._resolver_ids_veiculos({request.placa_veiculo for _, request in validos}, context)
         except grpc.RpcError as e:
-            if e.code() == grpc.StatusCode.NOT_FOUND:
-                context.set_code(grpc.StatusCode.NOT_FOUND)
-                context.set_details(f"Veículo com placa {placa} não encontrado. Manutenção não pode ser criada.")
+            for indice, _ in validos:
+                resultados[indice] = _erro_criacao(
+                    indice, e.code(), f"Erro ao comunicar com o MS Veiculos: {e.details()}"
+                )
+            validos = []
+
+        a_inserir = []
+        for indice, request in validos:
+            id_veiculo = ids_veiculos[request.placa_veiculo]
+            if id_veiculo is None:
+                resultados[indice] = _erro_criacao(
+                    indice, grpc.StatusCode.NOT_FOUND,
+                    f"Veículo com placa {request.placa_veiculo} não encontrado. Manutenção não pode ser criada."
+                )
+            else:
+                a_inserir.append((indice, (
+                    id_veiculo, request.placa_veiculo, request.descricao, request.chave_idempotencia or None
+                )))
+
+        if a_inserir:
+            try:
+                rows = self.db.create_manutencoes([valores for _, valores in a_inserir])
+            except Exception as e:
+                if isinstance(e, ChaveIdempotenciaError):
+                    codigo, erro = grpc.StatusCode.ABORTED, str(e)
+                else:
+                    codigo, erro = grpc.StatusCode.INTERNAL, f"Erro interno ao salvar manutenção: {str(e)}"
+                for indice, _ in a_inserir:
+                    resultados[indice] = _erro_criacao(indice, codigo, erro)
+            else:
+                for (indice, valores), row in zip(a_inserir, rows):
+                    self._lembrar_chave(valores[3], row)
+                    resultados[indice] = manutencoes_pb2.ResultadoCriacao(indice=indice, manutencao=to_manutencao(row))
+
+        return [resultados[indice] for indice, _ in lote]
+
+    def _revalidar(self, placa):
+        """Agenda a atualização de uma entrada velha, uma por placa por vez."""
+        if self.chamada_veiculos.breaker.estado() == CircuitBreaker.ABERTO:
+            # MS Veiculos fora: a entrada velha é servida até o fim da janela de stale
+            return
+        with self._revalidando_lock:
+            if placa in self._revalidando:
+                return
+            self._revalidando.add(placa)
+        self._revalidacao_executor.submit(self._revalidar_placa, placa)
+
+    def _revalidar_placa(self, placa):
+        try:
+            self._buscar_id_veiculo(placa)
+        except grpc.RpcError as e:
+            # a entrada velha continua valendo até o fim da janela de stale
+            log_veiculos.warning("Falha ao revalidar placa no MS Veiculos", extra={"placa": placa, "codigo": e.code().name})
+        finally:
+            with self._revalidando_lock:
+                self._revalidando.discard(placa)
+
+    def _manutencoes_existentes(self, chaves):
+        """
+        {chave: linha} das chaves de idempotência já usadas. As do mapa em memória são
+        relidas pelo id; as demais (e as de manutenções já arquivadas) buscadas pela chave.
+        """
+        existentes = {}
+        ids = {}
+        faltantes = []
+        for chave in chaves:
+            m_id = self.idempotencia.get(chave)
+            if m_id is not None:
+                ids[chave] = m_id
+            else:
+                faltantes.append(chave)
+        if ids:
+            rows = self.db.get_manutencoes_nao_arquivadas(set(ids.values()))
+            for chave, m_id in ids.items():
+                if m_id in rows:
+                    existentes[chave] = rows[m_id]
+                else:
+                    self.idempotencia.discard(chave)
+                    faltantes.append(chave)
+        if faltantes:
+            for chave, row in self.db.get_manutencoes_by_chaves(faltantes).items():
+                self._lembrar_chave(chave, row)
+                existentes[chave] = row
+        return existentes
+
+    def _lembrar_chave(self, chave, row):
+        if chave and row is not None:
+            self.idempotencia.set(chave, row[0])
+
+    def _arquivar_loop(self):
+        while not self._parando.wait(ARQUIVAMENTO_INTERVALO_SECONDS):
+            self.arquivar()
+
+    def arquivar(self):
+        """Arquiva, em lotes de ARQUIVAMENTO_LOTE, tudo o que já pode sair da partição quente."""
+        total = 0
+        try:
+            while not self._parando.is_set():
+                movidas = self.db.arquivar_lote(ARQUIVAMENTO_STATUS, ARQUIVAMENTO_IDADE_DIAS, ARQUIVAMENTO_LOTE)
+                total += movidas
+                if movidas < ARQUIVAMENTO_LOTE:
+                    break
+        except Exception as e:
+            self._arquivamento_erros += 1
+            log.error(f"Erro ao arquivar manutenções: {e}")
+        if total:
+            self._arquivadas += total
+            log.info("Manutenções movidas para o arquivo", extra={"arquivadas": total})
+        return total
+
+    def _gravar_manutencao(self, id_veiculo, placa, descricao, chave_idempotencia=None):
+        """Insere uma manutenção, pelo group commit quando ele está ativo."""
+        if self.escritor is not None:
+            # o INSERT roda na thread do escritor, fora do trace: o span cobre a espera pelo lote
+            with rastreamento.span("group_commit"):
+                return self.escritor.submit((id_veiculo, placa, descricao, chave_idempotencia)).result()
+        return self.db.create_manutencao(id_veiculo, placa, descricao, chave_idempotencia)
+
+    def stats(self):
+        stats = {"pool": self.db.stats()}
+        if self.replica is not None:
+            stats["replica_veiculos"] = self.replica.stats()
+        if self.cache_veiculos is not None:
+            stats["cache_veiculos"] = self.cache_veiculos.stats()
+            stats["cache_veiculos_negativo"] = self.cache_veiculos_negativo.stats()
+        if self.escritor is not None:
+            stats["group_commit"] = self.escritor.stats()
+        stats["cache_idempotencia"] = self.idempotencia.stats()
+        stats["veiculos_breaker"] = self.chamada_veiculos.stats()
+        if self._arquivamento is not None:
+            stats["arquivamento"] = {"arquivadas": self._arquivadas, "erros": self._arquivamento_erros}
+        if rastreamento.ativo():
+            stats["rastreamento"] = rastreamento.stats()
+        stats["logs"] = logs.stats()
+        if self.saude is not None:
+            stats["saude"] = self.saude.stats()
+        return stats
+
+    def verificar_veiculos(self):
+        """Health check do MS Veiculos, consultado pelo monitor de saúde."""
+        resposta = self.veiculos_saude.Check(
+            health_pb2.HealthCheckRequest(service=SERVICO_VEICULOS), timeout=HEALTH_TIMEOUT_SECONDS
+        )
+        return resposta.status == health_pb2.HealthCheckResponse.SERVING
+
+    def verificacoes_saude(self):
+        return [
+            ("db", self.db.verificar, True),
+            ("veiculos", self.verificar_veiculos, HEALTH_VEICULOS_OBRIGATORIO),
+        ]
+
+    def close(self):
+        self._parando.set()
+        if self._arquivamento is not None:
+            self._arquivamento.join(timeout=5)
+        if self.replica is not None:
+            self.replica.stop()
+        self.veiculos_channel.close()
+        # grava o que ainda estiver na fila antes de fechar o pool
+        if self.escritor is not None:
+            self.escritor.close()
+        self.db.close()
+
+    def CriarManutencao(self, request, context):
+        placa = request.placa_veiculo
+        logs.adicionar_campos(placa=placa)
+        descricao = request.descricao
+        chave = request.chave_idempotencia or None
+
+        if chave is not None:
+            erro = validar_chave(request)
+            if erro is not None:
+                context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+                context.set_details(erro)
                 return manutencoes_pb2.Manutencao()
+            try:
+                existente = self._manutencoes_existentes([chave]).get(chave)
+            except Exception as e:
+                context.set_code(grpc.StatusCode.INTERNAL)
+                context.set_details(f"Erro interno ao buscar chave_idempotencia: {str(e)}")
+                return manutencoes_pb2.Manutencao()
+            if existente is not None:
+                # repetição de um pedido já atendido: devolve a mesma manutenção
+                return to_manutencao(existente)
+
+        try:
+            id_veiculo = self._resolver_id_veiculo(placa, context)
+        except grpc.RpcError as e:
             context.set_code(e.code())
             context.set_details(f"Erro ao comunicar com o MS Veiculos: {e.details()}")
             return manutencoes_pb2.Manutencao()
-        try:
-            db_result = self.db.create_manutencao(id_veiculo, placa, descricao)
 
-            m_id, m_id_veiculo, m_placa_veiculo, m_descricao, m_status = db_result
-
-            return manutencoes_pb2.Manutencao(
-                id=str(m_id),
-                id_veiculo=m_id_veiculo,
-                placa_veiculo=m_placa_veiculo,
-                descricao=m_descricao,
-                status=m_status
+        if id_veiculo is None:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(f"Veículo com placa {placa} não encontrado. Manutenção não pode ser criada.")
+            return manutencoes_pb2.Manutencao()
+        log.debug("ID do veículo encontrado", extra={"id_veiculo": id_veiculo})
 
-            )
+        try:
+            db_result = self._gravar_manutencao(id_veiculo, placa, descricao, chave)
+            self._lembrar_chave(chave, db_result)
+            return to_manutencao(db_result)
+        except ChaveIdempotenciaError as e:
+            context.set_code(grpc.StatusCode.ABORTED)
+            context.set_details(str(e))
+            return manutencoes_pb2.Manutencao()
         except Exception as e:
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(f"Erro interno ao salvar manutenção: {str(e)}")
             return manutencoes_pb2.Manutencao()
         
 
+    def CriarManutencoes(self, request_iterator, context):
+        """
+        Implementa o RPC CriarManutencoes.
+        Agrupa os pedidos em lotes de CREATE_BATCH_SIZE; cada lote resolve as
+        placas distintas numa chamada ao MS Veiculos e é gravado num único INSERT.
+        Erros de um item (ex.: placa inexistente) voltam no seu ResultadoCriacao
+        sem interromper o stream.
+        """
+        lote = []
+        for indice, request in enumerate(request_iterator):
+            lote.append((indice, request))
+            if len(lote) >= CREATE_BATCH_SIZE:
+                yield from self._criar_lote(lote, context)
+                lote = []
+        if lote:
+            yield from self._criar_lote(lote, context)
+
     def ListarManutencoes(self, request, context):
         try:
             db_results = self.db.list_all_manutencoes()
             lista_manutencoes = manutencoes_pb2.ListaManutencoes()
-            for m_id, id_veiculo, placa_veiculo, descricao, status in db_results:
-                lista_manutencoes.manutencoes.append(
-                    manutencoes_pb2.Manutencao(
-                        id = str(m_id),
-                        id_veiculo = id_veiculo,
-                        placa_veiculo = placa_veiculo,
-                        descricao = descricao,
-                        status = status
-                    )
-                )
+            for row in db_results:
+                lista_manutencoes.manutencoes.append(to_manutencao(row))
 
             return lista_manutencoes
         except Exception as e:
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(f"Erro interno ao listar manutenções: {str(e)}")
-            return manutencoes_pb2.ListarManutencoes()
+            return manutencoes_pb2.ListaManutencoes()
         
+    def ListarPaginaManutencoes(self, request, context):
+        """
+        Implementa o RPC ListarPaginaManutencoes.
+        Retorna uma página das manutenções que atendem ao filtro, ordenada por id.
+        """
+        pagina = validar_pagina(request, context)
+        if pagina is None:
+            return manutencoes_pb2.PaginaManutencoes()
+        filtro, after_id, page_size = pagina
+
+        try:
+            # uma linha a mais só para saber se existe próxima página
+            rows = self.db.fetch_page(filtro, after_id, page_size + 1)
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Erro interno ao listar manutenções: {str(e)}")
+            return manutencoes_pb2.PaginaManutencoes()
+        return montar_pagina(rows, page_size)
+
+    def StreamManutencoes(self, request, context):
+        """
+        Implementa o RPC StreamManutencoes.
+        Envia as manutenções que atendem ao filtro uma a uma, lidas do banco em lotes de STREAM_BATCH_SIZE.
+        """
+        try:
+            for rows in self.db.iter_filtrado(ler_filtro(request)):
+                for row in rows:
+                    yield to_manutencao(row)
+        except Exception as e:
+            context.abort(grpc.StatusCode.INTERNAL, f"Erro interno ao listar manutenções: {str(e)}")
+
+    def AtualizarStatus(self, request, context):
+        """
+        Implementa o RPC AtualizarStatus.
+        Aplica todas as trocas de status num único UPDATE; itens inválidos, inexistentes
+        ou com status diferente do esperado voltam com erro sem afetar os demais.
+        """
+        if len(request.atualizacoes) > MAX_ATUALIZACOES_STATUS:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(f"No máximo {MAX_ATUALIZACOES_STATUS} atualizações por chamada.")
+            return manutencoes_pb2.AtualizarStatusResponse()
+
+        resultados = {}
+        validos = []
+        ids = set()
+        for indice, atualizacao in enumerate(request.atualizacoes):
+            valores = _validar_atualizacao(atualizacao)
+            if isinstance(valores, str):
+                resultados[indice] = _erro_atualizacao(indice, grpc.StatusCode.INVALID_ARGUMENT, valores)
+            elif valores[0] in ids:
+                resultados[indice] = _erro_atualizacao(
+                    indice, grpc.StatusCode.INVALID_ARGUMENT, f"id {valores[0]} repetido na mesma chamada"
+                )
+            else:
+                ids.add(valores[0])
+                validos.append((indice, valores))
+
+        if validos:
+            try:
+                rows = self.db.update_status([valores for _, valores in validos])
+            except Exception as e:
+                context.set_code(grpc.StatusCode.INTERNAL)
+                context.set_details(f"Erro interno ao atualizar status: {str(e)}")
+                return manutencoes_pb2.AtualizarStatusResponse()
+            for (indice, (m_id, _, status_esperado)), (atualizada, row) in zip(validos, rows):
+                if atualizada:
+                    resultados[indice] = manutencoes_pb2.ResultadoAtualizacao(indice=indice, manutencao=to_manutencao(row))
+                elif row is None:
+                    resultados[indice] = _erro_atualizacao(
+                        indice, grpc.StatusCode.NOT_FOUND, f"Manutenção com ID {m_id} não encontrada."
+                    )
+                else:
+                    resultados[indice] = _erro_atualizacao(
+                        indice, grpc.StatusCode.FAILED_PRECONDITION,
+                        f"Status atual {row[4]!r} diferente do esperado {status_esperado!r}.", row
+                    )
+
+        return manutencoes_pb2.AtualizarStatusResponse(
+            resultados=[resultados[indice] for indice in range(len(request.atualizacoes))]
+        )
+
+    def ResumirManutencoes(self, request, context):
+        """
+        Implementa o RPC ResumirManutencoes.
+        Lê as contagens da tabela de resumo, que os triggers mantêm a cada escrita.
+        """
+        try:
+            rows = self.db.get_resumo()
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Erro interno ao resumir manutenções: {str(e)}")
+            return manutencoes_pb2.ResumoManutencoes()
+        return montar_resumo(rows)
+
     def BuscarPorId(self, request, context):
         try:
             m_id = int(request.id)
@@ -169,15 +1130,7 @@ class GestaoManutencoesServicer(manutencoes_pb2_grpc.GestaoManutencoesServicer):
                 context.set_details(f"Manutenção com ID {m_id} não encontrada.")
                 return manutencoes_pb2.Manutencao()
             
-            m_id, id_veiculo, placa_veiculo, descricao, status = db_result
-
-            return manutencoes_pb2.Manutencao(
-                id=str(m_id),
-                id_veiculo=id_veiculo,
-                placa_veiculo=placa_veiculo,
-                descricao=descricao,
-                status=status
-            )
+            return to_manutencao(db_result)
         except Exception as e:
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(f"Erro interno ao buscar manutenção por ID: {str(e)}")
@@ -186,24 +1139,77 @@ class GestaoManutencoesServicer(manutencoes_pb2_grpc.GestaoManutencoesServicer):
 
     
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    configurar_logs()
+    log.info("Configuração efetiva.", extra={"config": configuracao.efetiva(comum, sys.modules[__name__])})
+    interceptors = [InterceptorMetricas()] if METRICS_ENABLED else []
+    if TRACE_ENABLED:
+        configurar_rastreamento()
+        interceptors.append(InterceptorRastreamento())
+    # por último (mais interno): o registro do RPC sai com o trace_id do span
+    interceptors.append(InterceptorLogs(LOG_RPC_LENTO_MS))
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=GRPC_MAX_WORKERS),
+        **argumentos_servidor(interceptors)
+    )
+    servicer = GestaoManutencoesServicer()
     manutencoes_pb2_grpc.add_GestaoManutencoesServicer_to_server(
-        GestaoManutencoesServicer(), server
+        servicer, server
     )
-    server.add_insecure_port('[::]:50052')
+    # Watch do health sem prender um worker do pool do gRPC
+    saude = health.HealthServicer(
+        experimental_non_blocking=True,
+        experimental_thread_pool=futures.ThreadPoolExecutor(max_workers=1)
+    )
+    health_pb2_grpc.add_HealthServicer_to_server(saude, server)
+    servicer.saude = MonitorSaude(saude.set, SERVICO_SAUDE, servicer.verificacoes_saude(), HEALTH_INTERVAL_SECONDS)
+    server.add_insecure_port(f'[::]:{GRPC_PORT}')
     server.start()
+    servicer.saude.start()
+    if METRICS_ENABLED:
+        iniciar_servidor_metricas(porta_metricas(), "manutencoes", servicer.stats)
 
-    print(f"Microserviço de Gestão de Manutenções rodando na porta 50052.")
+    log.info(f"Microserviço de Gestão de Manutenções rodando na porta {GRPC_PORT}.")
+
+    parar = threading.Event()
+    for sinal in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sinal, lambda *_: parar.set())
+
+    loop_counter = 0
+    while not parar.is_set():
+        loop_counter += 1
+        log.info("MS Manutenções ativo.", extra={"loop": loop_counter, "stats": servicer.stats()})
+        parar.wait(STATS_INTERVAL_SECONDS)
+
+    log.info("Encerrando: NOT_SERVING e drenagem dos RPCs em andamento.", extra={"grace_seconds": SHUTDOWN_GRACE_SECONDS})
+    servicer.saude.encerrar()
+    time.sleep(SHUTDOWN_DELAY_SECONDS)
+    server.stop(SHUTDOWN_GRACE_SECONDS).wait()
+    servicer.close()
+    rastreamento.encerrar()
+    log.info("Servidor encerrado.")
+    logs.encerrar()
+
+
+def _supervisionar():
+    """SERVER_PROCESSES cópias deste servidor (no modo de SERVER_MODE) sob um supervisor."""
+    configurar_logs(processo="supervisor")
+    processos = SERVER_PROCESSES or os.cpu_count()
+    log.info(f"Modo multiprocesso: {processos} processos na porta {GRPC_PORT} (SO_REUSEPORT).")
+    comando = [sys.executable, os.path.abspath(__file__)]
+    # além do prazo dos servidores, o tempo de fechar pools e exportar os últimos spans
+    prefork.Supervisor(comando, processos, SHUTDOWN_DELAY_SECONDS + SHUTDOWN_GRACE_SECONDS + 5).executar()
+    log.info("Supervisor encerrado.")
+    logs.encerrar()
 
-    try:
-        loop_counter = 0
-        while True:
-            loop_counter += 1
-            print(f"MS Manutenções ativo. Loop de manutenção: {loop_counter}")
-            time.sleep(5)
-    except KeyboardInterrupt:
-        server.stop(0)
 
 if __name__ == '__main__':
-    serve()
+    if SERVER_PROCESSES != 1 and SERVER_PROCESS_INDEX < 0:
+        _supervisionar()
+    elif SERVER_MODE == "asyncio":
+        # aio_server importa o servicer como `server`: reaproveita este módulo em vez de carregá-lo de novo
+        sys.modules.setdefault("server", sys.modules[__name__])
+        import aio_server
+        aio_server.serve()
+    else:
+        serve()
 
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: veiculos.proto
+# Protobuf Python Version: 6.31.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    6,
+    31,
+    1,
+    '',
+    'veiculos.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0eveiculos.proto\x12\x08veiculos\"A\n\x07Veiculo\x12\n\n\x02id\x18\x01 \x01(\t\x12\r\n\x05placa\x18\x02 \x01(\t\x12\x0e\n\x06modelo\x18\x03 \x01(\t\x12\x0b\n\x03\x61no\x18\x04 \x01(\x05\"\x07\n\x05\x45mpty\"1\n\rListaVeiculos\x12 \n\x05items\x18\x01 \x03(\x0b\x32\x11.veiculos.Veiculo\"\x17\n\tVeiculoId\x12\n\n\x02id\x18\x01 \x01(\t\"\x1d\n\x0cVeiculoPlaca\x12\r\n\x05placa\x18\x01 \x01(\t\"\x1f\n\rVeiculoPlacas\x12\x0e\n\x06placas\x18\x01 \x03(\t\"Q\n\x14ResultadoBuscaPlacas\x12 \n\x05items\x18\x01 \x03(\x0b\x32\x11.veiculos.Veiculo\x12\x17\n\x0fnao_encontradas\x18\x02 \x03(\t\"\x19\n\nVeiculoIds\x12\x0b\n\x03ids\x18\x01 \x03(\t\"N\n\x11ResultadoBuscaIds\x12 \n\x05items\x18\x01 \x03(\x0b\x32\x11.veiculos.Veiculo\x12\x17\n\x0fnao_encontrados\x18\x02 \x03(\t\"}\n\rResultadoLote\x12\x0c\n\x04lote\x18\x01 \x01(\x05\x12\x11\n\tinseridos\x18\x02 \x01(\x05\x12\x13\n\x0b\x61tualizados\x18\x03 \x01(\x05\x12\x12\n\nrejeitados\x18\x04 \x01(\x05\x12\x13\n\x0binalterados\x18\x05 \x01(\x05\x12\r\n\x05\x65rros\x18\x06 \x03(\t\"\xa6\x01\n\x13ResultadoImportacao\x12&\n\x05lotes\x18\x01 \x03(\x0b\x32\x17.veiculos.ResultadoLote\x12\x17\n\x0ftotal_inseridos\x18\x02 \x01(\x05\x12\x19\n\x11total_atualizados\x18\x03 \x01(\x05\x12\x18\n\x10total_rejeitados\x18\x04 \x01(\x05\x12\x19\n\x11total_inalterados\x18\x05 \x01(\x05\"6\n\rPaginaRequest\x12\x11\n\tpage_size\x18\x01 \x01(\x05\x12\x12\n\npage_token\x18\x02 \x01(\t\"K\n\x0ePaginaVeiculos\x12 \n\x05items\x18\x01 \x03(\x0b\x32\x11.veiculos.Veiculo\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\"\xaf\x01\n\rEventoVeiculo\x12*\n\x04tipo\x18\x01 \x01(\x0e\x32\x1c.veiculos.EventoVeiculo.Tipo\x12\"\n\x07veiculo\x18\x02 \x01(\x0b\x32\x11.veiculos.Veiculo\"N\n\x04Tipo\x12\x0c\n\x08SNAPSHOT\x10\x00\x12\x10\n\x0cSNAPSHOT_FIM\x10\x01\x12\x0c\n\x08\x41LTERADO\x10\x02\x12\x0c\n\x08REMOVIDO\x10\x03\x12\n\n\x06LIMPAR\x10\x04\x32\xca\x04\n\x0eGestaoVeiculos\x12\x37\n\x0bListarTodos\x12\x0f.veiculos.Empty\x1a\x17.veiculos.ListaVeiculos\x12\x34\n\nBuscaPorId\x12\x13.veiculos.VeiculoId\x1a\x11.veiculos.Veiculo\x12@\n\x0b\x42uscaPorIds\x12\x14.veiculos.VeiculoIds\x1a\x1b.veiculos.ResultadoBuscaIds\x12;\n\x0e\x42uscarPorPlaca\x12\x16.veiculos.VeiculoPlaca\x1a\x11.veiculos.Veiculo\x12J\n\x0f\x42uscarPorPlacas\x12\x17.veiculos.VeiculoPlacas\x1a\x1e.veiculos.ResultadoBuscaPlacas\x12\x36\n\x0eStreamVeiculos\x12\x0f.veiculos.Empty\x1a\x11.veiculos.Veiculo0\x01\x12\x41\n\x0cListarPagina\x12\x17.veiculos.PaginaRequest\x1a\x18.veiculos.PaginaVeiculos\x12\x46\n\x10ImportarVeiculos\x12\x11.veiculos.Veiculo\x1a\x1d.veiculos.ResultadoImportacao(\x01\x12;\n\rWatchVeiculos\x12\x0f.veiculos.Empty\x1a\x17.veiculos.EventoVeiculo0\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'veiculos_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_VEICULO']._serialized_start=28
+  _globals['_VEICULO']._serialized_end=93
+  _globals['_EMPTY']._serialized_start=95
+  _globals['_EMPTY']._serialized_end=102
+  _globals['_LISTAVEICULOS']._serialized_start=104
+  _globals['_LISTAVEICULOS']._serialized_end=153
+  _globals['_VEICULOID']._serialized_start=155
+  _globals['_VEICULOID']._serialized_end=178
+  _globals['_VEICULOPLACA']._serialized_start=180
+  _globals['_VEICULOPLACA']._serialized_end=209
+  _globals['_VEICULOPLACAS']._serialized_start=211
+  _globals['_VEICULOPLACAS']._serialized_end=242
+  _globals['_RESULTADOBUSCAPLACAS']._serialized_start=244
+  _globals['_RESULTADOBUSCAPLACAS']._serialized_end=325
+  _globals['_VEICULOIDS']._serialized_start=327
+  _globals['_VEICULOIDS']._serialized_end=352
+  _globals['_RESULTADOBUSCAIDS']._serialized_start=354
+  _globals['_RESULTADOBUSCAIDS']._serialized_end=432
+  _globals['_RESULTADOLOTE']._serialized_start=434
+  _globals['_RESULTADOLOTE']._serialized_end=559
+  _globals['_RESULTADOIMPORTACAO']._serialized_start=562
+  _globals['_RESULTADOIMPORTACAO']._serialized_end=728
+  _globals['_PAGINAREQUEST']._serialized_start=730
+  _globals['_PAGINAREQUEST']._serialized_end=784
+  _globals['_PAGINAVEICULOS']._serialized_start=786
+  _globals['_PAGINAVEICULOS']._serialized_end=861
+  _globals['_EVENTOVEICULO']._serialized_start=864
+  _globals['_EVENTOVEICULO']._serialized_end=1039
+  _globals['_EVENTOVEICULO_TIPO']._serialized_start=961
+  _globals['_EVENTOVEICULO_TIPO']._serialized_end=1039
+  _globals['_GESTAOVEICULOS']._serialized_start=1042
+  _globals['_GESTAOVEICULOS']._serialized_end=1628
+# @@protoc_insertion_point(module_scope)
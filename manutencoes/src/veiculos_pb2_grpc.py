@@ -0,0 +1,443 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+import veiculos_pb2 as veiculos__pb2
+
+GRPC_GENERATED_VERSION = '1.76.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + ' but the generated code in veiculos_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class GestaoVeiculosStub(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.ListarTodos = channel.unary_unary(
+                '/veiculos.GestaoVeiculos/ListarTodos',
+                request_serializer=veiculos__pb2.Empty.SerializeToString,
+                response_deserializer=veiculos__pb2.ListaVeiculos.FromString,
+                _registered_method=True)
+        self.BuscaPorId = channel.unary_unary(
+                '/veiculos.GestaoVeiculos/BuscaPorId',
+                request_serializer=veiculos__pb2.VeiculoId.SerializeToString,
+                response_deserializer=veiculos__pb2.Veiculo.FromString,
+                _registered_method=True)
+        self.BuscaPorIds = channel.unary_unary(
+                '/veiculos.GestaoVeiculos/BuscaPorIds',
+                request_serializer=veiculos__pb2.VeiculoIds.SerializeToString,
+                response_deserializer=veiculos__pb2.ResultadoBuscaIds.FromString,
+                _registered_method=True)
+        self.BuscarPorPlaca = channel.unary_unary(
+                '/veiculos.GestaoVeiculos/BuscarPorPlaca',
+                request_serializer=veiculos__pb2.VeiculoPlaca.SerializeToString,
+                response_deserializer=veiculos__pb2.Veiculo.FromString,
+                _registered_method=True)
+        self.BuscarPorPlacas = channel.unary_unary(
+                '/veiculos.GestaoVeiculos/BuscarPorPlacas',
+                request_serializer=veiculos__pb2.VeiculoPlacas.SerializeToString,
+                response_deserializer=veiculos__pb2.ResultadoBuscaPlacas.FromString,
+                _registered_method=True)
+        self.StreamVeiculos = channel.unary_stream(
+                '/veiculos.GestaoVeiculos/StreamVeiculos',
+                request_serializer=veiculos__pb2.Empty.SerializeToString,
+                response_deserializer=veiculos__pb2.Veiculo.FromString,
+                _registered_method=True)
+        self.ListarPagina = channel.unary_unary(
+                '/veiculos.GestaoVeiculos/ListarPagina',
+                request_serializer=veiculos__pb2.PaginaRequest.SerializeToString,
+                response_deserializer=veiculos__pb2.PaginaVeiculos.FromString,
+                _registered_method=True)
+        self.ImportarVeiculos = channel.stream_unary(
+                '/veiculos.GestaoVeiculos/ImportarVeiculos',
+                request_serializer=veiculos__pb2.Veiculo.SerializeToString,
+                response_deserializer=veiculos__pb2.ResultadoImportacao.FromString,
+                _registered_method=True)
+        self.WatchVeiculos = channel.unary_stream(
+                '/veiculos.GestaoVeiculos/WatchVeiculos',
+                request_serializer=veiculos__pb2.Empty.SerializeToString,
+                response_deserializer=veiculos__pb2.EventoVeiculo.FromString,
+                _registered_method=True)
+
+
+class GestaoVeiculosServicer(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def ListarTodos(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BuscaPorId(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BuscaPorIds(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BuscarPorPlaca(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BuscarPorPlacas(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamVeiculos(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListarPagina(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ImportarVeiculos(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchVeiculos(self, request, context):
+        """Estado atual e alterações seguintes. Se o stream cair, o cliente deve
+        chamar de novo e recomeçar pelo snapshot (eventos perdidos não são reenviados).
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_GestaoVeiculosServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'ListarTodos': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListarTodos,
+                    request_deserializer=veiculos__pb2.Empty.FromString,
+                    response_serializer=veiculos__pb2.ListaVeiculos.SerializeToString,
+            ),
+            'BuscaPorId': grpc.unary_unary_rpc_method_handler(
+                    servicer.BuscaPorId,
+                    request_deserializer=veiculos__pb2.VeiculoId.FromString,
+                    response_serializer=veiculos__pb2.Veiculo.SerializeToString,
+            ),
+            'BuscaPorIds': grpc.unary_unary_rpc_method_handler(
+                    servicer.BuscaPorIds,
+                    request_deserializer=veiculos__pb2.VeiculoIds.FromString,
+                    response_serializer=veiculos__pb2.ResultadoBuscaIds.SerializeToString,
+            ),
+            'BuscarPorPlaca': grpc.unary_unary_rpc_method_handler(
+                    servicer.BuscarPorPlaca,
+                    request_deserializer=veiculos__pb2.VeiculoPlaca.FromString,
+                    response_serializer=veiculos__pb2.Veiculo.SerializeToString,
+            ),
+            'BuscarPorPlacas': grpc.unary_unary_rpc_method_handler(
+                    servicer.BuscarPorPlacas,
+                    request_deserializer=veiculos__pb2.VeiculoPlacas.FromString,
+                    response_serializer=veiculos__pb2.ResultadoBuscaPlacas.SerializeToString,
+            ),
+            'StreamVeiculos': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamVeiculos,
+                    request_deserializer=veiculos__pb2.Empty.FromString,
+                    response_serializer=veiculos__pb2.Veiculo.SerializeToString,
+            ),
+            'ListarPagina': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListarPagina,
+                    request_deserializer=veiculos__pb2.PaginaRequest.FromString,
+                    response_serializer=veiculos__pb2.PaginaVeiculos.SerializeToString,
+            ),
+            'ImportarVeiculos': grpc.stream_unary_rpc_method_handler(
+                    servicer.ImportarVeiculos,
+                    request_deserializer=veiculos__pb2.Veiculo.FromString,
+                    response_serializer=veiculos__pb2.ResultadoImportacao.SerializeToString,
+            ),
+            'WatchVeiculos': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchVeiculos,
+                    request_deserializer=veiculos__pb2.Empty.FromString,
+                    response_serializer=veiculos__pb2.EventoVeiculo.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'veiculos.GestaoVeiculos', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('veiculos.GestaoVeiculos', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class GestaoVeiculos(object):
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def ListarTodos(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/veiculos.GestaoVeiculos/ListarTodos',
+            veiculos__pb2.Empty.SerializeToString,
+            veiculos__pb2.ListaVeiculos.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BuscaPorId(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/veiculos.GestaoVeiculos/BuscaPorId',
+            veiculos__pb2.VeiculoId.SerializeToString,
+            veiculos__pb2.Veiculo.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BuscaPorIds(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/veiculos.GestaoVeiculos/BuscaPorIds',
+            veiculos__pb2.VeiculoIds.SerializeToString,
+            veiculos__pb2.ResultadoBuscaIds.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BuscarPorPlaca(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/veiculos.GestaoVeiculos/BuscarPorPlaca',
+            veiculos__pb2.VeiculoPlaca.SerializeToString,
+            veiculos__pb2.Veiculo.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BuscarPorPlacas(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/veiculos.GestaoVeiculos/BuscarPorPlacas',
+            veiculos__pb2.VeiculoPlacas.SerializeToString,
+            veiculos__pb2.ResultadoBuscaPlacas.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamVeiculos(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/veiculos.GestaoVeiculos/StreamVeiculos',
+            veiculos__pb2.Empty.SerializeToString,
+            veiculos__pb2.Veiculo.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ListarPagina(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/veiculos.GestaoVeiculos/ListarPagina',
+            veiculos__pb2.PaginaRequest.SerializeToString,
+            veiculos__pb2.PaginaVeiculos.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ImportarVeiculos(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/veiculos.GestaoVeiculos/ImportarVeiculos',
+            veiculos__pb2.Veiculo.SerializeToString,
+            veiculos__pb2.ResultadoImportacao.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def WatchVeiculos(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/veiculos.GestaoVeiculos/WatchVeiculos',
+            veiculos__pb2.Empty.SerializeToString,
+            veiculos__pb2.EventoVeiculo.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
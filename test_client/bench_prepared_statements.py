@@ -0,0 +1,116 @@
+import time
+import argparse
+import statistics
+
+import psycopg2
+
+# Mesmas consultas (texto e preparada) que VeiculosDB/ManutencoesDB executam.
+CASOS = {
+    "veiculo_por_placa": {
+        "database": "frota_veiculos",
+        "amostra": "SELECT placa FROM veiculos ORDER BY id LIMIT 200;",
+        "texto": "SELECT id, placa, modelo, ano FROM veiculos WHERE placa = %s;",
+        "prepare": "PREPARE veiculo_por_placa AS SELECT id, placa, modelo, ano FROM veiculos WHERE placa = $1;",
+        "execute": "EXECUTE veiculo_por_placa (%s);",
+    },
+    "veiculo_por_id": {
+        "database": "frota_veiculos",
+        "amostra": "SELECT id FROM veiculos ORDER BY id LIMIT 200;",
+        "texto": "SELECT id, placa, modelo, ano FROM veiculos WHERE id = %s;",
+        "prepare": "PREPARE veiculo_por_id AS SELECT id, placa, modelo, ano FROM veiculos WHERE id = $1;",
+        "execute": "EXECUTE veiculo_por_id (%s);",
+    },
+    "manutencao_por_id": {
+        "database": "manutencoes_db",
+        "amostra": "SELECT id FROM manutencoes ORDER BY id LIMIT 200;",
+        "texto": "SELECT id, id_veiculo, placa_veiculo, descricao, status FROM manutencoes WHERE id = %s;",
+        "prepare": (
+            "PREPARE manutencao_por_id AS "
+            "SELECT id, id_veiculo, placa_veiculo, descricao, status FROM manutencoes WHERE id = $1;"
+        ),
+        "execute": "EXECUTE manutencao_por_id (%s);",
+    },
+}
+
+
+def medir(cursor, query, parametros, iteracoes, aquecimento):
+    """Executa a consulta `iteracoes` vezes e devolve a latência de cada chamada em microssegundos."""
+    for i in range(aquecimento):
+        cursor.execute(query, (parametros[i % len(parametros)],))
+        cursor.fetchall()
+
+    latencias = []
+    for i in range(iteracoes):
+        inicio = time.perf_counter()
+        cursor.execute(query, (parametros[i % len(parametros)],))
+        cursor.fetchall()
+        latencias.append((time.perf_counter() - inicio) * 1_000_000)
+    return latencias
+
+
+def resumo(latencias):
+    ordenadas = sorted(latencias)
+    return {
+        "media": statistics.fmean(ordenadas),
+        "p50": ordenadas[len(ordenadas) // 2],
+        "p99": ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.99))],
+    }
+
+
+def run_bench(args):
+    for nome in args.casos:
+        caso = CASOS[nome]
+        conn = psycopg2.connect(
+            host=args.host,
+            port=args.port,
+            database=args.database or caso["database"],
+            user=args.user,
+            password=args.password
+        )
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(caso["amostra"])
+                parametros = [row[0] for row in cursor.fetchall()]
+                if not parametros:
+                    print(f"[{nome}] tabela vazia, caso ignorado.")
+                    continue
+
+                texto = resumo(medir(cursor, caso["texto"], parametros, args.iteracoes, args.aquecimento))
+                cursor.execute(caso["prepare"])
+                preparada = resumo(medir(cursor, caso["execute"], parametros, args.iteracoes, args.aquecimento))
+        finally:
+            conn.close()
+
+        print(f"\n[{nome}] {args.iteracoes} chamadas (latência por chamada, µs)")
+        print(f"  {'':<10} {'média':>9} {'p50':>9} {'p99':>9}")
+        print(f"  {'texto':<10} {texto['media']:>9.1f} {texto['p50']:>9.1f} {texto['p99']:>9.1f}")
+        print(f"  {'preparada':<10} {preparada['media']:>9.1f} {preparada['p50']:>9.1f} {preparada['p99']:>9.1f}")
+        print(f"  ganho na média: {(1 - preparada['media'] / texto['media']) * 100:.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara a latência das consultas quentes em texto e como prepared statements."
+    )
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=5432)
+    parser.add_argument("--database", help="sobrepõe o banco padrão de cada caso")
+    parser.add_argument("--user", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("-n", "--iteracoes", type=int, default=5000)
+    parser.add_argument("--aquecimento", type=int, default=200)
+    parser.add_argument(
+        "casos", nargs="*", metavar="caso",
+        help=f"casos a medir ({', '.join(sorted(CASOS))}); padrão: veiculo_por_placa veiculo_por_id"
+    )
+    args = parser.parse_args()
+    args.casos = args.casos or ["veiculo_por_placa", "veiculo_por_id"]
+    desconhecidos = set(args.casos) - set(CASOS)
+    if desconhecidos:
+        parser.error(f"caso desconhecido: {', '.join(sorted(desconhecidos))}")
+    run_bench(args)
+
+
+if __name__ == '__main__':
+    main()
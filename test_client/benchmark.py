@@ -0,0 +1,317 @@
+"""
+Gerador de carga e benchmark de latência para os microserviços.
+
+Exemplos:
+    python benchmark.py run --rpc BuscarPorPlaca --concurrency 20 --duration 30 --output base.json
+    python benchmark.py run --mix BuscarPorPlaca=70,CriarManutencao=20,BuscarPorId=10 --rate 500 --output novo.json
+    python benchmark.py compare base.json novo.json --threshold 10
+
+Com --rate a carga é de malha aberta: cada chamada tem um horário agendado e a
+latência é medida a partir dele, então filas no cliente ou no servidor aparecem
+nos percentis (sem "coordinated omission"). Sem --rate cada worker dispara a
+próxima chamada assim que a anterior termina.
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timezone
+
+import grpc
+
+import manutencoes_pb2
+import manutencoes_pb2_grpc
+import veiculos_pb2
+import veiculos_pb2_grpc
+
+TARGET_HOST_VEICULOS = 'localhost:50051'
+TARGET_HOST_MANUTENCOES = 'localhost:50052'
+
+RPCS = ["BuscarPorPlaca", "ListarTodos", "CriarManutencao", "ListarManutencoes", "BuscarPorId"]
+
+
+class Alvos:
+    """Stubs e os dados de entrada (placas e ids existentes) usados pelas chamadas."""
+
+    def __init__(self, veiculos_host, manutencoes_host, timeout):
+        self.timeout = timeout
+        self.veiculos_channel = grpc.insecure_channel(veiculos_host)
+        self.manutencoes_channel = grpc.insecure_channel(manutencoes_host)
+        self.veiculos = veiculos_pb2_grpc.GestaoVeiculosStub(self.veiculos_channel)
+        self.manutencoes = manutencoes_pb2_grpc.GestaoManutencoesStub(self.manutencoes_channel)
+        self.placas = []
+        self.ids_manutencao = []
+
+    def preparar(self, rpcs):
+        """Carrega placas e ids reais para que as chamadas não sejam só NOT_FOUND."""
+        pagina = self.veiculos.ListarPagina(veiculos_pb2.PaginaRequest(page_size=1000), timeout=30)
+        self.placas = [v.placa for v in pagina.items]
+        if not self.placas:
+            raise SystemExit("Nenhum veículo cadastrado no MS Veiculos; não há placas para o benchmark.")
+
+        if "BuscarPorId" in rpcs:
+            lista = self.manutencoes.ListarManutencoes(manutencoes_pb2.Empty(), timeout=60)
+            self.ids_manutencao = [m.id for m in lista.manutencoes[-1000:]]
+            if not self.ids_manutencao:
+                criada = self.manutencoes.CriarManutencao(
+                    manutencoes_pb2.ManutencaoRequest(placa_veiculo=self.placas[0], descricao="benchmark"),
+                    timeout=30
+                )
+                self.ids_manutencao = [criada.id]
+
+    def chamar(self, rpc):
+        if rpc == "BuscarPorPlaca":
+            self.veiculos.BuscarPorPlaca(
+                veiculos_pb2.VeiculoPlaca(placa=random.choice(self.placas)), timeout=self.timeout
+            )
+        elif rpc == "ListarTodos":
+            self.veiculos.ListarTodos(veiculos_pb2.Empty(), timeout=self.timeout)
+        elif rpc == "CriarManutencao":
+            self.manutencoes.CriarManutencao(
+                manutencoes_pb2.ManutencaoRequest(placa_veiculo=random.choice(self.placas), descricao="benchmark"),
+                timeout=self.timeout
+            )
+        elif rpc == "ListarManutencoes":
+            self.manutencoes.ListarManutencoes(manutencoes_pb2.Empty(), timeout=self.timeout)
+        elif rpc == "BuscarPorId":
+            self.manutencoes.BuscarPorId(
+                manutencoes_pb2.ManutencaoId(id=random.choice(self.ids_manutencao)), timeout=self.timeout
+            )
+
+    def close(self):
+        self.veiculos_channel.close()
+        self.manutencoes_channel.close()
+
+
+class Agenda:
+    """Distribui horários de disparo a `rate` chamadas/s entre os workers (malha aberta)."""
+
+    def __init__(self, rate, inicio):
+        self._intervalo = 1.0 / rate
+        self._inicio = inicio
+        self._proxima = 0
+        self._lock = threading.Lock()
+
+    def proximo_horario(self):
+        with self._lock:
+            horario = self._inicio + self._proxima * self._intervalo
+            self._proxima += 1
+        return horario
+
+
+def parse_mix(texto):
+    """Converte "BuscarPorPlaca=70,CriarManutencao=30" em ([rpcs], [pesos])."""
+    rpcs, pesos = [], []
+    for parte in texto.split(","):
+        nome, _, peso = parte.partition("=")
+        nome = nome.strip()
+        if nome not in RPCS:
+            raise argparse.ArgumentTypeError(f"RPC desconhecido no mix: {nome!r} (opções: {', '.join(RPCS)})")
+        try:
+            peso = float(peso) if peso else 1.0
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"peso inválido para {nome}: {peso!r}")
+        rpcs.append(nome)
+        pesos.append(peso)
+    return rpcs, pesos
+
+
+def percentil(ordenadas, p):
+    if not ordenadas:
+        return 0.0
+    return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p / 100))]
+
+
+def resumir(latencias, erros, duracao):
+    """Estatísticas de um RPC (ou do total): latências em ms, RPS e taxa de erro."""
+    ordenadas = sorted(latencias)
+    total = len(ordenadas)
+    total_erros = sum(erros.values())
+    return {
+        "requests": total,
+        "errors": total_erros,
+        "error_rate": round(total_erros / total, 6) if total else 0.0,
+        "errors_by_code": dict(sorted(erros.items())),
+        "rps": round(total / duracao, 2) if duracao else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ordenadas) / total, 3) if total else 0.0,
+            "p50": round(percentil(ordenadas, 50), 3),
+            "p95": round(percentil(ordenadas, 95), 3),
+            "p99": round(percentil(ordenadas, 99), 3),
+            "max": round(ordenadas[-1], 3) if total else 0.0,
+        },
+    }
+
+
+def run(args):
+    if args.mix:
+        rpcs, pesos = parse_mix(args.mix)
+    else:
+        rpcs, pesos = [args.rpc], [1.0]
+
+    alvos = Alvos(args.veiculos_host, args.manutencoes_host, args.timeout)
+    alvos.preparar(rpcs)
+
+    latencias = {rpc: [] for rpc in rpcs}
+    erros = {rpc: {} for rpc in rpcs}
+    lock = threading.Lock()
+
+    inicio = time.monotonic() + args.warmup
+    fim = inicio + args.duration
+    agenda = Agenda(args.rate, time.monotonic()) if args.rate else None
+
+    def worker():
+        rng = random.Random()
+        minhas_latencias = {rpc: [] for rpc in rpcs}
+        meus_erros = {rpc: {} for rpc in rpcs}
+        while True:
+            if agenda is not None:
+                horario = agenda.proximo_horario()
+                espera = horario - time.monotonic()
+                if espera > 0:
+                    time.sleep(espera)
+            else:
+                horario = time.monotonic()
+            if horario >= fim:
+                break
+
+            rpc = rng.choices(rpcs, weights=pesos)[0]
+            codigo = None
+            try:
+                alvos.chamar(rpc)
+            except grpc.RpcError as e:
+                codigo = e.code().name
+            concluido = time.monotonic()
+
+            # as chamadas do aquecimento não entram no resultado
+            if horario < inicio:
+                continue
+            minhas_latencias[rpc].append((concluido - horario) * 1000)
+            if codigo is not None:
+                meus_erros[rpc][codigo] = meus_erros[rpc].get(codigo, 0) + 1
+
+        with lock:
+            for rpc in rpcs:
+                latencias[rpc].extend(minhas_latencias[rpc])
+                for codigo, n in meus_erros[rpc].items():
+                    erros[rpc][codigo] = erros[rpc].get(codigo, 0) + n
+
+    print(
+        f"Benchmark: {args.concurrency} workers, {args.duration}s (+{args.warmup}s de aquecimento), "
+        f"{'rate ' + str(args.rate) + ' rps' if args.rate else 'malha fechada'}, mix {dict(zip(rpcs, pesos))}",
+        file=sys.stderr
+    )
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    alvos.close()
+
+    todas_latencias = [l for rpc in rpcs for l in latencias[rpc]]
+    todos_erros = {}
+    for rpc in rpcs:
+        for codigo, n in erros[rpc].items():
+            todos_erros[codigo] = todos_erros.get(codigo, 0) + n
+
+    resultado = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "veiculos_host": args.veiculos_host,
+            "manutencoes_host": args.manutencoes_host,
+            "concurrency": args.concurrency,
+            "rate": args.rate,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "mix": dict(zip(rpcs, pesos)),
+        },
+        "total": resumir(todas_latencias, todos_erros, args.duration),
+        "rpcs": {rpc: resumir(latencias[rpc], erros[rpc], args.duration) for rpc in rpcs},
+    }
+
+    saida = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(saida + "\n")
+        print(f"Resultado gravado em {args.output}", file=sys.stderr)
+    print(saida)
+
+
+def variacao(base, novo):
+    if not base:
+        return 0.0 if not novo else float("inf")
+    return (novo - base) / base * 100
+
+
+def compare(args):
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.novo, encoding="utf-8") as f:
+        novo = json.load(f)
+
+    regressoes = []
+    print(f"{'RPC':<20} {'métrica':<12} {'base':>12} {'novo':>12} {'variação':>10}")
+    for rpc in sorted(set(base["rpcs"]) & set(novo["rpcs"])) + ["total"]:
+        b = base["total"] if rpc == "total" else base["rpcs"][rpc]
+        n = novo["total"] if rpc == "total" else novo["rpcs"][rpc]
+        linhas = [
+            ("rps", b["rps"], n["rps"], -1),
+            ("p50_ms", b["latency_ms"]["p50"], n["latency_ms"]["p50"], 1),
+            ("p95_ms", b["latency_ms"]["p95"], n["latency_ms"]["p95"], 1),
+            ("p99_ms", b["latency_ms"]["p99"], n["latency_ms"]["p99"], 1),
+            ("error_rate", b["error_rate"], n["error_rate"], 1),
+        ]
+        for metrica, valor_base, valor_novo, sentido_ruim in linhas:
+            delta = variacao(valor_base, valor_novo)
+            if metrica == "error_rate":
+                piorou = valor_novo - valor_base > args.error_threshold
+            else:
+                piorou = delta * sentido_ruim > args.threshold
+            marca = "  <- regressão" if piorou else ""
+            print(f"{rpc:<20} {metrica:<12} {valor_base:>12} {valor_novo:>12} {delta:>9.1f}%{marca}")
+            if piorou:
+                regressoes.append(f"{rpc}.{metrica}")
+
+    if regressoes:
+        print(f"\n{len(regressoes)} regressões acima do limite: {', '.join(regressoes)}")
+        return 1
+    print("\nNenhuma regressão acima do limite.")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga dos microserviços de veículos e manutenções.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_run = sub.add_parser("run", help="gera carga e grava o resultado em JSON")
+    p_run.add_argument("--veiculos-host", default=TARGET_HOST_VEICULOS)
+    p_run.add_argument("--manutencoes-host", default=TARGET_HOST_MANUTENCOES)
+    alvo = p_run.add_mutually_exclusive_group()
+    alvo.add_argument("--rpc", choices=RPCS, default="BuscarPorPlaca", help="RPC único a exercitar")
+    alvo.add_argument("--mix", help="pesos por RPC, ex.: BuscarPorPlaca=70,CriarManutencao=30")
+    p_run.add_argument("--concurrency", type=int, default=10, help="número de chamadas simultâneas (threads)")
+    p_run.add_argument("--rate", type=float, default=0, help="chamadas/s no total; 0 = o mais rápido possível")
+    p_run.add_argument("--duration", type=float, default=30, help="segundos de medição")
+    p_run.add_argument("--warmup", type=float, default=3, help="segundos de aquecimento descartados")
+    p_run.add_argument("--timeout", type=float, default=10, help="deadline de cada chamada, em segundos")
+    p_run.add_argument("--output", help="arquivo JSON de saída (além do stdout)")
+
+    p_cmp = sub.add_parser("compare", help="compara dois resultados e aponta regressões")
+    p_cmp.add_argument("base")
+    p_cmp.add_argument("novo")
+    p_cmp.add_argument("--threshold", type=float, default=10,
+                       help="variação percentual tolerada em RPS e latência")
+    p_cmp.add_argument("--error-threshold", type=float, default=0.01,
+                       help="aumento absoluto tolerado na taxa de erro")
+
+    args = parser.parse_args()
+    if args.comando == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == '__main__':
+    main()
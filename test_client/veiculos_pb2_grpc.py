@@ -44,11 +44,41 @@ class GestaoVeiculosStub(object):
                 request_serializer=veiculos__pb2.VeiculoId.SerializeToString,
                 response_deserializer=veiculos__pb2.Veiculo.FromString,
                 _registered_method=True)
+        self.BuscaPorIds = channel.unary_unary(
+                '/veiculos.GestaoVeiculos/BuscaPorIds',
+                request_serializer=veiculos__pb2.VeiculoIds.SerializeToString,
+                response_deserializer=veiculos__pb2.ResultadoBuscaIds.FromString,
+                _registered_method=True)
         self.BuscarPorPlaca = channel.unary_unary(
                 '/veiculos.GestaoVeiculos/BuscarPorPlaca',
                 request_serializer=veiculos__pb2.VeiculoPlaca.SerializeToString,
                 response_deserializer=veiculos__pb2.Veiculo.FromString,
                 _registered_method=True)
+        self.BuscarPorPlacas = channel.unary_unary(
+                '/veiculos.GestaoVeiculos/BuscarPorPlacas',
+                request_serializer=veiculos__pb2.VeiculoPlacas.SerializeToString,
+                response_deserializer=veiculos__pb2.ResultadoBuscaPlacas.FromString,
+                _registered_method=True)
+        self.StreamVeiculos = channel.unary_stream(
+                '/veiculos.GestaoVeiculos/StreamVeiculos',
+                request_serializer=veiculos__pb2.Empty.SerializeToString,
+                response_deserializer=veiculos__pb2.Veiculo.FromString,
+                _registered_method=True)
+        self.ListarPagina = channel.unary_unary(
+                '/veiculos.GestaoVeiculos/ListarPagina',
+                request_serializer=veiculos__pb2.PaginaRequest.SerializeToString,
+                response_deserializer=veiculos__pb2.PaginaVeiculos.FromString,
+                _registered_method=True)
+        self.ImportarVeiculos = channel.stream_unary(
+                '/veiculos.GestaoVeiculos/ImportarVeiculos',
+                request_serializer=veiculos__pb2.Veiculo.SerializeToString,
+                response_deserializer=veiculos__pb2.ResultadoImportacao.FromString,
+                _registered_method=True)
+        self.WatchVeiculos = channel.unary_stream(
+                '/veiculos.GestaoVeiculos/WatchVeiculos',
+                request_serializer=veiculos__pb2.Empty.SerializeToString,
+                response_deserializer=veiculos__pb2.EventoVeiculo.FromString,
+                _registered_method=True)
 
 
 class GestaoVeiculosServicer(object):
@@ -66,12 +96,50 @@ class GestaoVeiculosServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def BuscaPorIds(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def BuscarPorPlaca(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def BuscarPorPlacas(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamVeiculos(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListarPagina(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ImportarVeiculos(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchVeiculos(self, request, context):
+        """Estado atual e alterações seguintes. Se o stream cair, o cliente deve
+        chamar de novo e recomeçar pelo snapshot (eventos perdidos não são reenviados).
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_GestaoVeiculosServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -85,11 +153,41 @@ def add_GestaoVeiculosServicer_to_server(servicer, server):
                     request_deserializer=veiculos__pb2.VeiculoId.FromString,
                     response_serializer=veiculos__pb2.Veiculo.SerializeToString,
             ),
+            'BuscaPorIds': grpc.unary_unary_rpc_method_handler(
+                    servicer.BuscaPorIds,
+                    request_deserializer=veiculos__pb2.VeiculoIds.FromString,
+                    response_serializer=veiculos__pb2.ResultadoBuscaIds.SerializeToString,
+            ),
             'BuscarPorPlaca': grpc.unary_unary_rpc_method_handler(
                     servicer.BuscarPorPlaca,
                     request_deserializer=veiculos__pb2.VeiculoPlaca.FromString,
                     response_serializer=veiculos__pb2.Veiculo.SerializeToString,
             ),
+            'BuscarPorPlacas': grpc.unary_unary_rpc_method_handler(
+                    servicer.BuscarPorPlacas,
+                    request_deserializer=veiculos__pb2.VeiculoPlacas.FromString,
+                    response_serializer=veiculos__pb2.ResultadoBuscaPlacas.SerializeToString,
+            ),
+            'StreamVeiculos': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamVeiculos,
+                    request_deserializer=veiculos__pb2.Empty.FromString,
+                    response_serializer=veiculos__pb2.Veiculo.SerializeToString,
+            ),
+            'ListarPagina': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListarPagina,
+                    request_deserializer=veiculos__pb2.PaginaRequest.FromString,
+                    response_serializer=veiculos__pb2.PaginaVeiculos.SerializeToString,
+            ),
+            'ImportarVeiculos': grpc.stream_unary_rpc_method_handler(
+                    servicer.ImportarVeiculos,
+                    request_deserializer=veiculos__pb2.Veiculo.FromString,
+                    response_serializer=veiculos__pb2.ResultadoImportacao.SerializeToString,
+            ),
+            'WatchVeiculos': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchVeiculos,
+                    request_deserializer=veiculos__pb2.Empty.FromString,
+                    response_serializer=veiculos__pb2.EventoVeiculo.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'veiculos.GestaoVeiculos', rpc_method_handlers)
@@ -155,6 +253,33 @@ class GestaoVeiculos(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def BuscaPorIds(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/veiculos.GestaoVeiculos/BuscaPorIds',
+            veiculos__pb2.VeiculoIds.SerializeToString,
+            veiculos__pb2.ResultadoBuscaIds.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def BuscarPorPlaca(request,
             target,
@@ -181,3 +306,138 @@ class GestaoVeiculos(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def BuscarPorPlacas(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/veiculos.GestaoVeiculos/BuscarPorPlacas',
+            veiculos__pb2.VeiculoPlacas.SerializeToString,
+            veiculos__pb2.ResultadoBuscaPlacas.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamVeiculos(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/veiculos.GestaoVeiculos/StreamVeiculos',
+            veiculos__pb2.Empty.SerializeToString,
+            veiculos__pb2.Veiculo.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ListarPagina(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/veiculos.GestaoVeiculos/ListarPagina',
+            veiculos__pb2.PaginaRequest.SerializeToString,
+            veiculos__pb2.PaginaVeiculos.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ImportarVeiculos(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/veiculos.GestaoVeiculos/ImportarVeiculos',
+            veiculos__pb2.Veiculo.SerializeToString,
+            veiculos__pb2.ResultadoImportacao.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def WatchVeiculos(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/veiculos.GestaoVeiculos/WatchVeiculos',
+            veiculos__pb2.Empty.SerializeToString,
+            veiculos__pb2.EventoVeiculo.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
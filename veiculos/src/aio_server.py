@@ -0,0 +1,373 @@
+import os
+import sys
+import signal
+import asyncio
+from concurrent import futures
+
+import grpc
+import asyncpg
+from grpc_health.v1 import health_pb2_grpc
+from grpc_health.v1.health import aio as health_aio
+
+import veiculos_pb2
+import veiculos_pb2_grpc
+import comum
+from comum import (
+    DB_HOST, DB_NAME, DB_USER, DB_PASSWORD, GRPC_MAX_WORKERS, STATS_INTERVAL_SECONDS,
+    STREAM_BATCH_SIZE, WATCH_MAX_PENDENTES, METRICS_ENABLED, TRACE_ENABLED, to_veiculo, validar_placas,
+    resultado_placas, parse_id, validar_ids, resultado_ids, validar_pagina, montar_pagina,
+    configurar_rastreamento, configurar_logs, LOG_RPC_LENTO_MS, log, log_db,
+    HEALTH_INTERVAL_SECONDS, HEALTH_TIMEOUT_SECONDS, SERVICO_SAUDE, SHUTDOWN_DELAY_SECONDS, SHUTDOWN_GRACE_SECONDS,
+    GRPC_PORT, porta_metricas, argumentos_servidor
+)
+from server import GestaoVeiculosServicer
+from watch import AssinaturaAsync
+from metricas import InterceptorMetricasAsync, iniciar_servidor_metricas, medir_consulta
+import rastreamento
+from rastreamento import ConexaoRastreadaMixin, InterceptorRastreamentoAsync
+import logs
+from logs import InterceptorLogsAsync
+from saude import MonitorSaude
+import configuracao
+
+AIO_DB_POOL_MIN_SIZE = int(os.getenv("AIO_DB_POOL_MIN_SIZE", "2"))
+AIO_DB_POOL_SIZE = int(os.getenv("AIO_DB_POOL_SIZE", "50"))
+# O pool psycopg2 continua existindo, mas aqui só atende os RPCs herdados ainda síncronos
+# e o health check: limitado a poucas conexões, o processo não mantém dois pools cheios.
+AIO_DB_SYNC_POOL_SIZE = int(os.getenv("AIO_DB_SYNC_POOL_SIZE", "4"))
+AIO_WATCH_MAX_ASSINATURAS = int(os.getenv("AIO_WATCH_MAX_ASSINATURAS", "1000"))
+
+
+class ConexaoRastreada(ConexaoRastreadaMixin, asyncpg.Connection):
+    """Conexões do pool asyncpg; sem rastreamento configurado só repassam as chamadas."""
+
+
+class AsyncVeiculosDB:
+    """Acesso ao banco com asyncpg, usado pelos RPCs assíncronos do modo asyncio."""
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    @classmethod
+    async def create(cls, min_size=AIO_DB_POOL_MIN_SIZE, max_size=AIO_DB_POOL_SIZE):
+        pool = await asyncpg.create_pool(
+            host=DB_HOST,
+            database=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            min_size=min_size,
+            max_size=max_size,
+            connection_class=ConexaoRastreada
+        )
+        log_db.info(f"Pool asyncpg com o PostgreSQL criado ({max_size} conexões no máximo).")
+        return cls(pool)
+
+    @medir_consulta
+    async def fetch_all(self):
+        return await self._pool.fetch("SELECT id, placa, modelo, ano FROM veiculos;")
+
+    @medir_consulta
+    async def fetch_by_placa(self, placa):
+        return await self._pool.fetchrow("SELECT id, placa, modelo, ano FROM veiculos WHERE placa = $1;", placa)
+
+    @medir_consulta
+    async def fetch_by_id(self, veiculo_id):
+        return await self._pool.fetchrow("SELECT id, placa, modelo, ano FROM veiculos WHERE id = $1;", veiculo_id)
+
+    @medir_consulta
+    async def fetch_by_ids(self, ids):
+        return await self._pool.fetch(
+            "SELECT id, placa, modelo, ano FROM veiculos WHERE id = ANY($1::integer[]);", list(ids)
+        )
+
+    @medir_consulta
+    async def fetch_by_placas(self, placas):
+        return await self._pool.fetch(
+            "SELECT id, placa, modelo, ano FROM veiculos WHERE placa = ANY($1::varchar[]);", list(placas)
+        )
+
+    @medir_consulta
+    async def iter_all(self, batch_size=STREAM_BATCH_SIZE):
+        """Percorre todos os veiculos em lotes, com um cursor do lado do servidor."""
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                cursor = await conn.cursor("SELECT id, placa, modelo, ano FROM veiculos ORDER BY id;")
+                while True:
+                    rows = await cursor.fetch(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+
+    @medir_consulta
+    async def fetch_page(self, after_id, limit):
+        return await self._pool.fetch(
+            "SELECT id, placa, modelo, ano FROM veiculos WHERE id > $1 ORDER BY id LIMIT $2;", after_id, limit
+        )
+
+    def stats(self):
+        return {
+            "size": self._pool.get_size(),
+            "max_size": self._pool.get_max_size(),
+            "idle": self._pool.get_idle_size(),
+        }
+
+    @medir_consulta
+    async def verificar(self):
+        return await self._pool.fetchval("SELECT 1;") == 1
+
+    async def close(self):
+        await self._pool.close()
+
+
+class AsyncGestaoVeiculosServicer(GestaoVeiculosServicer):
+    """
+    Servicer do modo asyncio.
+
+    Os RPCs de leitura abaixo são corrotinas sobre o asyncpg e não ocupam
+    threads. Os RPCs herdados sem versão assíncrona continuam síncronos e são
+    executados pelo `migration_thread_pool` do grpc.aio com o pool psycopg2.
+    """
+
+    def __init__(self, aio_db):
+        super().__init__(max_assinaturas_watch=AIO_WATCH_MAX_ASSINATURAS, db_pool_size=AIO_DB_SYNC_POOL_SIZE)
+        self.aio_db = aio_db
+
+    async def close(self):
+        await self.aio_db.close()
+        # o close síncrono espera threads e fecha o pool psycopg2: fora do loop
+        await asyncio.to_thread(super().close)
+
+    async def _buscar_placa_async(self, placa):
+        encontrados, faltantes, geracao = self._consultar_cache([placa])
+        if not faltantes:
+            return encontrados.get(placa)
+        veiculo_row = await self.aio_db.fetch_by_placa(placa)
+        self._guardar_no_cache(faltantes, [veiculo_row] if veiculo_row else [], geracao)
+        return veiculo_row
+
+    async def _buscar_placas_async(self, placas):
+        encontrados, faltantes, geracao = self._consultar_cache(placas)
+        if faltantes:
+            rows = await self.aio_db.fetch_by_placas(faltantes)
+            self._guardar_no_cache(faltantes, rows, geracao)
+            for row in rows:
+                encontrados[row[1]] = row
+        return encontrados
+
+    async def _buscar_id_async(self, veiculo_id):
+        encontrados, faltantes, geracao = self._consultar_cache([veiculo_id], por_id=True)
+        if not faltantes:
+            return encontrados.get(veiculo_id)
+        veiculo_row = await self.aio_db.fetch_by_id(veiculo_id)
+        self._guardar_no_cache(faltantes, [veiculo_row] if veiculo_row else [], geracao, por_id=True)
+        return veiculo_row
+
+    async def _buscar_ids_async(self, ids):
+        encontrados, faltantes, geracao = self._consultar_cache(ids, por_id=True)
+        if faltantes:
+            rows = await self.aio_db.fetch_by_ids(faltantes)
+            self._guardar_no_cache(faltantes, rows, geracao, por_id=True)
+            for row in rows:
+                encontrados[row[0]] = row
+        return encontrados
+
+    def stats(self):
+        stats = super().stats()
+        stats["pool_asyncio"] = self.aio_db.stats()
+        return stats
+
+    async def ListarTodos(self, request, context):
+        try:
+            rows = await self.aio_db.fetch_all()
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Erro no acesso ao DB: {str(e)}")
+            return veiculos_pb2.ListaVeiculos()
+        return veiculos_pb2.ListaVeiculos(items=[to_veiculo(row) for row in rows])
+
+    async def BuscaPorId(self, request, context):
+        try:
+            veiculo_id = parse_id(request.id)
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return veiculos_pb2.Veiculo()
+
+        try:
+            veiculo_row = await self._buscar_id_async(veiculo_id)
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Erro no acesso ao DB: {str(e)}")
+            return veiculos_pb2.Veiculo()
+
+        if veiculo_row:
+            return to_veiculo(veiculo_row)
+        context.set_code(grpc.StatusCode.NOT_FOUND)
+        context.set_details(f"Veículo com id {veiculo_id} não encontrado.")
+        return veiculos_pb2.Veiculo()
+
+    async def BuscaPorIds(self, request, context):
+        ids = validar_ids(request, context)
+        if ids is None:
+            return veiculos_pb2.ResultadoBuscaIds()
+        try:
+            encontrados = await self._buscar_ids_async(ids)
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Erro no acesso ao DB: {str(e)}")
+            return veiculos_pb2.ResultadoBuscaIds()
+        return resultado_ids(ids, encontrados)
+
+    async def BuscarPorPlaca(self, request, context):
+        logs.adicionar_campos(placa=request.placa)
+        try:
+            veiculo_row = await self._buscar_placa_async(request.placa)
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Erro no acesso ao DB: {str(e)}")
+            return veiculos_pb2.Veiculo()
+
+        if veiculo_row:
+            return to_veiculo(veiculo_row)
+        context.set_code(grpc.StatusCode.NOT_FOUND)
+        context.set_details(f"Veículo com placa {request.placa} não encontrado.")
+        return veiculos_pb2.Veiculo()
+
+    async def BuscarPorPlacas(self, request, context):
+        placas = validar_placas(request, context)
+        if placas is None:
+            return veiculos_pb2.ResultadoBuscaPlacas()
+        try:
+            encontrados = await self._buscar_placas_async(placas)
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Erro no acesso ao DB: {str(e)}")
+            return veiculos_pb2.ResultadoBuscaPlacas()
+        return resultado_placas(placas, encontrados)
+
+    async def StreamVeiculos(self, request, context):
+        try:
+            async for rows in self.aio_db.iter_all():
+                for row in rows:
+                    yield to_veiculo(row)
+        except Exception as e:
+            await context.abort(grpc.StatusCode.INTERNAL, f"Erro no acesso ao DB: {str(e)}")
+
+    async def ListarPagina(self, request, context):
+        pagina = validar_pagina(request, context)
+        if pagina is None:
+            return veiculos_pb2.PaginaVeiculos()
+        after_id, page_size = pagina
+        try:
+            rows = await self.aio_db.fetch_page(after_id, page_size + 1)
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Erro no acesso ao DB: {str(e)}")
+            return veiculos_pb2.PaginaVeiculos()
+        return montar_pagina(rows, page_size)
+
+    async def WatchVeiculos(self, request, context):
+        if not self.listener.listening:
+            await context.abort(grpc.StatusCode.UNAVAILABLE, "Escuta de alterações indisponível.")
+
+        assinatura = AssinaturaAsync(WATCH_MAX_PENDENTES, asyncio.get_running_loop())
+        if not self.watchers.adicionar(assinatura):
+            await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "Limite de streams de WatchVeiculos atingido.")
+        try:
+            try:
+                async for rows in self.aio_db.iter_all():
+                    for row in rows:
+                        yield veiculos_pb2.EventoVeiculo(
+                            tipo=veiculos_pb2.EventoVeiculo.SNAPSHOT, veiculo=to_veiculo(row)
+                        )
+            except Exception as e:
+                await context.abort(grpc.StatusCode.INTERNAL, f"Erro no acesso ao DB: {str(e)}")
+            yield veiculos_pb2.EventoVeiculo(tipo=veiculos_pb2.EventoVeiculo.SNAPSHOT_FIM)
+
+            while True:
+                eventos = await assinatura.proximos_async()
+                if not eventos:
+                    break
+                for evento in eventos:
+                    yield evento
+        finally:
+            # também no cancelamento pelo cliente (CancelledError)
+            self.watchers.remover(assinatura)
+
+        codigo, detalhes = assinatura.fim
+        await context.abort(grpc.StatusCode[codigo], detalhes)
+
+
+async def serve_aio():
+    aio_db = await AsyncVeiculosDB.create()
+    servicer = AsyncGestaoVeiculosServicer(aio_db)
+
+    interceptors = [InterceptorMetricasAsync()] if METRICS_ENABLED else []
+    if TRACE_ENABLED:
+        configurar_rastreamento()
+        interceptors.append(InterceptorRastreamentoAsync())
+    interceptors.append(InterceptorLogsAsync(LOG_RPC_LENTO_MS))
+    server = grpc.aio.server(
+        migration_thread_pool=futures.ThreadPoolExecutor(max_workers=GRPC_MAX_WORKERS),
+        **argumentos_servidor(interceptors)
+    )
+    veiculos_pb2_grpc.add_GestaoVeiculosServicer_to_server(servicer, server)
+    saude = health_aio.HealthServicer()
+    health_pb2_grpc.add_HealthServicer_to_server(saude, server)
+    loop = asyncio.get_running_loop()
+
+    # o monitor roda numa thread: o status e a verificação do asyncpg passam pelo event loop
+    def definir(nome, status):
+        asyncio.run_coroutine_threadsafe(saude.set(nome, status), loop)
+
+    def verificar_asyncpg():
+        return asyncio.run_coroutine_threadsafe(aio_db.verificar(), loop).result(HEALTH_TIMEOUT_SECONDS)
+
+    verificacoes = servicer.verificacoes_saude() + [("db_asyncio", verificar_asyncpg, True)]
+    servicer.saude = MonitorSaude(definir, SERVICO_SAUDE, verificacoes, HEALTH_INTERVAL_SECONDS)
+    server.add_insecure_port(f'[::]:{GRPC_PORT}')
+    await server.start()
+    servicer.saude.start()
+    if METRICS_ENABLED:
+        iniciar_servidor_metricas(porta_metricas(), "veiculos", servicer.stats)
+
+    log.info(f"Microserviço de Gestão de Veiculos rodando na porta {GRPC_PORT} (modo asyncio).")
+
+    parar = asyncio.Event()
+    for sinal in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sinal, parar.set)
+
+    try:
+        loop_counter = 0
+        while not parar.is_set():
+            loop_counter += 1
+            log.info("Servidor gRPC ativo.", extra={"loop": loop_counter, "stats": servicer.stats()})
+            try:
+                await asyncio.wait_for(parar.wait(), STATS_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+        log.info("Encerrando: NOT_SERVING e drenagem dos RPCs em andamento.", extra={"grace_seconds": SHUTDOWN_GRACE_SECONDS})
+        await asyncio.to_thread(servicer.saude.encerrar)
+        await asyncio.sleep(SHUTDOWN_DELAY_SECONDS)
+        # streams de WatchVeiculos não terminam sozinhos: os clientes reassinam em outra instância
+        servicer.watchers.encerrar_todas("UNAVAILABLE", "Servidor encerrando.")
+    finally:
+        await server.stop(SHUTDOWN_GRACE_SECONDS)
+        await servicer.close()
+        rastreamento.encerrar()
+        log.info("Servidor encerrado.")
+
+
+def serve():
+    configurar_logs()
+    log.info("Configuração efetiva.", extra={"config": configuracao.efetiva(comum, sys.modules[__name__])})
+    try:
+        asyncio.run(serve_aio())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logs.encerrar()
+
+
+if __name__ == '__main__':
+    serve()
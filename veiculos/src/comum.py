@@ -0,0 +1,251 @@
+import os
+import base64
+import binascii
+import logging
+
+import grpc
+from dotenv import load_dotenv
+
+import veiculos_pb2
+import rastreamento
+import logs
+import configuracao
+import prefork
+
+# Configuração lida do ambiente e funções usadas pelos dois modos do servidor
+# (server.py e aio_server.py).
+
+# variáveis do .env (se existir) valem como padrão; as do ambiente têm precedência
+load_dotenv()
+
+log = logging.getLogger("servidor")
+log_db = logging.getLogger("db")
+
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_NAME = os.getenv("DB_NAME", "frota_veiculos")
+DB_USER = os.getenv("DB_USER", "admin")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "admin")
+GRPC_MAX_WORKERS = int(os.getenv("GRPC_MAX_WORKERS", "10"))
+STATS_INTERVAL_SECONDS = int(os.getenv("STATS_INTERVAL_SECONDS", "300"))
+
+# Servidor gRPC (ver configuracao.py). GRPC_MAX_CONCURRENT_RPCS limita os RPCs aceitos ao
+# mesmo tempo, acima disso o cliente recebe RESOURCE_EXHAUSTED (0 = sem limite). Tamanhos
+# de mensagem em bytes (-1 = sem limite); keepalive com 0 fica com o padrão do gRPC.
+# Streams abertos (o WatchVeiculos da réplica do MS Manutenções) também contam no limite.
+# GRPC_COMPRESSION ("none", "gzip" ou "deflate") é a compressão padrão das respostas.
+GRPC_PORT = int(os.getenv("GRPC_PORT", "50051"))
+GRPC_MAX_CONCURRENT_RPCS = int(os.getenv("GRPC_MAX_CONCURRENT_RPCS", "0"))
+GRPC_MAX_RECEIVE_MESSAGE_BYTES = int(os.getenv("GRPC_MAX_RECEIVE_MESSAGE_BYTES", str(4 * 1024 * 1024)))
+GRPC_MAX_SEND_MESSAGE_BYTES = int(os.getenv("GRPC_MAX_SEND_MESSAGE_BYTES", "-1"))
+GRPC_KEEPALIVE_TIME_MS = int(os.getenv("GRPC_KEEPALIVE_TIME_MS", "0"))
+GRPC_KEEPALIVE_TIMEOUT_MS = int(os.getenv("GRPC_KEEPALIVE_TIMEOUT_MS", "0"))
+GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS = os.getenv("GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS", "0") == "1"
+GRPC_MIN_PING_INTERVAL_MS = int(os.getenv("GRPC_MIN_PING_INTERVAL_MS", "0"))
+GRPC_COMPRESSION = os.getenv("GRPC_COMPRESSION", "none")
+
+# Modo multiprocesso (ver prefork.py): com SERVER_PROCESSES diferente de 1 este processo só
+# supervisiona SERVER_PROCESSES servidores (0 = um por CPU) na mesma porta, com SO_REUSEPORT.
+# Cada um tem os seus pools (o banco recebe SERVER_PROCESSES vezes as conexões), o seu
+# endpoint de métricas em METRICS_PORT + índice e o seu arquivo de traces.
+SERVER_PROCESSES = int(os.getenv("SERVER_PROCESSES", "1"))
+# definido pelo supervisor em cada processo servidor; -1 fora do modo multiprocesso
+SERVER_PROCESS_INDEX = int(os.getenv(prefork.VARIAVEL_INDICE, "-1"))
+
+# Endpoint /metrics (Prometheus) com latência por RPC e por consulta ao banco, além
+# dos valores de stats().
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9101"))
+
+# Rastreamento distribuído (ver rastreamento.py): um span por RPC, por comando SQL e por
+# chamada a outro serviço, propagados no cabeçalho `traceparent`. TRACE_SAMPLE_RATE é a
+# fração dos RPCs sem trace de origem que são registrados; TRACE_EXPORTER "arquivo" grava
+# os spans em JSON lines em TRACE_FILE (fora de /app, que o docker-compose monta a partir
+# do código), "modulo:Classe" usa um exportador próprio.
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "0") == "1"
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "arquivo")
+TRACE_FILE = os.getenv("TRACE_FILE", "/tmp/traces_veiculos.jsonl")
+
+# Logs em JSON no stdout, escritos por uma thread própria (ver logs.py). LOG_LEVELS ajusta
+# loggers específicos ("rpc=DEBUG,db=WARNING"); LOG_DEBUG_SAMPLE_RATE é a fração dos
+# registros DEBUG mantidos. Cada RPC é registrado no logger "rpc": em DEBUG, ou em WARNING
+# se passar de LOG_RPC_LENTO_MS ou terminar em erro interno.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_RPC_LENTO_MS = float(os.getenv("LOG_RPC_LENTO_MS", "1000"))
+
+# grpc.health.v1: o status geral e o do serviço ficam SERVING só enquanto as verificações
+# obrigatórias passam, repetidas a cada HEALTH_INTERVAL_SECONDS (ver saude.py).
+HEALTH_INTERVAL_SECONDS = float(os.getenv("HEALTH_INTERVAL_SECONDS", "5"))
+HEALTH_TIMEOUT_SECONDS = float(os.getenv("HEALTH_TIMEOUT_SECONDS", "2"))
+SERVICO_SAUDE = veiculos_pb2.DESCRIPTOR.services_by_name["GestaoVeiculos"].full_name
+
+# SIGTERM/SIGINT: o health passa a NOT_SERVING, espera-se SHUTDOWN_DELAY_SECONDS para o
+# balanceador tirar a instância de rotação e os RPCs em andamento têm até
+# SHUTDOWN_GRACE_SECONDS para terminar antes de os pools serem fechados.
+SHUTDOWN_DELAY_SECONDS = float(os.getenv("SHUTDOWN_DELAY_SECONDS", "0"))
+SHUTDOWN_GRACE_SECONDS = float(os.getenv("SHUTDOWN_GRACE_SECONDS", "20"))
+
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+
+MAX_BATCH_PLACAS = int(os.getenv("MAX_BATCH_PLACAS", "1000"))
+MAX_BATCH_IDS = int(os.getenv("MAX_BATCH_IDS", "5000"))
+
+# WatchVeiculos: eventos acumulados por cliente antes de ele ser desconectado por não acompanhar.
+WATCH_MAX_PENDENTES = int(os.getenv("WATCH_MAX_PENDENTES", "10000"))
+
+
+def to_veiculo(row):
+    v_id, placa, modelo, ano = row
+    return veiculos_pb2.Veiculo(
+        id=str(v_id),
+        placa=placa,
+        modelo=modelo,
+        ano=ano
+    )
+
+
+def _encode_page_token(last_id):
+    return base64.urlsafe_b64encode(f"v1:{last_id}".encode()).decode()
+
+
+def _decode_page_token(token):
+    """Devolve o último id da página anterior; levanta ValueError se o token for inválido."""
+    if not token:
+        return 0
+    try:
+        version, last_id = base64.urlsafe_b64decode(token.encode()).decode().split(":", 1)
+        if version != "v1":
+            raise ValueError
+        return int(last_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("page_token inválido")
+
+
+def validar_placas(request, context):
+    """Placas do pedido sem repetição; None (com o erro no contexto) se passar do limite."""
+    placas = list(dict.fromkeys(request.placas))
+    if len(placas) > MAX_BATCH_PLACAS:
+        context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+        context.set_details(f"Máximo de {MAX_BATCH_PLACAS} placas por chamada ({len(placas)} recebidas).")
+        return None
+    return placas
+
+
+def resultado_placas(placas, encontrados):
+    resultado = veiculos_pb2.ResultadoBuscaPlacas()
+    for placa in placas:
+        if placa in encontrados:
+            resultado.items.append(to_veiculo(encontrados[placa]))
+        else:
+            resultado.nao_encontradas.append(placa)
+    return resultado
+
+
+def parse_id(valor):
+    """Converte o id recebido no pedido; levanta ValueError se não for um inteiro positivo."""
+    try:
+        veiculo_id = int(valor)
+    except ValueError:
+        raise ValueError(f"id de veículo inválido: {valor!r}")
+    # a coluna id é SERIAL (integer de 32 bits)
+    if not 0 < veiculo_id <= 2147483647:
+        raise ValueError(f"id de veículo inválido: {valor!r}")
+    return veiculo_id
+
+
+def validar_ids(request, context):
+    """Ids do pedido convertidos e sem repetição; None (com o erro no contexto) se inválidos."""
+    try:
+        ids = list(dict.fromkeys(parse_id(valor) for valor in request.ids))
+    except ValueError as e:
+        context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+        context.set_details(str(e))
+        return None
+    if len(ids) > MAX_BATCH_IDS:
+        context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+        context.set_details(f"Máximo de {MAX_BATCH_IDS} ids por chamada ({len(ids)} recebidos).")
+        return None
+    return ids
+
+
+def resultado_ids(ids, encontrados):
+    resultado = veiculos_pb2.ResultadoBuscaIds()
+    for veiculo_id in ids:
+        if veiculo_id in encontrados:
+            resultado.items.append(to_veiculo(encontrados[veiculo_id]))
+        else:
+            resultado.nao_encontrados.append(str(veiculo_id))
+    return resultado
+
+
+def validar_pagina(request, context):
+    """Devolve (after_id, page_size) do pedido; None (com o erro no contexto) se for inválido."""
+    page_size = request.page_size or DEFAULT_PAGE_SIZE
+    if page_size < 0:
+        context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+        context.set_details("page_size não pode ser negativo.")
+        return None
+    try:
+        after_id = _decode_page_token(request.page_token)
+    except ValueError as e:
+        context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+        context.set_details(str(e))
+        return None
+    return after_id, min(page_size, MAX_PAGE_SIZE)
+
+
+def montar_pagina(rows, page_size):
+    """Monta a página a partir de até `page_size + 1` linhas; a linha extra indica que há mais."""
+    next_page_token = ""
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_page_token = _encode_page_token(rows[-1][0])
+    return veiculos_pb2.PaginaVeiculos(
+        items=[to_veiculo(row) for row in rows],
+        next_page_token=next_page_token
+    )
+
+
+def configurar_logs(processo=None):
+    if processo is None and SERVER_PROCESS_INDEX >= 0:
+        processo = SERVER_PROCESS_INDEX
+    logs.configurar("veiculos", LOG_LEVEL, LOG_LEVELS, LOG_DEBUG_SAMPLE_RATE, LOG_QUEUE_SIZE, processo)
+
+
+def configurar_rastreamento():
+    arquivo = TRACE_FILE
+    if SERVER_PROCESS_INDEX >= 0:
+        arquivo = prefork.arquivo_do_processo(TRACE_FILE, SERVER_PROCESS_INDEX)
+    exportador = rastreamento.criar_exportador(TRACE_EXPORTER, arquivo)
+    rastreamento.configurar("veiculos", exportador, TRACE_SAMPLE_RATE)
+    log.info(f"Rastreamento ativo (amostragem {TRACE_SAMPLE_RATE:.2%}, exportador {TRACE_EXPORTER}).")
+
+
+def argumentos_servidor(interceptors):
+    """Argumentos comuns a grpc.server e grpc.aio.server, lidos do ambiente."""
+    opcoes = configuracao.opcoes_grpc(
+        GRPC_MAX_RECEIVE_MESSAGE_BYTES, GRPC_MAX_SEND_MESSAGE_BYTES,
+        GRPC_KEEPALIVE_TIME_MS, GRPC_KEEPALIVE_TIMEOUT_MS,
+        GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS, GRPC_MIN_PING_INTERVAL_MS
+    )
+    if SERVER_PROCESSES != 1:
+        # todos os processos do supervisor ouvem a mesma porta
+        opcoes.append(("grpc.so_reuseport", 1))
+    return dict(
+        interceptors=interceptors,
+        options=opcoes,
+        maximum_concurrent_rpcs=GRPC_MAX_CONCURRENT_RPCS or None,
+        compression=configuracao.compressao(GRPC_COMPRESSION)
+    )
+
+
+def porta_metricas():
+    """No modo multiprocesso cada processo tem o seu endpoint: METRICS_PORT + índice."""
+    return METRICS_PORT + max(SERVER_PROCESS_INDEX, 0)
+
+
@@ -0,0 +1,64 @@
+import grpc
+
+# Ajustes do gRPC e do servidor lidos do ambiente (e do .env, carregado pelo server.py
+# antes das constantes). Aqui ficam só as conversões para o formato do grpcio e o
+# resumo da configuração efetiva registrado na inicialização.
+
+_COMPRESSOES = {
+    "none": grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+
+# partes de nomes de constantes cujo valor não vai para o log
+_SEGREDOS = ("PASSWORD", "SECRET", "TOKEN")
+
+
+def compressao(nome):
+    """"none", "gzip" ou "deflate" -> grpc.Compression."""
+    try:
+        return _COMPRESSOES[nome.strip().lower()]
+    except KeyError:
+        raise ValueError(f"Compressão desconhecida: {nome!r} (use none, gzip ou deflate).") from None
+
+
+def opcoes_grpc(max_recebida, max_enviada, keepalive_ms=0, keepalive_timeout_ms=0,
+                keepalive_sem_chamadas=False, min_intervalo_ping_ms=0):
+    """
+    Opções de canal/servidor do grpcio. Tamanhos em bytes (-1 = sem limite); os
+    tempos com valor 0 ficam com o padrão do gRPC. `min_intervalo_ping_ms` só vale
+    para o servidor: o menor intervalo entre pings de keepalive que ele aceita.
+    """
+    opcoes = [
+        ("grpc.max_receive_message_length", max_recebida),
+        ("grpc.max_send_message_length", max_enviada),
+    ]
+    if keepalive_ms > 0:
+        opcoes.append(("grpc.keepalive_time_ms", keepalive_ms))
+    if keepalive_timeout_ms > 0:
+        opcoes.append(("grpc.keepalive_timeout_ms", keepalive_timeout_ms))
+    if keepalive_sem_chamadas:
+        opcoes.append(("grpc.keepalive_permit_without_calls", 1))
+    if min_intervalo_ping_ms > 0:
+        opcoes.append(("grpc.http2.min_recv_ping_interval_without_data_ms", min_intervalo_ping_ms))
+    return opcoes
+
+
+def efetiva(*modulos):
+    """
+    Constantes de configuração (NOMES_EM_MAIÚSCULAS com valores simples) dos módulos,
+    com os segredos mascarados. SQL e outros textos de várias linhas ficam de fora.
+    """
+    config = {}
+    for modulo in modulos:
+        for nome, valor in vars(modulo).items():
+            if not nome.isupper() or nome.startswith("_"):
+                continue
+            if not isinstance(valor, (str, int, float, bool, list, tuple, type(None))):
+                continue
+            if isinstance(valor, str) and "\n" in valor:
+                continue
+            if any(parte in nome for parte in _SEGREDOS):
+                valor = "***"
+            config[nome] = valor
+    return config
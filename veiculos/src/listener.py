@@ -0,0 +1,85 @@
+import json
+import logging
+import select
+import threading
+
+import psycopg2
+
+log = logging.getLogger("listener")
+
+
+class ChangeListener:
+    """
+    Escuta um canal LISTEN/NOTIFY do PostgreSQL numa thread própria.
+
+    Cada notificação é decodificada como JSON e entregue a `on_change`.
+    Sempre que a escuta começa (ou recomeça depois de uma queda) `on_reset` é
+    chamado, porque notificações enviadas enquanto estávamos desconectados se
+    perderam. `listening` indica se as notificações estão chegando agora.
+    """
+
+    def __init__(self, connect_kwargs, channel, on_change, on_reset=None,
+                 retry_delay_seconds=5, poll_timeout=5.0):
+        self._connect_kwargs = connect_kwargs
+        self._channel = channel
+        self._on_change = on_change
+        self._on_reset = on_reset
+        self._retry_delay_seconds = retry_delay_seconds
+        self._poll_timeout = poll_timeout
+
+        self._listening = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"listen-{channel}", daemon=True)
+
+    @property
+    def listening(self):
+        return self._listening.is_set()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._thread.join(timeout=self._poll_timeout + 1)
+
+    def wait_listening(self, timeout=None):
+        return self._listening.wait(timeout)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**self._connect_kwargs)
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self._channel};")
+                if self._on_reset is not None:
+                    self._on_reset()
+                self._listening.set()
+                log.info(f"Escutando notificações do canal '{self._channel}'.")
+
+                while not self._stopping.is_set():
+                    if select.select([conn], [], [], self._poll_timeout) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self._dispatch(notify.payload)
+            except psycopg2.Error as e:
+                log.warning(f"Escuta do canal '{self._channel}' interrompida: {e}. Nova tentativa em {self._retry_delay_seconds}s.")
+            finally:
+                self._listening.clear()
+                if conn is not None:
+                    conn.close()
+            self._stopping.wait(self._retry_delay_seconds)
+
+    def _dispatch(self, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            log.warning(f"Notificação inválida no canal '{self._channel}': {payload!r}")
+            return
+        try:
+            self._on_change(event)
+        except Exception as e:
+            log.error(f"Erro ao processar notificação do canal '{self._channel}': {e}")
@@ -0,0 +1,101 @@
+import os
+import time
+import signal
+import logging
+import threading
+import subprocess
+
+# Modo multiprocesso: a serialização protobuf e a montagem das mensagens são Python
+# preso ao GIL, então um processo só não passa de um núcleo. O supervisor sobe N cópias
+# do servidor, cada uma com os seus pools, todas ouvindo a mesma porta com SO_REUSEPORT
+# (o kernel distribui as conexões entre elas).
+
+log = logging.getLogger("supervisor")
+
+# variável de ambiente com o índice (0..N-1) de cada processo servidor
+VARIAVEL_INDICE = "SERVER_PROCESS_INDEX"
+
+# um processo que cai antes disso volta com espera crescente, até REINICIO_MAX_SECONDS
+ESTAVEL_SECONDS = 10
+REINICIO_MIN_SECONDS = 1
+REINICIO_MAX_SECONDS = 30
+
+
+def arquivo_do_processo(caminho, indice):
+    """"traces.jsonl", 2 -> "traces.2.jsonl": escritas de processos diferentes não se misturam."""
+    raiz, extensao = os.path.splitext(caminho)
+    return f"{raiz}.{indice}{extensao}"
+
+
+class Supervisor:
+    """
+    Mantém `processos` cópias de `comando` rodando, cada uma com o seu índice no ambiente.
+    A que terminar sem o supervisor estar encerrando é reiniciada. SIGTERM/SIGINT são
+    repassados como SIGTERM, e quem não terminar em `espera_encerramento` segundos leva SIGKILL.
+    """
+
+    def __init__(self, comando, processos, espera_encerramento):
+        self._comando = comando
+        self._processos = processos
+        self._espera_encerramento = espera_encerramento
+        self._parar = threading.Event()
+        self._filhos = {}  # indice -> Popen
+        self._inicios = {}
+        self._atrasos = {}
+        self._reinicios = 0
+
+    def _iniciar(self, indice):
+        env = dict(os.environ, **{VARIAVEL_INDICE: str(indice)})
+        filho = subprocess.Popen(self._comando, env=env)
+        self._filhos[indice] = filho
+        self._inicios[indice] = time.monotonic()
+        log.info("Processo servidor iniciado.", extra={"indice": indice, "pid": filho.pid})
+
+    def executar(self):
+        """Bloqueia até receber SIGTERM/SIGINT e encerrar todos os processos."""
+        for sinal in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sinal, lambda *_: self._parar.set())
+        for indice in range(self._processos):
+            self._iniciar(indice)
+
+        pendentes = {}  # indice -> quando reiniciar
+        while not self._parar.is_set():
+            agora = time.monotonic()
+            for indice, filho in list(self._filhos.items()):
+                codigo = filho.poll()
+                if codigo is None:
+                    continue
+                del self._filhos[indice]
+                if agora - self._inicios[indice] >= ESTAVEL_SECONDS:
+                    atraso = REINICIO_MIN_SECONDS
+                else:
+                    atraso = min(self._atrasos.get(indice, REINICIO_MIN_SECONDS / 2) * 2, REINICIO_MAX_SECONDS)
+                self._atrasos[indice] = atraso
+                pendentes[indice] = agora + atraso
+                log.warning(
+                    "Processo servidor terminou; será reiniciado.",
+                    extra={"indice": indice, "pid": filho.pid, "codigo": codigo, "reinicio_em_s": atraso}
+                )
+            for indice, quando in list(pendentes.items()):
+                if quando <= agora:
+                    del pendentes[indice]
+                    self._reinicios += 1
+                    self._iniciar(indice)
+            self._parar.wait(0.5)
+
+        self._encerrar()
+
+    def _encerrar(self):
+        log.info("Encerrando os processos servidores.", extra={"processos": len(self._filhos), "reinicios": self._reinicios})
+        for filho in self._filhos.values():
+            if filho.poll() is None:
+                filho.send_signal(signal.SIGTERM)
+        prazo = time.monotonic() + self._espera_encerramento
+        for indice, filho in self._filhos.items():
+            try:
+                filho.wait(max(prazo - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                log.warning("Processo servidor não encerrou no prazo (SIGKILL).", extra={"indice": indice, "pid": filho.pid})
+                filho.kill()
+                filho.wait()
+        self._filhos.clear()
@@ -0,0 +1,86 @@
+import logging
+import threading
+
+from grpc_health.v1 import health_pb2
+
+log = logging.getLogger("saude")
+
+SERVING = health_pb2.HealthCheckResponse.SERVING
+NOT_SERVING = health_pb2.HealthCheckResponse.NOT_SERVING
+
+
+class MonitorSaude:
+    """
+    Mantém o status do grpc.health.v1 a partir de verificações periódicas, numa thread própria.
+
+    O status geral ("") e o de `servico` ficam SERVING só enquanto todas as verificações
+    obrigatórias passam; cada verificação também é publicada como "<servico>.<nome>".
+    Até a primeira rodada tudo fica NOT_SERVING, e depois de `encerrar` não volta mais.
+    """
+
+    def __init__(self, definir, servico, verificacoes, intervalo):
+        # definir(nome, status): HealthServicer.set, ou uma ponte para o do grpc.aio
+        self._definir = definir
+        self._servico = servico
+        self._verificacoes = verificacoes  # [(nome, funcao, obrigatoria)]
+        self._intervalo = intervalo
+        self._lock = threading.Lock()
+        self._parando = threading.Event()
+        self._pronto = False
+        self._resultados = {}
+        self._thread = threading.Thread(target=self._run, name="monitor-saude", daemon=True)
+        self._publicar(NOT_SERVING, {nome: False for nome, _, _ in verificacoes})
+
+    @property
+    def pronto(self):
+        return self._pronto
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        while not self._parando.is_set():
+            self.verificar()
+            self._parando.wait(self._intervalo)
+
+    def verificar(self):
+        resultados = {}
+        for nome, funcao, _ in self._verificacoes:
+            try:
+                resultados[nome] = bool(funcao())
+            except Exception as e:
+                log.warning(f"Verificação de saúde '{nome}' falhou: {e}")
+                resultados[nome] = False
+        pronto = all(resultados[nome] for nome, _, obrigatoria in self._verificacoes if obrigatoria)
+
+        with self._lock:
+            if self._parando.is_set():
+                return
+            if pronto != self._pronto:
+                if pronto:
+                    log.info("Serviço pronto (SERVING).")
+                else:
+                    log.warning("Serviço indisponível (NOT_SERVING).", extra={"verificacoes": resultados})
+            self._pronto = pronto
+            self._publicar(SERVING if pronto else NOT_SERVING, resultados)
+
+    def _publicar(self, status, resultados):
+        self._definir("", status)
+        self._definir(self._servico, status)
+        for nome, ok in resultados.items():
+            if self._resultados.get(nome) != ok:
+                self._definir(f"{self._servico}.{nome}", SERVING if ok else NOT_SERVING)
+        self._resultados = resultados
+
+    def encerrar(self):
+        """Para as verificações e deixa tudo NOT_SERVING (início do desligamento)."""
+        with self._lock:
+            self._parando.set()
+            self._pronto = False
+            self._publicar(NOT_SERVING, {nome: False for nome in self._resultados})
+        if self._thread.is_alive():
+            self._thread.join(timeout=5)
+
+    def stats(self):
+        with self._lock:
+            return {"pronto": self._pronto, **{f"verificacao_{nome}": ok for nome, ok in self._resultados.items()}}
@@ -1,53 +1,126 @@
 import grpc
+import sys
 import time
 import os 
+import signal
+import threading
+import io
 import psycopg2
 from concurrent import futures
+from grpc_health.v1 import health, health_pb2_grpc
 
 import veiculos_pb2
 import veiculos_pb2_grpc
-
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_NAME = os.getenv("DB_NAME", "frota_veiculos")
-DB_USER = os.getenv("DB_USER", "admin")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "admin")
+import comum
+from comum import (
+    DB_HOST, DB_NAME, DB_USER, DB_PASSWORD, GRPC_MAX_WORKERS, STATS_INTERVAL_SECONDS, GRPC_PORT,
+    SERVER_PROCESSES, SERVER_PROCESS_INDEX, METRICS_ENABLED, TRACE_ENABLED, LOG_RPC_LENTO_MS,
+    HEALTH_INTERVAL_SECONDS, SERVICO_SAUDE, SHUTDOWN_DELAY_SECONDS, SHUTDOWN_GRACE_SECONDS,
+    STREAM_BATCH_SIZE, WATCH_MAX_PENDENTES, log, log_db, to_veiculo, validar_placas, resultado_placas,
+    parse_id, validar_ids, resultado_ids, validar_pagina, montar_pagina,
+    configurar_logs, configurar_rastreamento, argumentos_servidor, porta_metricas
+)
+from db_pool import ConnectionPool
+from cache import TTLCache
+from listener import ChangeListener
+from watch import Assinatura, Difusor
+from metricas import InterceptorMetricas, iniciar_servidor_metricas, medir_consulta
+import rastreamento
+from rastreamento import CursorRastreado, InterceptorRastreamento
+import logs
+from logs import InterceptorLogs
+from saude import MonitorSaude
+import configuracao
+import prefork
+
+DB_CONNECT_KWARGS = dict(
+    host=DB_HOST,
+    database=DB_NAME,
+    user=DB_USER,
+    password=DB_PASSWORD,
+    # sem rastreamento configurado o cursor só repassa as chamadas
+    cursor_factory=CursorRastreado
+)
+
+# Por padrão o pool tem uma conexão por worker do gRPC: nenhum worker espera por conexão
+# e o banco não recebe mais conexões do que o servidor consegue usar.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(GRPC_MAX_WORKERS)))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_HEALTH_CHECK_INTERVAL", "30"))
+
+# Consultas quentes, preparadas uma vez em cada conexão do pool (inclusive nas
+# recriadas após uma queda) e executadas pelo nome, sem novo parse/plano a cada chamada.
+PREPARED_STATEMENTS = {
+    "veiculo_por_placa": "SELECT id, placa, modelo, ano FROM veiculos WHERE placa = $1",
+    "veiculo_por_id": "SELECT id, placa, modelo, ano FROM veiculos WHERE id = $1",
+    "veiculos_por_placas": "SELECT id, placa, modelo, ano FROM veiculos WHERE placa = ANY($1::varchar[])",
+    "veiculos_por_ids": "SELECT id, placa, modelo, ano FROM veiculos WHERE id = ANY($1::integer[])",
+}
+
+# "threads" (padrão) usa grpc.server + psycopg2; "asyncio" usa grpc.aio + asyncpg (ver aio_server.py).
+SERVER_MODE = os.getenv("SERVER_MODE", "threads")
+
+# Caches de BuscarPorPlaca e BuscaPorId. As entradas são invalidadas pelas notificações do
+# trigger em `veiculos`; o TTL é só uma rede de segurança.
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "1") == "1"
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "10000"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("CACHE_NEGATIVE_TTL_SECONDS", "5"))
+NOTIFY_CHANNEL = "veiculos_alterados"
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+
+# No modo threads cada WatchVeiculos prende um worker do gRPC enquanto durar (e a réplica
+# de cada processo do MS Manutenções mantém um aberto). Acima de WATCH_MAX_ASSINATURAS o
+# stream é recusado com RESOURCE_EXHAUSTED: os outros workers ficam para os demais RPCs.
+# No modo asyncio os streams não ocupam threads e vale AIO_WATCH_MAX_ASSINATURAS.
+WATCH_MAX_ASSINATURAS = int(os.getenv("WATCH_MAX_ASSINATURAS", str(max(GRPC_MAX_WORKERS // 2, 1))))
+
+
+def _preparar_conexao(conn):
+    with conn.cursor() as cursor:
+        for nome, query in PREPARED_STATEMENTS.items():
+            cursor.execute(f"PREPARE {nome} AS {query};")
 
 
 #classe de acesso ao banco de dados
 class VeiculosDB:
-    def __init__(self):
-        self._conn = None
-        self._cursor = None
-        self._connect()
+    def __init__(self, pool_size=DB_POOL_SIZE):
+        self._pool = None
+        self._connect(pool_size)
 
-    def _connect(self):
-        """Tenta estabelecer a conexão com o PostgreSQL"""
+    def _connect(self, pool_size):
+        """Tenta criar o pool de conexões com o PostgreSQL"""
         max_retries = 5
         retry_delay_seconds = 5
 
         for i in range(max_retries):
             try:
-                print(f"Tentando conectar ao PostgreSQL em: {DB_HOST}...")
-                self._conn = psycopg2.connect(
-                    host=DB_HOST,
-                    database=DB_NAME,
-                    user=DB_USER,
-                    password=DB_PASSWORD
-                )
-                self._conn.autocommit = True
-                self._cursor = self._conn.cursor()
-                print("Conexão com o PostgreSQL estabelecida com sucesso!")
-
+                log_db.info(f"Tentando conectar ao PostgreSQL em: {DB_HOST}...")
+                # o schema precisa existir antes de o pool preparar as consultas
                 self._setup_db()
+
+                self._pool = ConnectionPool(
+                    DB_CONNECT_KWARGS,
+                    max_size=pool_size,
+                    timeout=DB_POOL_TIMEOUT,
+                    health_check_interval=DB_HEALTH_CHECK_INTERVAL,
+                    on_connect=_preparar_conexao
+                )
+                log_db.info(f"Pool de conexões com o PostgreSQL criado ({pool_size} conexões no máximo).")
                 return
             except psycopg2.OperationalError as e:
-                print(f"Erro de conexão com o DB: {e}. Tentativa {i + 1}/{max_retries}.")
+                log_db.warning(f"Erro de conexão com o DB: {e}. Tentativa {i + 1}/{max_retries}.")
                 if i < max_retries - 1:
                     time.sleep(retry_delay_seconds)
                 else:
                     raise ConnectionError("Falha ao conectar ao PostgreSQL após várias tentativas")
+
     def _setup_db(self):
-        """Cria a tabela de veiculos se ela não existir."""
+        """
+        Cria a tabela de veiculos se ela não existir. Tudo numa transação, serializada
+        entre instâncias (e processos do modo multiprocesso) por um advisory lock.
+        """
         create_table_query = """
         CREATE TABLE IF NOT EXISTS veiculos(
             id SERIAL PRIMARY KEY,
@@ -56,43 +129,363 @@ class VeiculosDB:
             ano INTEGER
         );
         """
-        self._cursor.execute(create_table_query)
-        self._cursor.execute("SELECT COUNT(*) FROM veiculos;")
-        count = self._cursor.fetchone()[0]
-
-        if count == 0:
-            print("Inserindo dados iniciais na tabela 'veiculos'...")
-            self._cursor.execute(
-                "INSERT INTO veiculos (placa, modelo, ano) VALUES (%s, %s, %s) ON CONFLICT (placa) DO NOTHING;",
-                ('ABC-1234', 'Fusion', 2018)
-            )
-            self._cursor.execute(
-                "INSERT INTO veiculos (placa, modelo, ano) VALUES (%s, %s, %s) ON CONFLICT (placa) DO NOTHING;",
-                ('DEF-5678', 'Civic', 2020)
-            )
-            print("Dados de teste inseridos.")
-
-        self._conn.commit()
-
+        # Cada alteração em `veiculos` publica as linhas antiga e nova em
+        # NOTIFY_CHANNEL, para que os caches do serviço sejam invalidados.
+        notify_trigger_query = f"""
+        CREATE OR REPLACE FUNCTION notificar_veiculo_alterado() RETURNS trigger AS $$
+        BEGIN
+            IF TG_LEVEL = 'STATEMENT' THEN
+                PERFORM pg_notify('{NOTIFY_CHANNEL}', json_build_object('op', TG_OP)::text);
+            ELSE
+                PERFORM pg_notify('{NOTIFY_CHANNEL}', json_build_object(
+                    'op', TG_OP, 'old', row_to_json(OLD), 'new', row_to_json(NEW)
+                )::text);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE TRIGGER veiculos_alterados
+            AFTER INSERT OR UPDATE OR DELETE ON veiculos
+            FOR EACH ROW EXECUTE FUNCTION notificar_veiculo_alterado();
+
+        CREATE OR REPLACE TRIGGER veiculos_truncados
+            AFTER TRUNCATE ON veiculos
+            FOR EACH STATEMENT EXECUTE FUNCTION notificar_veiculo_alterado();
+        """
+        conn = psycopg2.connect(**DB_CONNECT_KWARGS)
+        try:
+            with conn, conn.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext('veiculos_setup'));")
+                cursor.execute(create_table_query)
+                cursor.execute(notify_trigger_query)
+                cursor.execute("SELECT COUNT(*) FROM veiculos;")
+                count = cursor.fetchone()[0]
+
+                if count == 0:
+                    log_db.info("Inserindo dados iniciais na tabela 'veiculos'...")
+                    cursor.execute(
+                        "INSERT INTO veiculos (placa, modelo, ano) VALUES (%s, %s, %s) ON CONFLICT (placa) DO NOTHING;",
+                        ('ABC-1234', 'Fusion', 2018)
+                    )
+                    cursor.execute(
+                        "INSERT INTO veiculos (placa, modelo, ano) VALUES (%s, %s, %s) ON CONFLICT (placa) DO NOTHING;",
+                        ('DEF-5678', 'Civic', 2020)
+                    )
+                    log_db.info("Dados de teste inseridos.")
+        finally:
+            conn.close()
+
+    def _fetchone(self, query, params=None):
+        def execute(cursor):
+            cursor.execute(query, params)
+            return cursor.fetchone()
+        return self._pool.run(execute)
+
+    def _fetchall(self, query, params=None):
+        def execute(cursor):
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        return self._pool.run(execute)
+
+    @medir_consulta
     def fetch_all(self):
         """Busca todos os veiculos no banco."""
-        self._cursor.execute("SELECT id, placa, modelo, ano FROM veiculos;")
-        return self._cursor.fetchall()
+        return self._fetchall("SELECT id, placa, modelo, ano FROM veiculos;")
     
+    @medir_consulta
     def fetch_by_placa(self, placa):
         """Busca um veiculo pela placa"""
-        self._cursor.execute("SELECT id, placa, modelo, ano FROM veiculos WHERE placa = %s;", (placa,))        
-        return self._cursor.fetchone()
+        return self._fetchone("EXECUTE veiculo_por_placa (%s);", (placa,))
+
+    @medir_consulta
+    def fetch_by_id(self, veiculo_id):
+        """Busca um veiculo pela chave primária"""
+        return self._fetchone("EXECUTE veiculo_por_id (%s);", (veiculo_id,))
 
+    @medir_consulta
+    def fetch_by_ids(self, ids):
+        """Busca vários veiculos pela chave primária; ids inexistentes simplesmente não voltam."""
+        return self._fetchall("EXECUTE veiculos_por_ids (%s);", (list(ids),))
+
+    @medir_consulta
+    def fetch_by_placas(self, placas):
+        """Busca vários veiculos de uma vez; placas inexistentes simplesmente não voltam."""
+        return self._fetchall("EXECUTE veiculos_por_placas (%s);", (list(placas),))
+
+    @medir_consulta
+    def import_batch(self, veiculos):
+        """
+        Grava um lote de tuplas (placa, modelo, ano) com COPY numa tabela de
+        staging e mescla em `veiculos` numa única transação: placas novas são
+        inseridas e as existentes atualizadas (se os dados mudaram).
+        As placas do lote precisam ser únicas. Devolve (inseridos, atualizados).
+        """
+        buffer = io.StringIO()
+        for placa, modelo, ano in veiculos:
+            buffer.write(f"{_copy_text(placa)}\t{_copy_text(modelo)}\t{_copy_text(ano)}\n")
+        buffer.seek(0)
+
+        with self._pool.connection() as conn:
+            conn.autocommit = False
+            with conn.cursor() as cursor:
+                # temporária por conexão do pool; ON COMMIT DELETE ROWS a esvazia a cada lote
+                cursor.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS veiculos_staging(
+                        placa VARCHAR(10),
+                        modelo VARCHAR(100),
+                        ano INTEGER
+                    ) ON COMMIT DELETE ROWS;
+                """)
+                cursor.copy_expert("COPY veiculos_staging (placa, modelo, ano) FROM STDIN;", buffer)
+                cursor.execute("""
+                    INSERT INTO veiculos (placa, modelo, ano)
+                    SELECT placa, modelo, ano FROM veiculos_staging
+                    ON CONFLICT (placa) DO UPDATE SET modelo = EXCLUDED.modelo, ano = EXCLUDED.ano
+                    WHERE (veiculos.modelo, veiculos.ano) IS DISTINCT FROM (EXCLUDED.modelo, EXCLUDED.ano)
+                    RETURNING (xmax = 0) AS inserido;
+                """)
+                inseridos = atualizados = 0
+                for (inserido,) in cursor.fetchall():
+                    if inserido:
+                        inseridos += 1
+                    else:
+                        atualizados += 1
+            conn.commit()
+        return inseridos, atualizados
+
+    @medir_consulta
+    def iter_all(self, batch_size=STREAM_BATCH_SIZE):
+        """
+        Percorre todos os veiculos em lotes de `batch_size` linhas.
+
+        Usa um cursor nomeado (do lado do servidor), então só um lote fica em
+        memória por vez. A conexão fica emprestada até o gerador terminar ou ser fechado.
+        """
+        with self._pool.connection() as conn:
+            # cursores nomeados só existem dentro de uma transação
+            conn.autocommit = False
+            with conn.cursor(name="stream_veiculos") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute("SELECT id, placa, modelo, ano FROM veiculos ORDER BY id;")
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+
+    @medir_consulta
+    def fetch_page(self, after_id, limit):
+        """Busca até `limit` veiculos com id maior que `after_id` (paginação por keyset)."""
+        return self._fetchall(
+            "SELECT id, placa, modelo, ano FROM veiculos WHERE id > %s ORDER BY id LIMIT %s;",
+            (after_id, limit)
+        )
+
+    def stats(self):
+        """Métricas do pool de conexões."""
+        return self._pool.stats()
+
+    @medir_consulta
+    def verificar(self):
+        """SELECT 1 por uma conexão do pool, para o health check."""
+        with self._pool.cursor() as cursor:
+            cursor.execute("SELECT 1;")
+            return cursor.fetchone() == (1,)
+
+    def close(self):
+        self._pool.closeall()
+
+
+
+def _evento_veiculo(evento):
+    """Converte a notificação do trigger em EventoVeiculo."""
+    Evento = veiculos_pb2.EventoVeiculo
+    if evento.get("op") == "TRUNCATE":
+        return Evento(tipo=Evento.LIMPAR)
+    if evento.get("op") == "DELETE":
+        tipo, row = Evento.REMOVIDO, evento["old"]
+    else:
+        tipo, row = Evento.ALTERADO, evento["new"]
+    return Evento(tipo=tipo, veiculo=to_veiculo((row["id"], row["placa"], row["modelo"], row["ano"])))
+
+
+def _copy_text(value):
+    """Formata um valor para o formato texto do COPY."""
+    if value is None:
+        return "\\N"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _validar_veiculo_importado(veiculo):
+    """Devolve o motivo da rejeição do veículo, ou None se ele puder ser importado."""
+    if not veiculo.placa:
+        return "placa vazia"
+    if len(veiculo.placa) > 10:
+        return f"placa {veiculo.placa!r} com mais de 10 caracteres"
+    if not veiculo.modelo:
+        return f"placa {veiculo.placa}: modelo vazio"
+    if len(veiculo.modelo) > 100:
+        return f"placa {veiculo.placa}: modelo com mais de 100 caracteres"
+    return None
 
 
 class GestaoVeiculosServicer(veiculos_pb2_grpc.GestaoVeiculosServicer):
-    def __init__(self):
+    def __init__(self, max_assinaturas_watch=WATCH_MAX_ASSINATURAS, db_pool_size=DB_POOL_SIZE):
         """
         Inicializa o serviço, criando uma instância da classe de acesso ao banco de dados.
         """
 
-        self.db = VeiculosDB()
+        self.db = VeiculosDB(db_pool_size)
+
+        self.cache = TTLCache(CACHE_MAX_SIZE, CACHE_TTL_SECONDS)
+        self.cache_negativo = TTLCache(CACHE_MAX_SIZE, CACHE_NEGATIVE_TTL_SECONDS)
+        self.cache_id = TTLCache(CACHE_MAX_SIZE, CACHE_TTL_SECONDS)
+        self.cache_id_negativo = TTLCache(CACHE_MAX_SIZE, CACHE_NEGATIVE_TTL_SECONDS)
+        # a escuta alimenta a invalidação do cache e os streams de WatchVeiculos
+        self.watchers = Difusor(max_assinaturas_watch)
+        self.listener = ChangeListener(
+            DB_CONNECT_KWARGS, NOTIFY_CHANNEL,
+            on_change=self._on_veiculo_alterado,
+            on_reset=self._on_escuta_reiniciada
+        )
+        self.listener.start()
+        # MonitorSaude, criado em serve()
+        self.saude = None
+
+    def close(self):
+        self.listener.stop()
+        self.db.close()
+
+    def _cache_ativo(self):
+        # Sem a escuta ativa não saberíamos das alterações; o cache é ignorado.
+        return CACHE_ENABLED and self.listener.listening
+
+    def _on_escuta_reiniciada(self):
+        # notificações podem ter se perdido: o cache recomeça vazio e os
+        # clientes de WatchVeiculos reconectam para receber um novo snapshot
+        self._limpar_cache()
+        self.watchers.encerrar_todas("UNAVAILABLE", "escuta de alterações reiniciada; refaça o WatchVeiculos")
+
+    def _on_veiculo_alterado(self, evento):
+        self.watchers.publicar(_evento_veiculo(evento))
+        if evento.get("op") == "TRUNCATE":
+            self._limpar_cache()
+            return
+        for row in (evento.get("old"), evento.get("new")):
+            if row:
+                self.cache.invalidate(row["placa"])
+                self.cache_negativo.invalidate(row["placa"])
+                self.cache_id.invalidate(row["id"])
+                self.cache_id_negativo.invalidate(row["id"])
+
+    def _limpar_cache(self):
+        self.cache.clear()
+        self.cache_negativo.clear()
+        self.cache_id.clear()
+        self.cache_id_negativo.clear()
+
+    def _caches(self, por_id):
+        """(cache, cache negativo, coluna da chave na linha) do índice por placa ou por id."""
+        if por_id:
+            return self.cache_id, self.cache_id_negativo, 0
+        return self.cache, self.cache_negativo, 1
+
+    def _consultar_cache(self, chaves, por_id=False):
+        """
+        Separa as chaves (placas, ou ids com por_id=True) já resolvidas pelo
+        cache das que precisam ir ao banco. Devolve ({chave: tupla}, faltantes,
+        geracao); `geracao` deve ser repassada a `_guardar_no_cache` depois da consulta.
+        """
+        if not self._cache_ativo():
+            return {}, list(chaves), None
+
+        cache, cache_negativo, _ = self._caches(por_id)
+        geracao = (cache.generation(), cache_negativo.generation())
+        encontrados = {}
+        faltantes = []
+        for chave in chaves:
+            veiculo_tuple = cache.get(chave)
+            if veiculo_tuple is not None:
+                encontrados[chave] = veiculo_tuple
+            elif cache_negativo.get(chave) is None:
+                faltantes.append(chave)
+        return encontrados, faltantes, geracao
+
+    def _guardar_no_cache(self, faltantes, rows, geracao, por_id=False):
+        """Guarda o resultado da consulta das chaves `faltantes`; as que não voltaram viram cache negativo."""
+        if geracao is None:
+            return
+        cache, cache_negativo, coluna = self._caches(por_id)
+        generation, generation_negativo = geracao
+        resolvidas = set()
+        for row in rows:
+            resolvidas.add(row[coluna])
+            cache.set(row[coluna], row, generation=generation)
+        for chave in faltantes:
+            if chave not in resolvidas:
+                cache_negativo.set(chave, True, generation=generation_negativo)
+
+    def _buscar_placa(self, placa):
+        """Resolve a placa pelo cache e, em caso de miss, pelo banco (guardando o resultado)."""
+        encontrados, faltantes, geracao = self._consultar_cache([placa])
+        if not faltantes:
+            return encontrados.get(placa)
+        veiculo_tuple = self.db.fetch_by_placa(placa)
+        self._guardar_no_cache(faltantes, [veiculo_tuple] if veiculo_tuple else [], geracao)
+        return veiculo_tuple
+
+    def _buscar_placas(self, placas):
+        """
+        Versão em lote de `_buscar_placa`: devolve {placa: tupla} para as placas
+        encontradas, consultando o banco uma única vez para todas as que faltam no cache.
+        """
+        encontrados, faltantes, geracao = self._consultar_cache(placas)
+        if faltantes:
+            rows = self.db.fetch_by_placas(faltantes)
+            self._guardar_no_cache(faltantes, rows, geracao)
+            for row in rows:
+                encontrados[row[1]] = row
+        return encontrados
+
+    def _buscar_id(self, veiculo_id):
+        """Como `_buscar_placa`, pela chave primária."""
+        encontrados, faltantes, geracao = self._consultar_cache([veiculo_id], por_id=True)
+        if not faltantes:
+            return encontrados.get(veiculo_id)
+        veiculo_tuple = self.db.fetch_by_id(veiculo_id)
+        self._guardar_no_cache(faltantes, [veiculo_tuple] if veiculo_tuple else [], geracao, por_id=True)
+        return veiculo_tuple
+
+    def _buscar_ids(self, ids):
+        """Como `_buscar_placas`, pela chave primária: devolve {id: tupla}."""
+        encontrados, faltantes, geracao = self._consultar_cache(ids, por_id=True)
+        if faltantes:
+            rows = self.db.fetch_by_ids(faltantes)
+            self._guardar_no_cache(faltantes, rows, geracao, por_id=True)
+            for row in rows:
+                encontrados[row[0]] = row
+        return encontrados
+
+    def stats(self):
+        stats = {
+            "pool": self.db.stats(),
+            "cache": self.cache.stats(),
+            "cache_negativo": self.cache_negativo.stats(),
+            "cache_id": self.cache_id.stats(),
+            "cache_id_negativo": self.cache_id_negativo.stats(),
+            "cache_ativo": self._cache_ativo(),
+            "watch": self.watchers.stats(),
+        }
+        if rastreamento.ativo():
+            stats["rastreamento"] = rastreamento.stats()
+        stats["logs"] = logs.stats()
+        if self.saude is not None:
+            stats["saude"] = self.saude.stats()
+        return stats
+
+    def verificacoes_saude(self):
+        return [("db", self.db.verificar, True)]
 
     def ListarTodos(self, request, context):
         # """
@@ -115,65 +508,285 @@ class GestaoVeiculosServicer(veiculos_pb2_grpc.GestaoVeiculosServicer):
             veiculos_tuples = self.db.fetch_all()
         except Exception as e:
             context.set_code(grpc.StatusCode.INTERNAL)
-            context.set.details(f"Erro no acesso ao DB: {str(e)}")
-            return veiculos_pb2.ListarVeiculos()
-        lista_de_mensagem_grpc = []
-
-        for v_id, placa, modelo, ano in veiculos_tuples:
-            lista_de_mensagem_grpc.append(
-                veiculos_pb2.Veiculo(
-                    id=str(v_id),
-                    placa=placa,
-                    modelo=modelo,
-                    ano=ano
-                    
-                )
-            )
+            context.set_details(f"Erro no acesso ao DB: {str(e)}")
+            return veiculos_pb2.ListaVeiculos()
+        lista_de_mensagem_grpc = [to_veiculo(row) for row in veiculos_tuples]
         return veiculos_pb2.ListaVeiculos(items=lista_de_mensagem_grpc)
     
+    def BuscaPorId(self, request, context):
+        """
+        Implementa o RPC BuscaPorId.
+        Busca um veículo pela chave primária (o id_veiculo guardado nas manutenções).
+        """
+        try:
+            veiculo_id = parse_id(request.id)
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return veiculos_pb2.Veiculo()
+
+        try:
+            veiculo_tuple = self._buscar_id(veiculo_id)
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Erro no acesso ao DB: {str(e)}")
+            return veiculos_pb2.Veiculo()
+
+        if veiculo_tuple:
+            return to_veiculo(veiculo_tuple)
+        context.set_code(grpc.StatusCode.NOT_FOUND)
+        context.set_details(f"Veículo com id {veiculo_id} não encontrado.")
+        return veiculos_pb2.Veiculo()
+
+    def BuscaPorIds(self, request, context):
+        """
+        Implementa o RPC BuscaPorIds.
+        Versão em lote de BuscaPorId, para hidratar relatórios com muitas manutenções.
+        """
+        ids = validar_ids(request, context)
+        if ids is None:
+            return veiculos_pb2.ResultadoBuscaIds()
+
+        try:
+            encontrados = self._buscar_ids(ids)
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Erro no acesso ao DB: {str(e)}")
+            return veiculos_pb2.ResultadoBuscaIds()
+        return resultado_ids(ids, encontrados)
+
     def BuscarPorPlaca(self, request, context):
         """
         implementa o RPC BuscarPorPlaca.
         Busca um veículo pela Placa (usado pelo microserviço de manutenções).
         """
-        veiculo_tuple = self.db.fetch_by_placa(request.placa)
+        logs.adicionar_campos(placa=request.placa)
+        try:
+            veiculo_tuple = self._buscar_placa(request.placa)
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Erro no acesso ao DB: {str(e)}")
+            return veiculos_pb2.Veiculo()
 
         if veiculo_tuple:
-            v_id, placa, modelo, ano = veiculo_tuple
-            return veiculos_pb2.Veiculo(
-                id = str(v_id),
-                placa = placa,
-                modelo = modelo,
-                ano = ano
-            )
-        else:
-            context.set_code(grpc.StatusCode.NOT_FOUND)
-            context.set_details(f"Veículo com placa {request.placa} não encontrado.")
-            return veiculos_pb2.Veiculo()
+            return to_veiculo(veiculo_tuple)
+        context.set_code(grpc.StatusCode.NOT_FOUND)
+        context.set_details(f"Veículo com placa {request.placa} não encontrado.")
+        return veiculos_pb2.Veiculo()
+
+    def BuscarPorPlacas(self, request, context):
+        """
+        Implementa o RPC BuscarPorPlacas.
+        Resolve várias placas numa única consulta; placas repetidas são buscadas uma vez só
+        e as inexistentes voltam em nao_encontradas, na ordem do pedido.
+        """
+        placas = validar_placas(request, context)
+        if placas is None:
+            return veiculos_pb2.ResultadoBuscaPlacas()
+
+        try:
+            encontrados = self._buscar_placas(placas)
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Erro no acesso ao DB: {str(e)}")
+            return veiculos_pb2.ResultadoBuscaPlacas()
+        return resultado_placas(placas, encontrados)
+
+    def ImportarVeiculos(self, request_iterator, context):
+        """
+        Implementa o RPC ImportarVeiculos.
+        Recebe um stream de veículos e os grava em lotes de IMPORT_BATCH_SIZE,
+        devolvendo as contagens de cada lote e os totais.
+        """
+        resultado = veiculos_pb2.ResultadoImportacao()
+        lote = []
+        for veiculo in request_iterator:
+            lote.append(veiculo)
+            if len(lote) >= IMPORT_BATCH_SIZE:
+                self._importar_lote(lote, resultado)
+                lote = []
+        if lote:
+            self._importar_lote(lote, resultado)
+        return resultado
+
+    def _importar_lote(self, lote, resultado):
+        resultado_lote = resultado.lotes.add(lote=len(resultado.lotes) + 1)
+
+        # a última ocorrência de uma placa repetida no lote é a que vale
+        validos = {}
+        for veiculo in lote:
+            erro = _validar_veiculo_importado(veiculo)
+            if erro is not None:
+                resultado_lote.erros.append(erro)
+                continue
+            if veiculo.placa in validos:
+                resultado_lote.erros.append(f"placa {veiculo.placa} repetida no lote; vale a última ocorrência")
+            validos[veiculo.placa] = (veiculo.placa, veiculo.modelo, veiculo.ano or None)
+
+        resultado_lote.rejeitados = len(lote) - len(validos)
+        if validos:
+            try:
+                inseridos, atualizados = self.db.import_batch(validos.values())
+            except Exception as e:
+                resultado_lote.rejeitados = len(lote)
+                resultado_lote.erros.append(f"Falha ao gravar o lote: {str(e)}")
+            else:
+                resultado_lote.inseridos = inseridos
+                resultado_lote.atualizados = atualizados
+                resultado_lote.inalterados = len(validos) - inseridos - atualizados
+
+        resultado.total_inseridos += resultado_lote.inseridos
+        resultado.total_atualizados += resultado_lote.atualizados
+        resultado.total_rejeitados += resultado_lote.rejeitados
+        resultado.total_inalterados += resultado_lote.inalterados
+
+    def StreamVeiculos(self, request, context):
+        """
+        Implementa o RPC StreamVeiculos.
+        Envia todos os veículos um a um, lidos do banco em lotes de STREAM_BATCH_SIZE.
+        """
+        try:
+            for rows in self.db.iter_all():
+                for row in rows:
+                    yield to_veiculo(row)
+        except Exception as e:
+            context.abort(grpc.StatusCode.INTERNAL, f"Erro no acesso ao DB: {str(e)}")
+
+    def ListarPagina(self, request, context):
+        """
+        Implementa o RPC ListarPagina.
+        Retorna uma página de veículos ordenada por id; o next_page_token vem vazio na última página.
+        """
+        pagina = validar_pagina(request, context)
+        if pagina is None:
+            return veiculos_pb2.PaginaVeiculos()
+        after_id, page_size = pagina
+
+        try:
+            # uma linha a mais só para saber se existe próxima página
+            rows = self.db.fetch_page(after_id, page_size + 1)
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Erro no acesso ao DB: {str(e)}")
+            return veiculos_pb2.PaginaVeiculos()
+        return montar_pagina(rows, page_size)
+
+
+    def WatchVeiculos(self, request, context):
+        """
+        Implementa o RPC WatchVeiculos.
+        Envia o snapshot de todos os veículos e depois as alterações notificadas pelo trigger.
+        """
+        if not self.listener.listening:
+            context.abort(grpc.StatusCode.UNAVAILABLE, "Escuta de alterações indisponível.")
+
+        # assina antes do snapshot: alterações feitas durante a leitura ficam na
+        # fila e, reaplicadas depois dele, levam ao estado mais recente
+        assinatura = Assinatura(WATCH_MAX_PENDENTES)
+        if not self.watchers.adicionar(assinatura):
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "Limite de streams de WatchVeiculos atingido.")
+        context.add_callback(lambda: assinatura.encerrar("CANCELLED"))
+        try:
+            try:
+                for rows in self.db.iter_all():
+                    for row in rows:
+                        yield veiculos_pb2.EventoVeiculo(
+                            tipo=veiculos_pb2.EventoVeiculo.SNAPSHOT, veiculo=to_veiculo(row)
+                        )
+            except Exception as e:
+                context.abort(grpc.StatusCode.INTERNAL, f"Erro no acesso ao DB: {str(e)}")
+            yield veiculos_pb2.EventoVeiculo(tipo=veiculos_pb2.EventoVeiculo.SNAPSHOT_FIM)
+
+            while True:
+                eventos = assinatura.proximos()
+                if not eventos and assinatura.fim is not None:
+                    break
+                yield from eventos
+        finally:
+            self.watchers.remover(assinatura)
+
+        codigo, detalhes = assinatura.fim
+        if codigo != "CANCELLED":
+            context.abort(grpc.StatusCode[codigo], detalhes)
+
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    configurar_logs()
+    log.info("Configuração efetiva.", extra={"config": configuracao.efetiva(comum, sys.modules[__name__])})
+    interceptors = [InterceptorMetricas()] if METRICS_ENABLED else []
+    if TRACE_ENABLED:
+        configurar_rastreamento()
+        interceptors.append(InterceptorRastreamento())
+    # por último (mais interno): o registro do RPC sai com o trace_id do span
+    interceptors.append(InterceptorLogs(LOG_RPC_LENTO_MS))
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=GRPC_MAX_WORKERS),
+        **argumentos_servidor(interceptors)
+    )
 
+    servicer = GestaoVeiculosServicer()
     veiculos_pb2_grpc.add_GestaoVeiculosServicer_to_server(
-        GestaoVeiculosServicer(), server
+        servicer, server
+    )
+    # Watch do health sem prender um worker do pool do gRPC
+    saude = health.HealthServicer(
+        experimental_non_blocking=True,
+        experimental_thread_pool=futures.ThreadPoolExecutor(max_workers=1)
     )
-    server.add_insecure_port('[::]:50051')
+    health_pb2_grpc.add_HealthServicer_to_server(saude, server)
+    servicer.saude = MonitorSaude(saude.set, SERVICO_SAUDE, servicer.verificacoes_saude(), HEALTH_INTERVAL_SECONDS)
+    server.add_insecure_port(f'[::]:{GRPC_PORT}')
     server.start()
-
-    print("Microserviço de Gestão de Veiculos rodando na porta 50051.")
-
-    try:
-        loop_counter = 0
-        while True:
-            loop_counter += 1
-            print(f"Servidor gRPC ativo. Loop de manutenção: {loop_counter}")
-            time.sleep(86400)
-    except KeyboardInterrupt:
-        server.stop(0)
+    servicer.saude.start()
+    if METRICS_ENABLED:
+        iniciar_servidor_metricas(porta_metricas(), "veiculos", servicer.stats)
+
+    log.info(f"Microserviço de Gestão de Veiculos rodando na porta {GRPC_PORT} ({GRPC_MAX_WORKERS} workers).")
+
+    parar = threading.Event()
+    for sinal in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sinal, lambda *_: parar.set())
+
+    loop_counter = 0
+    while not parar.is_set():
+        loop_counter += 1
+        log.info("Servidor gRPC ativo.", extra={"loop": loop_counter, "stats": servicer.stats()})
+        parar.wait(STATS_INTERVAL_SECONDS)
+
+    log.info("Encerrando: NOT_SERVING e drenagem dos RPCs em andamento.", extra={"grace_seconds": SHUTDOWN_GRACE_SECONDS})
+    servicer.saude.encerrar()
+    time.sleep(SHUTDOWN_DELAY_SECONDS)
+    # streams de WatchVeiculos não terminam sozinhos: os clientes reassinam em outra instância
+    servicer.watchers.encerrar_todas("UNAVAILABLE", "Servidor encerrando.")
+    server.stop(SHUTDOWN_GRACE_SECONDS).wait()
+    servicer.close()
+    rastreamento.encerrar()
+    log.info("Servidor encerrado.")
+    logs.encerrar()
+
+
+def _supervisionar():
+    """SERVER_PROCESSES cópias deste servidor (no modo de SERVER_MODE) sob um supervisor."""
+    configurar_logs(processo="supervisor")
+    processos = SERVER_PROCESSES or os.cpu_count()
+    log.info(f"Modo multiprocesso: {processos} processos na porta {GRPC_PORT} (SO_REUSEPORT).")
+    comando = [sys.executable, os.path.abspath(__file__)]
+    # além do prazo dos servidores, o tempo de fechar pools e exportar os últimos spans
+    prefork.Supervisor(comando, processos, SHUTDOWN_DELAY_SECONDS + SHUTDOWN_GRACE_SECONDS + 5).executar()
+    log.info("Supervisor encerrado.")
+    logs.encerrar()
 
 
 if __name__ == '__main__':
-    serve()        
+    if SERVER_PROCESSES != 1 and SERVER_PROCESS_INDEX < 0:
+        _supervisionar()
+    elif SERVER_MODE == "asyncio":
+        # aio_server importa o servicer como `server`: reaproveita este módulo em vez de carregá-lo de novo
+        sys.modules.setdefault("server", sys.modules[__name__])
+        import aio_server
+        aio_server.serve()
+    else:
+        serve()        
 
 
 
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+from collections import deque
+
+
+class Assinatura:
+    """
+    Fila de eventos de um cliente de stream, alimentada por outra thread.
+
+    A fila é limitada em `max_pendentes`: um cliente que não acompanha é
+    encerrado (e vai precisar ressincronizar) em vez de fazer o servidor
+    acumular eventos sem limite. `fim` guarda (código, detalhes) de quem
+    encerrou a assinatura.
+    """
+
+    def __init__(self, max_pendentes):
+        self._max_pendentes = max_pendentes
+        self._eventos = deque()
+        self._cond = threading.Condition()
+        self.fim = None
+
+    def _acordar(self):
+        self._cond.notify_all()
+
+    def publicar(self, evento):
+        with self._cond:
+            if self.fim is not None:
+                return
+            if len(self._eventos) >= self._max_pendentes:
+                self._eventos.clear()
+                self.fim = ("RESOURCE_EXHAUSTED", f"mais de {self._max_pendentes} eventos pendentes")
+            else:
+                self._eventos.append(evento)
+            self._acordar()
+
+    def encerrar(self, codigo, detalhes=""):
+        with self._cond:
+            if self.fim is None:
+                self.fim = (codigo, detalhes)
+            self._acordar()
+
+    def _retirar(self):
+        eventos = list(self._eventos)
+        self._eventos.clear()
+        return eventos
+
+    def proximos(self, timeout=None):
+        """
+        Espera e devolve os eventos pendentes. Lista vazia com `fim` preenchido
+        significa que a assinatura acabou; lista vazia sem `fim`, que deu timeout.
+        """
+        with self._cond:
+            if self.fim is None and not self._eventos:
+                self._cond.wait(timeout)
+            if self.fim is not None:
+                return []
+            return self._retirar()
+
+
+class AssinaturaAsync(Assinatura):
+    """Assinatura consumida por uma corrotina; os eventos continuam vindo de outra thread."""
+
+    def __init__(self, max_pendentes, loop):
+        super().__init__(max_pendentes)
+        self._loop = loop
+        self._sinal = asyncio.Event()
+
+    def _acordar(self):
+        try:
+            self._loop.call_soon_threadsafe(self._sinal.set)
+        except RuntimeError:
+            # event loop já fechado: não há mais quem consumir
+            pass
+
+    async def proximos_async(self):
+        while True:
+            self._sinal.clear()
+            with self._cond:
+                if self.fim is not None:
+                    return []
+                if self._eventos:
+                    return self._retirar()
+            await self._sinal.wait()
+
+
+class Difusor:
+    """
+    Entrega cada evento publicado a todas as assinaturas ativas. Com `max_assinaturas`
+    as que passarem do limite são recusadas.
+    """
+
+    def __init__(self, max_assinaturas=None):
+        self._max_assinaturas = max_assinaturas
+        self._lock = threading.Lock()
+        self._assinaturas = set()
+        self._eventos = 0
+        self._recusadas = 0
+
+    def adicionar(self, assinatura):
+        """False (e a assinatura não entra) se o limite de assinaturas já foi atingido."""
+        with self._lock:
+            if self._max_assinaturas is not None and len(self._assinaturas) >= self._max_assinaturas:
+                self._recusadas += 1
+                return False
+            self._assinaturas.add(assinatura)
+            return True
+
+    def remover(self, assinatura):
+        with self._lock:
+            self._assinaturas.discard(assinatura)
+
+    def publicar(self, evento):
+        with self._lock:
+            assinaturas = list(self._assinaturas)
+            self._eventos += 1
+        for assinatura in assinaturas:
+            assinatura.publicar(evento)
+
+    def encerrar_todas(self, codigo, detalhes=""):
+        with self._lock:
+            assinaturas = list(self._assinaturas)
+        for assinatura in assinaturas:
+            assinatura.encerrar(codigo, detalhes)
+
+    def stats(self):
+        with self._lock:
+            return {"assinaturas": len(self._assinaturas), "eventos": self._eventos, "recusadas": self._recusadas}